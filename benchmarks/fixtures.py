@@ -0,0 +1,185 @@
+"""Synthetic inputs for the parser benchmarks.
+
+Every generator is deterministic for a given size, so results stay comparable
+across runs and machines. The shapes follow what distributions ship: a Debian
+style /etc/default/grub with commented-out defaults, a grub-mkconfig grub.cfg
+with "Advanced options" submenus, and a theme.txt with nested containers.
+"""
+import os
+
+GRUB_HEADER = """\
+# If you change this file, run 'update-grub' afterwards to update
+# /boot/grub/grub.cfg.
+# For full documentation of the options in this file, see:
+#   info -f grub -n 'Simple configuration'
+
+"""
+
+GRUB_KEYS = [
+    ("GRUB_DEFAULT", "0"), ("GRUB_TIMEOUT_STYLE", "menu"), ("GRUB_TIMEOUT", "5"),
+    ("GRUB_DISTRIBUTOR", "`( . /etc/os-release; echo ${NAME:-Debian} ) 2>/dev/null || echo Debian`"),
+    ("GRUB_CMDLINE_LINUX_DEFAULT", '"quiet splash"'), ("GRUB_CMDLINE_LINUX", '""'),
+    ("GRUB_GFXMODE", "1920x1080"), ("GRUB_THEME", '"/boot/grub/themes/Bench/theme.txt"'),
+    ("GRUB_DISABLE_OS_PROBER", "false"), ("GRUB_SAVEDEFAULT", "true"),
+]
+
+CFG_HEADER = """\
+#
+# DO NOT EDIT THIS FILE
+#
+# It is automatically generated by grub-mkconfig using templates
+# from /etc/grub.d and settings from /etc/default/grub
+#
+
+### BEGIN /etc/grub.d/00_header ###
+if [ -s $prefix/grubenv ]; then
+  set have_grubenv=true
+  load_env
+fi
+if [ "${next_entry}" ] ; then
+   set default="${next_entry}"
+   set next_entry=
+   save_env next_entry
+   set boot_once=true
+else
+   set default="0"
+fi
+function load_video {
+  if [ x$feature_all_video_module = xy ]; then
+    insmod all_video
+  else
+    insmod efi_gop
+    insmod efi_uga
+  fi
+}
+set timeout_style=menu
+set timeout=5
+### END /etc/grub.d/00_header ###
+
+### BEGIN /etc/grub.d/10_linux ###
+"""
+
+ENTRY = """\
+{indent}menuentry 'Debian GNU/Linux, with Linux {version}{suffix}' --class debian --class gnu-linux --class os $menuentry_id_option 'gnulinux-{version}-{mode}-{uuid}' {{
+{indent}\tload_video
+{indent}\tinsmod gzio
+{indent}\tif [ x$grub_platform = xxen ]; then insmod xzio; insmod lzopio; fi
+{indent}\tinsmod part_gpt
+{indent}\tinsmod ext2
+{indent}\tsearch --no-floppy --fs-uuid --set=root {uuid}
+{indent}\techo\t'Loading Linux {version} ...'
+{indent}\tlinux\t/boot/vmlinuz-{version} root=UUID={uuid} ro {cmdline}
+{indent}\techo\t'Loading initial ramdisk ...'
+{indent}\tinitrd\t/boot/initrd.img-{version}
+{indent}}}
+"""
+
+THEME_HEADER = """\
+# GRUB2 gfxmenu theme generated for benchmarking
+title-text: ""
+title-font: "DejaVu Sans Bold 16"
+title-color: "#ffffff"
+desktop-image: "background.png"
+desktop-color: "#202020"
+message-color: "#cccccc"
+terminal-box: "terminal_box_*.png"
+
++ boot_menu {
+  left = 30%
+  top = 30%
+  width = 40%
+  height = 40%
+  item_color = "#cccccc"
+  selected_item_color = "#ffffff"
+  menu_pixmap_style = "menu_*.png"
+  selected_item_pixmap_style = "select_*.png"
+  item_height = 32
+  item_spacing = 8
+}
+
++ progress_bar {
+  id = "__timeout__"
+  left = 30%
+  top = 80%
+  width = 40%
+  height = 12
+  fg_color = "#4a90d9"
+  bg_color = "#404040"
+  text = "@TIMEOUT_NOTIFICATION_LONG@"
+}
+"""
+
+
+def uuid(n):
+    return f"{n:08x}-{n % 65536:04x}-4{n % 4096:03x}-8{n % 4096:03x}-{n * 2654435761 % 16 ** 12:012x}"
+
+
+def default_grub(lines):
+    """An /etc/default/grub of roughly `lines` lines: the stock keys, then commented defaults and extra keys."""
+    out = [GRUB_HEADER]
+    for key, value in GRUB_KEYS: out.append(f"{key}={value}\n")
+    for i in range(max(0, lines - len(GRUB_KEYS) - 5) // 3):
+        out.append(f"\n# Extra option {i}, kept to exercise comment preservation\n")
+        out.append(f"#GRUB_EXTRA_{i}=\"disabled value {i}\"\n" if i % 2 else f"GRUB_EXTRA_{i}=\"value {i} with spaces\"\n")
+    return "".join(out)
+
+
+def _entry(i, indent="", mode="simple", suffix=""):
+    version = f"6.{i // 100}.{i % 100}-amd64"
+    return ENTRY.format(indent=indent, version=version, suffix=suffix, mode=mode, uuid=uuid(i),
+                        cmdline="quiet splash" if mode == "simple" else "single")
+
+
+def grub_cfg(entries):
+    """A grub.cfg with `entries` menuentries: one top-level entry per kernel, the rest in submenus."""
+    out = [CFG_HEADER]
+    i, kernels = 0, 0
+    while i < entries:
+        out.append(_entry(kernels))
+        i += 1
+        # "Advanced options" holds a normal and a recovery entry for up to 10 kernels
+        batch = min(20, entries - i)
+        if batch > 0:
+            out.append(f"submenu 'Advanced options for Debian GNU/Linux' $menuentry_id_option 'gnulinux-advanced-{uuid(kernels)}' {{\n")
+            for j in range(batch):
+                k = kernels + j // 2
+                out.append(_entry(k, "\t", "advanced" if j % 2 == 0 else "recovery", "" if j % 2 == 0 else " (recovery mode)"))
+            out.append("}\n")
+            i += batch
+        kernels += 10
+    out.append("### END /etc/grub.d/10_linux ###\n")
+    return "".join(out)
+
+
+def theme_txt(components):
+    """A theme.txt with the editor's globals, boot_menu, progress bar and `components` more components."""
+    out = [THEME_HEADER]
+    for i in range(components):
+        if i % 10 == 0:
+            # Every tenth is a container holding a label and an image, for nesting
+            out.append(f"\n+ vbox {{\n  left = {i % 100}%\n  top = {(i * 7) % 100}%\n"
+                       f"  + label {{ text = \"Nested {i}\" color = \"#ffffff\" font = \"DejaVu Sans Regular 12\" }}\n"
+                       f"  + image {{ file = \"icon_{i}.png\" }}\n}}\n")
+        else:
+            out.append(f"\n+ label {{\n  id = \"label_{i}\"\n  left = {i % 100}%\n  top = {(i * 7) % 100}%\n"
+                       f"  width = 200\n  height = 20\n  text = \"Label {i}\"\n  color = \"#{i * 2654435761 % 16 ** 6:06x}\"\n"
+                       f"  align = \"center\"\n}}\n")
+    return "".join(out)
+
+
+def build_root(root, theme_components=10):
+    """A fake filesystem root for the save path: /etc/grub.d scripts, kernels in /boot and a theme."""
+    grub_d = os.path.join(root, "etc", "grub.d")
+    theme_dir = os.path.join(root, "boot", "grub", "themes", "Bench")
+    os.makedirs(grub_d, exist_ok=True)
+    os.makedirs(theme_dir, exist_ok=True)
+    for name in ("00_header", "05_debian_theme", "10_linux", "20_linux_xen", "30_os-prober", "40_custom"):
+        path = os.path.join(grub_d, name)
+        with open(path, 'w') as f: f.write(f"#! /bin/sh\nset -e\n# {name}\n" + "echo 'menuentry stub'\n" * 200)
+        os.chmod(path, 0o755)
+    for i in range(4):
+        for prefix in ("vmlinuz", "initrd.img"):
+            with open(os.path.join(root, "boot", f"{prefix}-6.1.{i}-amd64"), 'wb') as f: f.write(b"\0" * 4096)
+    with open(os.path.join(theme_dir, "theme.txt"), 'w') as f: f.write(theme_txt(theme_components))
+    with open(os.path.join(theme_dir, "dejavu_sans_16.pf2"), 'wb') as f: f.write(b"PFF2")
+    return "/boot/grub/themes/Bench/theme.txt"
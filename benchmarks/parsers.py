@@ -0,0 +1,194 @@
+"""Parser and serializer benchmarks on synthetic fixtures. Runs without GTK.
+
+    python3 benchmarks/parsers.py [--quick] [--filter grub_cfg] [--json results.json]
+    python3 benchmarks/parsers.py --update-baseline
+
+Covers what the app does with the files it reads and writes:
+
+    default_grub.read    read_grub_config() on /etc/default/grub
+    theme.parse          parse_theme() on theme.txt
+    theme.save           save_theme() applying editor values to theme.txt
+    boot_entries.parse   load_entries() with no cache, as get_boot_entries() on a new grub.cfg
+    boot_entries.cached  load_entries() from the on-disk cache (a later app start)
+    save.payload         what on_save_clicked builds: update, render, patch, fingerprint, helper request JSON
+
+Each case runs at several sizes, up to 5,000 menuentries and 500 theme components.
+The median time per call is compared with benchmarks/baseline.json; the exit status
+is 1 if any case is slower than its baseline by more than --threshold. Baselines are
+machine-specific: record one with --update-baseline on the machine that compares.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+# Differences below this are timer noise, whatever the ratio
+MIN_DELTA_S = 20e-6
+
+SIZES = {
+    "default_grub": (10, 200, 2000),
+    "theme": (5, 100, 500),
+    "boot_entries": (5, 500, 5000),
+    "save": (10, 200, 2000),
+}
+QUICK_SIZES = {"default_grub": (10, 200), "theme": (5, 100), "boot_entries": (5, 500), "save": (10, 200)}
+
+
+def setup_cases(tmp, sizes):
+    """Writes the fixtures under tmp. Returns [(name, size, fn)]; fn runs the code under test once."""
+    from fixtures import default_grub, grub_cfg, theme_txt, build_root
+    from src.parser import read_grub_config, GrubConfigFile
+    from src.theme_parser import parse_theme, save_theme, read_theme_ast, theme_properties
+    from src import grub_cfg as grub_cfg_module
+    from src.fingerprint import compute_fingerprint, dump_fingerprint
+    from src.helper import op_patch, op_write, op_update_grub
+
+    def write(name, text):
+        path = os.path.join(tmp, name)
+        with open(path, 'w') as f: f.write(text)
+        return path
+
+    cases = []
+    for n in sizes["default_grub"]:
+        path = write(f"grub-{n}", default_grub(n))
+        cases.append(("default_grub.read", n, lambda path=path: read_grub_config(path)))
+
+    for n in sizes["theme"]:
+        path = write(f"theme-{n}.txt", theme_txt(n))
+        values = dict(theme_properties(read_theme_ast(path)), **{
+            "title-color": "#ff8800", "menu-position": "Northwest", "progress-color": "#00ff00",
+            "box-bg-color": "rgba(0,0,0,0.7)"})
+        cases.append(("theme.parse", n, lambda path=path: parse_theme(path)))
+        cases.append(("theme.save", n, lambda path=path, values=values: save_theme(path, values)))
+
+    for n in sizes["boot_entries"]:
+        path = write(f"grub-{n}.cfg", grub_cfg(n))
+
+        def cold(path=path):
+            grub_cfg_module._memo.clear()
+            try: os.remove(grub_cfg_module.CACHE_PATH)
+            except FileNotFoundError: pass
+            return grub_cfg_module.load_entries(path)
+
+        def warm(path=path):
+            grub_cfg_module._memo.clear()
+            return grub_cfg_module.load_entries(path)
+
+        cases.append(("boot_entries.parse", n, cold))
+        cases.append(("boot_entries.cached", n, warm))
+
+    root = os.path.join(tmp, "root")
+    theme_path = build_root(root)
+    for n in sizes["save"]:
+        text = default_grub(n)
+        settings = GrubConfigFile(text).settings()
+        settings.update({"GRUB_TIMEOUT": "10", "GRUB_CMDLINE_LINUX_DEFAULT": "quiet splash mitigations=off"})
+        settings.pop("GRUB_SAVEDEFAULT", None)
+
+        def payload(text=text, settings=settings):
+            model = GrubConfigFile(text)
+            model.update(settings)
+            rendered = model.render()
+            fingerprint = compute_fingerprint(rendered, theme_path, root)
+            ops = [op_patch("/etc/default/grub", model.patch()), op_update_grub(),
+                   op_write("/boot/grub/grubtamer.fingerprint", dump_fingerprint(fingerprint))]
+            return json.dumps({"ops": ops, "transaction": True})
+
+        cases.append(("save.payload", n, payload))
+    return cases
+
+
+def measure(fn, repeats, min_time):
+    """Per-call seconds of fn over `repeats` timed batches, each batch running at least min_time."""
+    fn()  # warm caches, imports and memoized schemas
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number): fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time: break
+        number *= 2 if elapsed < min_time / 4 else 1 + int(min_time / max(elapsed, 1e-9))
+    runs = [elapsed / number]
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(number): fn()
+        runs.append((time.perf_counter() - started) / number)
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "number": number, "runs": runs}
+
+
+def compare(results, baseline, threshold):
+    """Returns {case: (baseline median, ratio)} for every case slower than threshold allows."""
+    regressions = {}
+    for case, result in results.items():
+        base = baseline.get(case)
+        if not base: continue
+        new, old = result["median_s"], base["median_s"]
+        if new > old * (1 + threshold) and new - old > MIN_DELTA_S: regressions[case] = (old, new / old)
+    return regressions
+
+
+def format_time(seconds):
+    if seconds >= 1: return f"{seconds:.2f} s"
+    if seconds >= 1e-3: return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark GrubTamer's parsers and serializers.")
+    p.add_argument("--quick", action="store_true", help="Skip the largest fixtures and time shorter batches.")
+    p.add_argument("--filter", default="", help="Only run cases whose name contains this text.")
+    p.add_argument("--repeats", type=int, default=5, help="Timed batches per case (default: 5).")
+    p.add_argument("--json", help="Write the results to this file.")
+    p.add_argument("--baseline", default=BASELINE_PATH, help="Baseline to compare with (default: benchmarks/baseline.json).")
+    p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                   help=f"Allowed slowdown as a fraction of the baseline (default: {DEFAULT_THRESHOLD}).")
+    p.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline.")
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="grubtamer-bench-") as tmp:
+        # The grub.cfg cache goes to XDG_CACHE_HOME, resolved when src.system is first imported
+        os.environ["XDG_CACHE_HOME"] = os.path.join(tmp, "cache")
+        sys.path[:0] = [ROOT, os.path.dirname(os.path.abspath(__file__))]
+        cases = setup_cases(tmp, QUICK_SIZES if args.quick else SIZES)
+
+        results = {}
+        print(f"{'case':32} {'median':>10} {'min':>10} {'baseline':>10} {'change':>8}")
+        try:
+            with open(args.baseline, 'r') as f: baseline = json.load(f)["cases"]
+        except (OSError, ValueError, KeyError):
+            baseline = {}
+        for name, size, fn in cases:
+            case = f"{name}[{size}]"
+            if args.filter not in case: continue
+            results[case] = measure(fn, args.repeats, 0.05 if args.quick else 0.2)
+            base = baseline.get(case)
+            change = f"{results[case]['median_s'] / base['median_s'] - 1:+.0%}" if base else ""
+            print(f"{case:32} {format_time(results[case]['median_s']):>10} {format_time(results[case]['min_s']):>10} "
+                  f"{format_time(base['median_s']) if base else '-':>10} {change:>8}")
+
+    report = {"python": sys.version.split()[0], "platform": sys.platform, "created": time.time(), "cases": results}
+    if args.json:
+        with open(args.json, 'w') as f: json.dump(report, f, indent=2)
+    if args.update_baseline:
+        # Cases not run this time (--filter, --quick) keep their old baseline
+        report["cases"] = {**baseline, **{case: {"median_s": r["median_s"], "min_s": r["min_s"]} for case, r in results.items()}}
+        with open(args.baseline, 'w') as f: json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if not baseline: print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one.")
+    for case, (old, ratio) in regressions.items():
+        print(f"REGRESSION {case}: {format_time(results[case]['median_s'])} vs {format_time(old)} ({ratio:.2f}x)",
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Startup benchmark: time to first painted frame and per-module import cost.
+
+    python3 benchmarks/startup.py --runs 5 --json startup.json
+
+Launches main.py with GRUBTAMER_BENCH_STARTUP=1, which makes the app print the
+time of its first frame and quit. Needs a display; on a headless box run it
+under `xvfb-run` or a headless Wayland compositor. Nothing is authenticated or
+written: the privileged helper is never started during startup.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "GRUBTAMER_FIRST_FRAME"
+TIMEOUT = 60
+
+
+def measure_first_frame():
+    """One cold start. Returns (in-process seconds to first frame, wall seconds until it was reported)."""
+    env = dict(os.environ, GRUBTAMER_BENCH_STARTUP="1")
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py")], cwd=ROOT, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        for line in proc.stdout:
+            if line.startswith(MARKER):
+                wall = time.perf_counter() - started
+                proc.wait(timeout=TIMEOUT)
+                return float(line.split()[1]), wall
+    finally:
+        if proc.poll() is None: proc.kill()
+    raise RuntimeError(f"main.py exited with status {proc.wait()} before painting (no display?)")
+
+
+def measure_imports():
+    """Imports main.py under -X importtime. Returns [{module, self_us, cumulative_us}] by cumulative cost."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing main.py failed: {proc.stderr.strip().splitlines()[-1]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line: continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append({"module": name, "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)
+
+
+def summarize(values):
+    return {"median": statistics.median(values), "min": min(values), "max": max(values), "runs": values}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Measure GrubTamer startup.")
+    p.add_argument("--runs", type=int, default=5, help="Cold starts to measure (default: 5).")
+    p.add_argument("--top", type=int, default=15, help="Imports to list (default: 15).")
+    p.add_argument("--json", help="Write the results to this file.")
+    args = p.parse_args(argv)
+
+    results = {"python": sys.version.split()[0], "runs": args.runs}
+    try:
+        imports = [measure_imports() for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    # Median per module across runs, so one slow disk read doesn't dominate
+    by_module = {}
+    for run in imports:
+        for row in run: by_module.setdefault(row["module"], []).append(row)
+    results["imports"] = sorted(({"module": name,
+                                  "self_us": statistics.median(r["self_us"] for r in rows),
+                                  "cumulative_us": statistics.median(r["cumulative_us"] for r in rows)}
+                                 for name, rows in by_module.items()), key=lambda r: r["cumulative_us"], reverse=True)
+
+    try:
+        frames = [measure_first_frame() for _ in range(args.runs)]
+        results["first_frame_s"] = summarize([f[0] for f in frames])
+        results["wall_s"] = summarize([f[1] for f in frames])
+    except RuntimeError as e:
+        print(f"First frame not measured: {e}", file=sys.stderr)
+
+    print(f"{'module':40} {'self ms':>9} {'cumul ms':>9}")
+    for row in results["imports"][:args.top]:
+        print(f"{row['module'][:40]:40} {row['self_us'] / 1000:9.1f} {row['cumulative_us'] / 1000:9.1f}")
+    if "first_frame_s" in results:
+        print(f"\nfirst frame: {results['first_frame_s']['median'] * 1000:.0f} ms in-process, "
+              f"{results['wall_s']['median'] * 1000:.0f} ms wall (median of {args.runs})")
+    if args.json:
+        with open(args.json, 'w') as f: json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
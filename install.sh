@@ -51,8 +51,24 @@ cd "$INSTALL_DIR"
 python3 main.py "\$@"
 EOF
 
+# Headless CLI for chroots and disk images (no GTK needed)
+cat > "$BIN_DIR/grubtamer-cli" <<EOF
+#!/bin/bash
+PYTHONPATH="$INSTALL_DIR" exec python3 -m src.cli "\$@"
+EOF
+
+cat > "$BIN_DIR/grubtamer-render" <<EOF
+#!/bin/bash
+PYTHONPATH="$INSTALL_DIR" exec python3 -m src.theme_render "\$@"
+EOF
+
+cat > "$BIN_DIR/grubtamer-dry-run" <<EOF
+#!/bin/bash
+PYTHONPATH="$INSTALL_DIR" exec python3 -m src.dry_run "\$@"
+EOF
+
 # Make it executable
-chmod +x "$BIN_DIR/grubtamer"
+chmod +x "$BIN_DIR/grubtamer" "$BIN_DIR/grubtamer-cli" "$BIN_DIR/grubtamer-render" "$BIN_DIR/grubtamer-dry-run"
 
 echo "--- Creating Desktop Entry ---"
 # Create the .desktop file for the Start Menu
@@ -1,22 +1,44 @@
+import time
+START_TIME = time.perf_counter()
+
 import sys
 import os
-import subprocess
+import threading
 import gi
-import tempfile
-from src.parser import read_grub_config
-from src.system import AVAILABLE_OPTIONS, GRUB_DOCS_OPTIONS
-from src.theme_editor import ThemeEditorWindow
-from src.boot_manager import BootManagerWindow
+# The theme editor (cairo, GdkPixbuf, fonts), boot manager, progress window, privileged helper
+# client and save planning are imported on first use
+from src.parser import read_grub_config, changed_settings, GrubConfigFile, GRUB_PATH
+from src.system import AVAILABLE_OPTIONS
+from src.option_catalog import get_option
+# Every entry row is validated as it is built, and the theme index is read in __init__
+from src.validator import validate_value
+from src.theme_index import ThemeIndex
+from src.trace import span
 
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 # noinspection PyUnresolvedReferences
-from gi.repository import Gtk, Adw, Gio
+from gi.repository import Gtk, Adw, Gio, GLib, GObject
 
 # Default path if none is set
 DEFAULT_THEME_PATH = "/boot/grub/themes/GrubTamer/theme.txt"
-BACKUP_PATH = "/etc/default/grub.bak"
+THEME_RESCAN_DELAY_MS = 500
+GRUB_RELOAD_DELAY_MS = 300
+TRUE_VALUES = ("true", "y", "yes", "1")
+
+# Monitor events that can change what a theme directory (or a watched file) contains
+THEME_EVENTS = {Gio.FileMonitorEvent.CHANGES_DONE_HINT, Gio.FileMonitorEvent.CREATED, Gio.FileMonitorEvent.DELETED,
+                Gio.FileMonitorEvent.MOVED_IN, Gio.FileMonitorEvent.MOVED_OUT, Gio.FileMonitorEvent.RENAMED}
+
+
+class ThemeItem(GObject.Object):
+    """One row of the GRUB_THEME dropdown, wrapping a theme index entry."""
+    def __init__(self, entry):
+        super().__init__()
+        self.entry = entry
+        self.name = entry["name"]
+        self.path = entry["path"]
 
 
 class GrubTamerWindow(Adw.ApplicationWindow):
@@ -25,10 +47,28 @@ class GrubTamerWindow(Adw.ApplicationWindow):
         self.set_title("GrubTamer")
         self.set_default_size(600, 750)
 
-        self.grub_settings = read_grub_config()
+        self.load_grub_file()
         self.widget_map = {}
-
-        self.ensure_theme_ready()
+        # Rows edited here that /etc/default/grub also changed underneath us: {key: tooltip}
+        self.conflicts = {}
+        self.grub_monitor = None
+        self.grub_reload_source = 0
+
+        # Theme list: persistent index, refreshed incrementally by file monitors
+        self.theme_index = ThemeIndex()
+        self.theme_store = Gio.ListStore(item_type=ThemeItem)
+        self.theme_dropdown = None
+        self.theme_monitors = {}
+        self.pending_rescan = set()
+        self.rescan_source = 0
+        self.thumb_pool = None
+        self.thumb_pending = set()
+        self.thumb_failed = set()
+        # Only a theme the user picks is saved; the dropdown's own selection (the default) is not
+        self.theme_picked = False
+        self.selecting_theme = False
+
+        self.loaded_settings = dict(self.grub_settings)
 
         self.toast_overlay = Adw.ToastOverlay()
         self.set_content(self.toast_overlay)
@@ -46,16 +86,19 @@ class GrubTamerWindow(Adw.ApplicationWindow):
         header.pack_start(add_btn)
 
         # Save Button
-        save_btn = Gtk.Button(label="Save")
-        save_btn.add_css_class("suggested-action")
-        save_btn.connect("clicked", self.on_save_clicked)
-        header.pack_end(save_btn)
+        self.save_btn = Gtk.Button(label="Save")
+        self.save_btn.add_css_class("suggested-action")
+        self.save_btn.connect("clicked", self.on_save_clicked)
+        header.pack_end(self.save_btn)
 
         # Main Menu (Hamburger)
         menu_model = Gio.Menu()
-        menu_model.append("Create Backup", "win.create_backup")
-        menu_model.append("Restore Backup", "win.restore_backup")
+        menu_model.append("Create Snapshot", "win.create_backup")
+        menu_model.append("Snapshots…", "win.restore_backup")
         menu_model.append("Refresh Themes", "win.refresh_themes")
+        menu_model.append("Regenerate GRUB Menu", "win.regenerate_grub")
+        menu_model.append("Preview Menu Changes", "win.dry_run")
+        menu_model.append("Trace Log", "win.trace_log")
 
         menu_btn = Gtk.MenuButton(icon_name="open-menu-symbolic")
         menu_btn.set_menu_model(menu_model)
@@ -65,6 +108,9 @@ class GrubTamerWindow(Adw.ApplicationWindow):
         self.add_action_simple("create_backup", self.on_create_backup)
         self.add_action_simple("restore_backup", self.on_restore_backup)
         self.add_action_simple("refresh_themes", self.on_refresh_themes)
+        self.add_action_simple("regenerate_grub", lambda a, p: self.on_save_clicked(None, force=True))
+        self.add_action_simple("dry_run", self.on_dry_run)
+        self.add_action_simple("trace_log", self.on_trace_log)
 
         self.main_box.append(header)
 
@@ -87,54 +133,38 @@ class GrubTamerWindow(Adw.ApplicationWindow):
         self.custom_group = Adw.PreferencesGroup(title="Extra Configuration")
         self.page.add(self.custom_group)
 
+        self.custom_rows = {}
         for loaded_key in self.grub_settings.keys():
-            if loaded_key not in standard_keys:
-                if loaded_key in GRUB_DOCS_OPTIONS:
-                    data = GRUB_DOCS_OPTIONS[loaded_key]
-                    row = self.create_row(loaded_key, data['label'], data['desc'], data['type'],
-                                          example=data.get('example'), is_custom=True)
-                else:
-                    row = self.create_row(loaded_key, loaded_key, "Custom parameter", "text", is_custom=True)
-                self.custom_group.add(row)
+            if loaded_key not in standard_keys: self.add_custom_row(loaded_key)
+
+        self.watch_grub_file()
+
+    def add_custom_row(self, key, data=None):
+        data = data or get_option(key) or {"label": key, "desc": "Custom parameter", "type": "text"}
+        row = self.create_row(key, data['label'], data['desc'], data['type'], example=data.get('example'), is_custom=True)
+        self.custom_rows[key] = row
+        self.custom_group.add(row)
+
+    def load_grub_file(self):
+        # The file model keeps comments and ordering; grub_settings is the flat view the rows edit
+        try:
+            self.grub_file = GrubConfigFile.load()
+            self.grub_settings = self.grub_file.settings()
+        except OSError:
+            self.grub_file = GrubConfigFile()
+            self.grub_settings = read_grub_config()  # carries the error message
 
     def add_action_simple(self, name, callback):
         act = Gio.SimpleAction.new(name, None)
         act.connect("activate", callback)
         self.add_action(act)
 
-    def ensure_theme_ready(self):
-        current_theme = self.grub_settings.get("GRUB_THEME", "").strip('"').strip("'")
-        if not current_theme:
-            self.grub_settings["GRUB_THEME"] = DEFAULT_THEME_PATH
-            current_theme = DEFAULT_THEME_PATH
-        if not os.path.exists(current_theme):
-            try:
-                theme_dir = os.path.dirname(current_theme)
-                subprocess.run(["pkexec", "mkdir", "-p", theme_dir], check=True)
-                subprocess.run(["pkexec", "touch", current_theme], check=True)
-                subprocess.run(["pkexec", "chmod", "644", current_theme], check=True)
-            except:
-                pass
-
-    def get_available_themes(self):
-        """Scans /boot/grub/themes/ for subdirectories."""
-        base_dir = "/boot/grub/themes"
-        themes = []
-        if os.path.exists(base_dir):
-            for name in os.listdir(base_dir):
-                full_path = os.path.join(base_dir, name)
-                theme_file = os.path.join(full_path, "theme.txt")
-                if os.path.isdir(full_path) and os.path.exists(theme_file):
-                    themes.append(name)
-        if not themes: themes = ["GrubTamer"]
-        return sorted(themes)
-
     def create_row(self, key, label, desc, opt_type, example=None, is_custom=False):
         row = Adw.ActionRow(title=label, subtitle=desc)
         current_val = self.grub_settings.get(key, "")
 
         if opt_type == "toggle":
-            active = str(current_val).lower() in ["true", "y", "yes", "1"]
+            active = str(current_val).lower() in TRUE_VALUES
             widget = Gtk.Switch(active=active)
             widget.set_valign(Gtk.Align.CENTER)
             widget.set_tooltip_text(f"ON = {key}=true\nOFF = {key}=false")
@@ -162,7 +192,11 @@ class GrubTamerWindow(Adw.ApplicationWindow):
                 # But our parser/writer handles quotes, so just setting the text is usually fine.
                 entry_widget.set_text(f"{name}")
 
-            btn_select.connect("clicked", lambda b: BootManagerWindow(on_boot_selected, transient_for=self).present())
+            def on_select_clicked(btn):
+                from src.boot_manager import BootManagerWindow
+                BootManagerWindow(on_boot_selected, transient_for=self).present()
+
+            btn_select.connect("clicked", on_select_clicked)
 
             box.append(entry_widget)
             box.append(btn_select)
@@ -172,18 +206,8 @@ class GrubTamerWindow(Adw.ApplicationWindow):
 
         # --- Theme Selector ---
         elif key == "GRUB_THEME":
-            themes = self.get_available_themes()
-            model = Gtk.StringList.new(themes)
-            dropdown = Gtk.DropDown(model=model)
-            dropdown.set_valign(Gtk.Align.CENTER)
-
-            current_path = str(current_val).strip('"').strip("'")
-            selected_idx = 0
-            for i, name in enumerate(themes):
-                if name in current_path:
-                    selected_idx = i
-                    break
-            dropdown.set_selected(selected_idx)
+            # With no GRUB_THEME the default is shown; its directory is created when first needed (editor or save)
+            dropdown = self.build_theme_dropdown(str(current_val).strip('"').strip("'") or DEFAULT_THEME_PATH)
 
             box_row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
             box_row.append(dropdown)
@@ -193,16 +217,14 @@ class GrubTamerWindow(Adw.ApplicationWindow):
             edit_btn.add_css_class("pill")
 
             def on_edit_clicked(btn):
-                idx = dropdown.get_selected()
-                theme_name = themes[idx]
-                path = f"/boot/grub/themes/{theme_name}/theme.txt"
-                self.open_theme_editor(path)
+                item = dropdown.get_selected_item()
+                if item: self.open_theme_editor(item.path)
 
             edit_btn.connect("clicked", on_edit_clicked)
             box_row.append(edit_btn)
 
             row.add_suffix(box_row)
-            self.widget_map[key] = (dropdown, themes)
+            self.widget_map[key] = dropdown
 
         else:
             widget = Gtk.Entry(text=str(current_val))
@@ -215,6 +237,12 @@ class GrubTamerWindow(Adw.ApplicationWindow):
             row.add_suffix(widget)
             self.widget_map[key] = widget
 
+        # Checked on every keystroke; the checks are in-memory lookups plus at most one stat()
+        if isinstance(self.widget_map[key], Gtk.Entry):
+            entry = self.widget_map[key]
+            entry.connect("changed", lambda e: self.mark_invalid(key, validate_value(key, e.get_text())))
+            self.mark_invalid(key, validate_value(key, entry.get_text()))
+
         if is_custom:
             remove_btn = Gtk.Button(icon_name="user-trash-symbolic")
             remove_btn.add_css_class("error")
@@ -224,150 +252,456 @@ class GrubTamerWindow(Adw.ApplicationWindow):
 
         return row
 
+    def mark_invalid(self, key, message):
+        widget = self.widget_map.get(key)
+        if widget is None: return
+        if message:
+            widget.add_css_class("error")
+            widget.set_tooltip_text(f"{key} {message}")
+        else:
+            widget.remove_css_class("error")
+            widget.set_tooltip_text(self.conflicts.get(key) or f"Modifies {key}")
+
+    def mark_conflict(self, key, disk_value):
+        """Flags a row whose unsaved edit disagrees with /etc/default/grub; None clears the flag."""
+        widget = self.widget_map.get(key)
+        if disk_value is None: self.conflicts.pop(key, None)
+        else: self.conflicts[key] = f"Changed on disk to \"{disk_value}\" while you were editing. Saving keeps your value."
+        if widget is None: return
+        if key in self.conflicts:
+            widget.add_css_class("warning")
+            widget.set_tooltip_text(self.conflicts[key])
+        else:
+            widget.remove_css_class("warning")
+            widget.set_tooltip_text(f"Modifies {key}")
+
     def open_theme_editor(self, path):
+        from src.save_plan import theme_provision_ops
+        ops = theme_provision_ops(path)
+        if not ops:
+            self.show_theme_editor(path)
+            return
+
+        # Authentication must not block the main loop
+        from src.helper import get_helper
+
+        def work():
+            try: get_helper().request(ops, transaction=True)
+            except Exception as e: GLib.idle_add(self.show_toast, f"Could not create the theme: {e}")
+            else: GLib.idle_add(self.show_theme_editor, path)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def show_theme_editor(self, path):
+        from src.theme_editor import ThemeEditorWindow
         ThemeEditorWindow(theme_path=path, transient_for=self).present()
+        return GLib.SOURCE_REMOVE
+
+    # --- Theme dropdown ---
+    def build_theme_dropdown(self, current_path):
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_theme_item_setup)
+        factory.connect("bind", self.on_theme_item_bind)
+        self.theme_dropdown = Gtk.DropDown(model=self.theme_store, factory=factory)
+        self.theme_dropdown.set_valign(Gtk.Align.CENTER)
+        self.theme_dropdown.connect("notify::selected", self.on_theme_selected)
+
+        # Show the cached index right away; rescanning waits until the window is up
+        self.reload_theme_store(current_path)
+        GLib.idle_add(self.refresh_theme_index)
+        return self.theme_dropdown
+
+    def refresh_theme_index(self):
+        if self.theme_index.refresh(): self.reload_theme_store()
+        self.sync_theme_monitors()
+        return GLib.SOURCE_REMOVE
+
+    def on_theme_selected(self, *_):
+        if not self.selecting_theme: self.theme_picked = True
+
+    def reload_theme_store(self, select_path=None):
+        self.selecting_theme = True
+        try: self.select_theme(select_path)
+        finally: self.selecting_theme = False
+
+    def select_theme(self, select_path):
+        if select_path is None:
+            item = self.theme_dropdown.get_selected_item() if self.theme_dropdown else None
+            select_path = item.path if item else ""
+        entries = self.theme_index.themes()
+        self.theme_store.splice(0, self.theme_store.get_n_items(), [ThemeItem(e) for e in entries])
+        if not self.theme_dropdown: return
+        # Exact path first, then the theme directory named in the path
+        selected = next((i for i, e in enumerate(entries) if e["path"] == select_path), None)
+        if selected is None:
+            select_dir = os.path.basename(os.path.dirname(select_path))
+            selected = next((i for i, e in enumerate(entries) if e["name"] == select_dir), 0)
+        self.theme_dropdown.set_selected(selected)
+
+    def on_theme_item_setup(self, factory, list_item):
+        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+        picture = Gtk.Picture(content_fit=Gtk.ContentFit.CONTAIN)
+        picture.set_size_request(48, 36)
+        box.append(picture)
+        box.append(Gtk.Label(xalign=0.0))
+        list_item.set_child(box)
+
+    def on_theme_item_bind(self, factory, list_item):
+        item = list_item.get_item()
+        picture = list_item.get_child().get_first_child()
+        label = picture.get_next_sibling()
+        label.set_text(item.name)
+        list_item.get_child().set_tooltip_text(f"{item.path}\n{GLib.format_size(item.entry['asset_bytes'])}")
+        # Thumbnails are rendered the first time a row is shown, never up front
+        thumb = self.theme_index.thumbnail(item.name)
+        picture.set_filename(thumb)
+        if thumb is None: self.request_thumbnail(item)
+
+    def request_thumbnail(self, item):
+        if item.name in self.thumb_pending or item.name in self.thumb_failed or not item.entry.get("key"): return
+        self.thumb_pending.add(item.name)
+        entry = item.entry
+        from src.theme_index import render_thumbnail
+
+        def work():
+            thumb = render_thumbnail(entry)
+            GLib.idle_add(self.on_thumbnail_ready, entry, thumb)
+
+        if self.thumb_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.thumb_pool = ThreadPoolExecutor(max_workers=2)
+        self.thumb_pool.submit(work)
+
+    def on_thumbnail_ready(self, entry, thumb):
+        name = entry["name"]
+        self.thumb_pending.discard(name)
+        # Dropped if the theme was rescanned while rendering
+        if self.theme_index.entries.get(name) is not entry: return GLib.SOURCE_REMOVE
+        if thumb is None:
+            self.thumb_failed.add(name)
+            return GLib.SOURCE_REMOVE
+        self.theme_index.set_thumbnail(name, thumb)
+        for i in range(self.theme_store.get_n_items()):
+            if self.theme_store.get_item(i).name == name:
+                self.theme_store.items_changed(i, 1, 1)  # rebinds just that row
+                break
+        return GLib.SOURCE_REMOVE
+
+    def sync_theme_monitors(self):
+        """Watches the themes directory and every theme in it; only touched themes get rescanned."""
+        wanted = {None} | set(self.theme_index.entries)
+        for name in set(self.theme_monitors) - wanted:
+            self.theme_monitors.pop(name).cancel()
+        for name in wanted - set(self.theme_monitors):
+            path = self.theme_index.themes_dir if name is None else os.path.join(self.theme_index.themes_dir, name)
+            try:
+                monitor = Gio.File.new_for_path(path).monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+            except GLib.Error as e:
+                print(f"Cannot watch {path}: {e.message}")
+                continue
+            monitor.connect("changed", self.on_themes_dir_changed, name)
+            self.theme_monitors[name] = monitor
+
+    def on_themes_dir_changed(self, monitor, file, other_file, event, name):
+        if event not in THEME_EVENTS: return
+        if name is not None: self.pending_rescan.add(name)
+        else:
+            self.pending_rescan.add(file.get_basename())
+            if other_file: self.pending_rescan.add(other_file.get_basename())
+        # Coalesce bursts (a theme being unpacked) into one rescan
+        if not self.rescan_source:
+            self.rescan_source = GLib.timeout_add(THEME_RESCAN_DELAY_MS, self.flush_theme_rescan)
+
+    def flush_theme_rescan(self):
+        names, self.pending_rescan = self.pending_rescan, set()
+        self.rescan_source = 0
+        changed = self.theme_index.refresh(names)
+        if changed:
+            self.thumb_failed -= set(changed)
+            self.reload_theme_store()
+            self.sync_theme_monitors()
+        return GLib.SOURCE_REMOVE
 
     def remove_custom_row(self, row_widget, key):
         self.custom_group.remove(row_widget)
+        self.custom_rows.pop(key, None)
         if key in self.widget_map: del self.widget_map[key]
         if key in self.grub_settings: del self.grub_settings[key]
 
     def on_add_command_clicked(self, button):
         """Displays the search dialog for new commands."""
-        dialog = Gtk.Window(
-            title="Add GRUB Command",
-            transient_for=self,
-            modal=True,
-            default_width=450,
-            default_height=600
-        )
-
-        content = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
-        content.set_margin_top(12);
-        content.set_margin_bottom(12)
-        content.set_margin_start(12);
-        content.set_margin_end(12)
-        dialog.set_child(content)
-
-        search_entry = Gtk.SearchEntry(placeholder_text="Search available commands...")
-        content.append(search_entry)
-
-        scrolled = Gtk.ScrolledWindow()
-        scrolled.set_vexpand(True)
-        content.append(scrolled)
-
-        listbox = Gtk.ListBox()
-        listbox.add_css_class("boxed-list")
-        listbox.set_selection_mode(Gtk.SelectionMode.SINGLE)
-        scrolled.set_child(listbox)
-
-        def get_unused_keys():
-            return [k for k in GRUB_DOCS_OPTIONS.keys() if k not in self.widget_map]
-
-        def populate_list(filter_text=""):
-            while child := listbox.get_first_child(): listbox.remove(child)
-            for key in get_unused_keys():
-                data = GRUB_DOCS_OPTIONS[key]
-                if filter_text.lower() in key.lower() or filter_text.lower() in data['label'].lower():
-                    row = Adw.ActionRow(title=key, subtitle=data['label'])
-
-                    # Store key and make clickable
-                    row.grub_key = key
-                    row.set_activatable(True)
-
-                    listbox.append(row)
-
-        populate_list()
-        search_entry.connect("search-changed", lambda e: populate_list(e.get_text()))
-
-        def on_row_activated(lb, row):
-            target_key = row.grub_key
-            target_data = GRUB_DOCS_OPTIONS[target_key]
-
-            # Create the row using the main window's helper
-            new_row = self.create_row(
-                target_key,
-                target_data['label'],
-                target_data['desc'],
-                target_data['type'],
-                example=target_data.get('example'),
-                is_custom=True
-            )
-
-            self.custom_group.add(new_row)
-            dialog.close()
-            self.show_toast(f"Added {target_key}")
-
-        listbox.connect("row-activated", on_row_activated)
-        dialog.present()
-        pass
-
-    def on_save_clicked(self, button):
-        # 1. Gather Data (Same as before)
-        for key, widget in self.widget_map.items():
-            if key == "GRUB_THEME":
-                dropdown, themes = widget
-                idx = dropdown.get_selected()
-                theme_name = themes[idx]
-                self.grub_settings[key] = f"/boot/grub/themes/{theme_name}/theme.txt"
-            elif isinstance(widget, Gtk.Entry):
-                self.grub_settings[key] = widget.get_text().strip()
-            elif isinstance(widget, Gtk.Switch):
-                self.grub_settings[key] = "true" if widget.get_active() else "false"
-
-        lines = []
-        for k, v in self.grub_settings.items():
-            val = str(v)
-            if not val.strip(): continue
-            if not val.isdigit():
-                lines.append(f'{k}="{val.replace('"', '')}"')
+        from src.add_command import AddCommandWindow
+        AddCommandWindow(set(self.widget_map), self.on_command_selected, transient_for=self).present()
+
+    def on_command_selected(self, key, data):
+        self.add_custom_row(key, data)
+        self.show_toast(f"Added {key}")
+
+    def get_widget_value(self, key):
+        widget = self.widget_map[key]
+        if key == "GRUB_THEME":
+            item = widget.get_selected_item()
+            return item.path if item else None
+        if isinstance(widget, Gtk.Entry): return widget.get_text().strip()
+        if isinstance(widget, Gtk.Switch): return "true" if widget.get_active() else "false"
+        return None
+
+    def set_widget_value(self, key, value):
+        widget = self.widget_map[key]
+        if key == "GRUB_THEME": self.reload_theme_store(str(value).strip('"').strip("'") or DEFAULT_THEME_PATH)
+        elif isinstance(widget, Gtk.Entry): widget.set_text(str(value))
+        elif isinstance(widget, Gtk.Switch): widget.set_active(str(value).lower() in TRUE_VALUES)
+
+    def display_value(self, key, value):
+        """What get_widget_value() reports once a file value is shown in the key's row."""
+        if isinstance(self.widget_map[key], Gtk.Switch): return "true" if str(value).lower() in TRUE_VALUES else "false"
+        if key == "GRUB_THEME": return str(value).strip('"').strip("'")
+        return str(value).strip()
+
+    def rebind_settings(self, keep_edits=False):
+        """Reloads /etc/default/grub and updates only the rows whose value differs.
+
+        With keep_edits, only keys the file changed are looked at, and rows edited since
+        they were loaded keep their value and are flagged instead. Returns (changed, conflicts).
+        """
+        base = self.loaded_settings
+        self.load_grub_file()
+        self.loaded_settings = dict(self.grub_settings)
+        if keep_edits: keys = list(changed_settings(base, self.grub_settings))
+        else:
+            self.theme_picked = False
+            for key in list(self.conflicts): self.mark_conflict(key, None)
+            keys = list(self.grub_settings) + [k for k in self.widget_map if k not in self.grub_settings]
+
+        changed, conflicts = [], []
+        for key in keys:
+            value = self.grub_settings.get(key)
+            if key not in self.widget_map:
+                if value is not None: self.add_custom_row(key); changed.append(key)
+                continue
+            current = self.get_widget_value(key)
+            if current == self.display_value(key, "" if value is None else value):
+                self.mark_conflict(key, None)
+            elif keep_edits and self.is_edited(key, current, base):
+                self.mark_conflict(key, "" if value is None else value)
+                conflicts.append(key)
             else:
-                lines.append(f'{k}={val}')
+                if value is None and key in self.custom_rows: self.remove_custom_row(self.custom_rows[key], key)
+                else: self.set_widget_value(key, "" if value is None else value)
+                changed.append(key)
+        return changed, conflicts
 
-        payload = "\n".join(lines) + "\n"
+    # --- External changes ---
 
-        # 2. FIX: Bundle operations to reduce password prompts
-        # First, write payload to a temporary user-owned file (no password needed)
+    def watch_grub_file(self):
+        """Rebinds the rows when another tool edits /etc/default/grub while the window is open."""
+        try:
+            self.grub_monitor = Gio.File.new_for_path(GRUB_PATH).monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.Error as e:
+            print(f"Cannot watch {GRUB_PATH}: {e.message}")
+            return
+        self.grub_monitor.connect("changed", self.on_grub_file_changed)
+
+    def on_grub_file_changed(self, monitor, file, other_file, event):
+        if event not in THEME_EVENTS: return
+        # Editors and package hooks write in bursts (truncate, write, rename); reparse once it settles
+        if not self.grub_reload_source:
+            self.grub_reload_source = GLib.timeout_add(GRUB_RELOAD_DELAY_MS, self.flush_grub_reload)
+
+    def flush_grub_reload(self):
+        self.grub_reload_source = 0
+        # While a save runs, its own write is expected; on_finished checks once the helper is done
+        if self.save_btn.get_sensitive(): self.check_grub_file()
+        return GLib.SOURCE_REMOVE
+
+    def check_grub_file(self):
+        """Merges /etc/default/grub into the rows if its content differs from what they were loaded from."""
         try:
-            with tempfile.NamedTemporaryFile(mode='w', delete=False) as tmp:
-                tmp.write(payload)
-                tmp_path = tmp.name
+            with open(GRUB_PATH, 'r') as f: text = f.read()
+        except OSError:
+            return  # Mid-replace or removed; the next event brings it back
+        # Timestamp-only events (touch, our own identical write) change nothing
+        if text == "".join(self.grub_file.original): return
+        changed, conflicts = self.rebind_settings(keep_edits=True)
+        if conflicts:
+            self.show_toast(f"/etc/default/grub changed on disk. {len(changed)} setting(s) updated; "
+                            f"your edits to {', '.join(conflicts)} were kept.")
+        elif changed:
+            self.show_toast(f"/etc/default/grub changed on disk. {len(changed)} setting(s) updated.")
+
+    def is_edited(self, key, value, base=None):
+        """Whether a row's value differs from what it showed for the loaded file (or base)."""
+        if key == "GRUB_THEME" and not self.theme_picked: return False
+        return value != self.display_value(key, (self.loaded_settings if base is None else base).get(key, ""))
+
+    def collect_settings(self):
+        """Copies the edited widget values into grub_settings. Returns False (and says why) if any is invalid.
+
+        Untouched rows keep the file's value: a switch showing its default must not add
+        the key, so a save without edits leaves /etc/default/grub byte-identical.
+        """
+        for key in self.widget_map:
+            value = self.get_widget_value(key)
+            if value is not None and self.is_edited(key, value): self.grub_settings[key] = value
+            elif key in self.loaded_settings: self.grub_settings[key] = self.loaded_settings[key]
+            else: self.grub_settings.pop(key, None)
+
+        # A value GRUB would reject is refused here rather than after pkexec and update-grub
+        # The save creates a missing theme.txt (theme_provision_ops), so it need not exist yet
+        from src.save_plan import provisioned_paths
+        from src.validator import validate_grub, describe_errors
+        provisioned = provisioned_paths(self.grub_settings.get("GRUB_THEME", ""))
+        errors = validate_grub(self.grub_settings, provisioned=provisioned)
+        for key, message in errors.items(): self.mark_invalid(key, message)
+        if errors: self.show_toast(f"Invalid settings. {describe_errors(errors)}")
+        return not errors
+
+    def on_dry_run(self, action, param):
+        """Runs grub-mkconfig on the pending settings in a sandbox and shows how the menu would change."""
+        if not self.collect_settings(): return
+        # A throwaway copy: the real model's baseline must stay what is on disk
+        pending = GrubConfigFile(self.grub_file.render())
+        pending.update(self.grub_settings)
+        config_text = pending.render()
+        cancel = threading.Event()
+        from src.helper import get_helper, op_read, op_mkconfig_dry_run
+        helper = get_helper()
+
+        def privileged(text, on_line):
+            return helper.request([op_mkconfig_dry_run(text)], on_line=on_line)[0]["content"]
+
+        def run(on_line):
+            from src.dry_run import dry_run, read_current, format_changes
+            current = read_current(read_privileged=lambda p: helper.request([op_read(p)])[0]["content"])
+            result = dry_run(config_text, current, on_line=on_line, cancel=cancel, privileged=privileged)
+            on_line("\n--- Changes to the boot menu ---\n" + format_changes(result) + "\n")
+            return 0
+
+        def on_cancel():
+            cancel.set()
+            helper.cancel()
+
+        from src.progress import ProgressWindow
+        progress = ProgressWindow("Dry Run: grub-mkconfig", run, cancel=on_cancel, transient_for=self)
+        progress.append_line("grub-mkconfig runs in a private mount namespace; /boot and /etc are not written.\n")
+        progress.present()
+        progress.start()
+
+    def on_save_clicked(self, button, force=False):
+        # 1. Gather Data
+        if not self.collect_settings(): return
+
+        # 2. Patch the file model and compare input fingerprints to decide how much work this save needs
+        from src.save_plan import plan_save
+        ops, changed, file_changed = plan_save(self.grub_file, self.grub_settings, force)
+        payload = self.grub_file.render()
+        if not ops:
+            self.show_toast("Nothing changed. GRUB is already up to date.")
+            return
 
-            # Next, run ONE root command that does everything:
-            # A. Overwrite /etc/default/grub with temp content
-            # B. Delete the temp file
-            # C. Run update-grub
-            cmd = f"cat '{tmp_path}' > /etc/default/grub && rm '{tmp_path}' && update-grub"
+        # 3. Everything goes to the helper as one request, in a ProgressWindow so the UI
+        # stays responsive while os-prober crawls.
+        from src.fingerprint import describe_inputs
+        from src.helper import get_helper, HelperError
+        if changed:
+            title = "Updating GRUB"
+            intro = f"Changed inputs: {describe_inputs(changed)}\n"
+        else:
+            # Only non-generative values changed: grub.cfg would come out identical
+            title = "Saving GRUB Settings"
+            intro = "No grub-mkconfig inputs changed, skipping update-grub.\n"
 
-            subprocess.run(["pkexec", "sh", "-c", cmd], check=True)
-            self.show_toast("System updated successfully!")
+        helper = get_helper()
+        outcome = {"rolled_back": False}
 
-        except subprocess.CalledProcessError:
-            self.show_toast("Save cancelled or failed.")
-        except Exception as e:
-            self.show_toast(f"Error: {e}")
+        def run(on_line):
+            # All-or-nothing: if update-grub fails, /etc/default/grub and the theme files are put back
+            try:
+                with span("save.apply", changed=changed, file_changed=file_changed):
+                    helper.request(ops, on_line=on_line, transaction=True)
+            except HelperError as e:
+                outcome["rolled_back"] = e.rolled_back
+                raise
+            return 0
+
+        def on_finished(returncode, cancelled):
+            self.save_btn.set_sensitive(True)
+            # Whatever happened, the model's baseline must match what is on disk now
+            try:
+                with open(GRUB_PATH, 'r') as f:
+                    if f.read() == payload:
+                        self.grub_file.commit()
+                        self.loaded_settings = dict(self.grub_settings)
+                        for key in list(self.conflicts): self.mark_conflict(key, None)
+            except OSError: pass
+            # Picks up edits other tools made while the save was running
+            self.check_grub_file()
+            # The helper's reply decides: a cancel pressed after update-grub finished changes nothing
+            if returncode != 0 and outcome["rolled_back"]:
+                self.show_toast(f"Update {'cancelled' if cancelled else 'failed'}. All changes were rolled back.")
+            elif returncode != 0: self.show_toast("Save cancelled or failed. Nothing was changed.")
+            elif changed: self.show_toast(f"System updated ({describe_inputs(changed)} changed).")
+            else: self.show_toast("Settings saved. grub.cfg did not need regenerating.")
+
+        self.save_btn.set_sensitive(False)
+        from src.progress import ProgressWindow
+        progress = ProgressWindow(title, run, cancel=helper.cancel, on_finished=on_finished, transient_for=self)
+        progress.append_line(intro)
+        progress.present()
+        progress.start()
+
+    def snapshot_roots(self):
+        """/etc/default/grub plus the directory of the configured theme."""
+        theme_dir = os.path.dirname(str(self.grub_settings.get("GRUB_THEME", "")).strip('"').strip("'"))
+        return [GRUB_PATH] + ([theme_dir] if theme_dir and os.path.isdir(theme_dir) else [])
 
     def on_create_backup(self, action, param):
-        try:
-            subprocess.run(["pkexec", "cp", "/etc/default/grub", BACKUP_PATH], check=True)
-            self.show_toast("Backup created at /etc/default/grub.bak")
-        except Exception as e:
-            self.show_toast(f"Backup failed: {e}")
+        from src.helper import get_helper, op_snapshot
+        ops = [op_snapshot(self.snapshot_roots(), "Manual snapshot")]
+
+        def work():
+            try: result = get_helper().request(ops)[0]
+            except Exception as e: GLib.idle_add(self.show_toast, f"Snapshot failed: {e}")
+            else:
+                GLib.idle_add(self.show_toast, f"Snapshot saved: {result['files']} file(s), "
+                                               f"{GLib.format_size(result['new_bytes'])} of new data.")
+
+        threading.Thread(target=work, daemon=True).start()
 
     def on_restore_backup(self, action, param):
-        if not os.path.exists(BACKUP_PATH):
-            self.show_toast("No backup found!")
-            return
-        try:
-            subprocess.run(["pkexec", "cp", BACKUP_PATH, "/etc/default/grub"], check=True)
-            self.grub_settings = read_grub_config()  # Reload state
-            self.show_toast("Restored! Please restart app to see changes.")
-        except Exception as e:
-            self.show_toast(f"Restore failed: {e}")
+        from src.snapshots import SnapshotsWindow
+        SnapshotsWindow(self.restore_snapshot, transient_for=self).present()
+
+    def restore_snapshot(self, snap_id):
+        from src.helper import get_helper, op_restore_snapshot
+
+        def work():
+            try: result = get_helper().request([op_restore_snapshot(snap_id)])[0]
+            except Exception as e: GLib.idle_add(self.show_toast, f"Restore failed: {e}")
+            else: GLib.idle_add(self.on_snapshot_restored, result)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def on_snapshot_restored(self, result):
+        # The open window is updated in place: rows are rebound, the restored theme is rescanned
+        changed, _ = self.rebind_settings()
+        if any(p != GRUB_PATH for p in result["written"] + result["removed"]):
+            self.theme_index.refresh(force=True)
+            self.reload_theme_store()
+        files = len(result["written"]) + len(result["removed"])
+        self.show_toast(f"Restored {files} file(s), {len(changed)} setting(s) changed. Save to regenerate grub.cfg.")
+        return GLib.SOURCE_REMOVE
+
+    def on_trace_log(self, action, param):
+        from src.trace_panel import TracePanelWindow
+        TracePanelWindow(transient_for=self).present()
 
     def on_refresh_themes(self, action, param):
-        # Trigger a refresh of the dropdown if needed, or just notify
-        self.show_toast("Refreshed theme list.")
+        changed = self.theme_index.refresh()
+        self.thumb_failed.clear()
+        self.reload_theme_store()
+        self.sync_theme_monitors()
+        self.show_toast(f"Refreshed theme list ({len(changed)} changed)." if changed else "Theme list is up to date.")
 
     def show_toast(self, message):
         self.toast_overlay.add_toast(Adw.Toast.new(message))
@@ -376,7 +710,27 @@ class GrubTamerWindow(Adw.ApplicationWindow):
 class GrubTamerApp(Adw.Application):
     def __init__(self): super().__init__(application_id='org.example.GrubTamer')
 
-    def do_activate(self): GrubTamerWindow(application=self).present()
+    def do_activate(self):
+        window = GrubTamerWindow(application=self)
+        window.present()
+        if os.environ.get("GRUBTAMER_BENCH_STARTUP"): report_first_frame(window, self)
+
+    def do_shutdown(self):
+        # Nothing to stop if no privileged action was taken this session
+        if "src.helper" in sys.modules: sys.modules["src.helper"].get_helper().stop()
+        Adw.Application.do_shutdown(self)
+
+
+def report_first_frame(window, app):
+    """Startup benchmark hook: prints the time to the first painted frame, then quits."""
+    clock = window.get_frame_clock()
+
+    def on_after_paint(_clock):
+        print(f"GRUBTAMER_FIRST_FRAME {time.perf_counter() - START_TIME:.6f}", flush=True)
+        clock.disconnect(handler)
+        GLib.idle_add(app.quit)
+
+    handler = clock.connect("after-paint", on_after_paint)
 
 
 if __name__ == "__main__": GrubTamerApp().run(sys.argv)
\ No newline at end of file
@@ -0,0 +1,108 @@
+import gi
+from src.option_catalog import load_catalog, search_index
+
+gi.require_version('Gtk', '4.0')
+gi.require_version('Adw', '1')
+from gi.repository import Gtk, Adw, Gio, GObject, Pango
+
+
+class OptionItem(GObject.Object):
+    """List model item for one catalog option."""
+    def __init__(self, key, data, order):
+        super().__init__()
+        self.key = key
+        self.data = data
+        self.order = order
+
+
+class AddCommandWindow(Adw.Window):
+    def __init__(self, exclude_keys, on_select_callback, **kwargs):
+        super().__init__(**kwargs)
+        self.on_select_callback = on_select_callback
+        self.query = ""
+        self.ranks = None
+
+        self.set_title("Add GRUB Command")
+        self.set_default_size(450, 600)
+        self.set_modal(True)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self.set_content(box)
+        box.append(Adw.HeaderBar())
+
+        self.search_entry = Gtk.SearchEntry(placeholder_text="Search available commands...")
+        self.search_entry.set_margin_start(12); self.search_entry.set_margin_end(12)
+        self.search_entry.set_margin_bottom(6)
+        self.search_entry.connect("search-changed", self.on_search_changed)
+        box.append(self.search_entry)
+
+        # Model: ListStore -> FilterListModel -> SortListModel -> NoSelection. The store is filled
+        # once; a keystroke only re-ranks, so the ListView keeps recycling the same row widgets.
+        self.store = Gio.ListStore.new(OptionItem)
+        self.store.splice(0, 0, [OptionItem(key, data, i) for i, (key, data) in enumerate(load_catalog().items())
+                                 if key not in exclude_keys])
+        self.filter = Gtk.CustomFilter.new(self.filter_func, None)
+        self.sorter = Gtk.CustomSorter.new(self.sort_func, None)
+        filter_model = Gtk.FilterListModel(model=self.store, filter=self.filter)
+        self.sort_model = Gtk.SortListModel(model=filter_model, sorter=self.sorter)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_factory_setup)
+        factory.connect("bind", self.on_factory_bind)
+
+        list_view = Gtk.ListView(model=Gtk.NoSelection(model=self.sort_model), factory=factory)
+        list_view.set_single_click_activate(True)
+        list_view.add_css_class("navigation-sidebar")
+        list_view.connect("activate", self.on_row_activated)
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_child(list_view)
+        scrolled.set_vexpand(True)
+
+        self.stack = Gtk.Stack()
+        self.stack.add_named(scrolled, "list")
+        self.stack.add_named(Adw.StatusPage(icon_name="edit-find-symbolic", title="No matching commands"), "empty")
+        box.append(self.stack)
+
+    @staticmethod
+    def on_factory_setup(factory, list_item):
+        row = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        row.set_margin_top(6); row.set_margin_bottom(6)
+        title = Gtk.Label(xalign=0.0, ellipsize=Pango.EllipsizeMode.END)
+        subtitle = Gtk.Label(xalign=0.0, ellipsize=Pango.EllipsizeMode.END)
+        subtitle.add_css_class("dim-label"); subtitle.add_css_class("caption")
+        row.append(title); row.append(subtitle)
+        row.title, row.subtitle = title, subtitle
+        list_item.set_child(row)
+
+    @staticmethod
+    def on_factory_bind(factory, list_item):
+        item = list_item.get_item()
+        row = list_item.get_child()
+        row.title.set_text(item.key)
+        row.subtitle.set_text(item.data["label"])
+        row.set_tooltip_text(item.data["desc"])
+
+    def filter_func(self, item, _):
+        return self.ranks is None or item.key in self.ranks
+
+    def sort_func(self, a, b, _):
+        if self.ranks is None: return (a.order > b.order) - (a.order < b.order)
+        ka, kb = (-self.ranks[a.key], a.order), (-self.ranks[b.key], b.order)
+        return (ka > kb) - (ka < kb)
+
+    def on_search_changed(self, entry):
+        query = entry.get_text().strip()
+        if query == self.query: return
+        self.query = query
+        # Fuzzy matches can appear while a term grows, so neither direction is strictly monotonic
+        self.ranks = search_index().rank(query)
+        self.filter.changed(Gtk.FilterChange.DIFFERENT)
+        self.sorter.changed(Gtk.SorterChange.DIFFERENT)
+        self.stack.set_visible_child_name("list" if self.sort_model.get_n_items() else "empty")
+
+    def on_row_activated(self, list_view, position):
+        item = self.sort_model.get_item(position)
+        if item is None: return
+        self.on_select_callback(item.key, item.data)
+        self.close()
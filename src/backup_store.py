@@ -0,0 +1,176 @@
+"""Snapshot history of /etc/default/grub and the active theme.
+
+File contents are stored once, zlib-compressed, under the sha256 of their bytes:
+
+    /var/lib/grubtamer/objects/ab/cdef0123...      compressed file contents
+    /var/lib/grubtamer/snapshots/<id>.json         {version, id, created, label, roots, files}
+
+A snapshot manifest maps each path to {sha256, size, mode, mtime_ns}, so taking
+one only writes the objects that are new and a manifest of a few hundred bytes.
+Files whose size and mtime match the previous snapshot are not even re-read.
+Snapshots are taken and restored by the privileged helper; the store is
+world-readable (it only holds copies of world-readable files), so listing and
+diffing happen in the GUI without authentication.
+"""
+import difflib
+import hashlib
+import json
+import os
+import time
+import zlib
+
+STORE_DIR = "/var/lib/grubtamer"
+MANIFEST_VERSION = 1
+COMPRESS_LEVEL = 6
+# Files bigger than this (wallpapers) are still stored but not shown as a text diff
+MAX_DIFF_BYTES = 256 * 1024
+
+
+def _objects_dir(store): return os.path.join(store, "objects")
+def _snapshots_dir(store): return os.path.join(store, "snapshots")
+
+
+def object_path(digest, store=STORE_DIR):
+    return os.path.join(_objects_dir(store), digest[:2], digest[2:])
+
+
+def _write_file(path, data, mode=0o644):
+    os.makedirs(os.path.dirname(path), mode=0o755, exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
+
+
+def write_object(data, store=STORE_DIR):
+    """Stores data if it isn't stored yet. Returns (digest, compressed bytes written, 0 if deduplicated)."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(digest, store)
+    if os.path.exists(path): return digest, 0
+    packed = zlib.compress(data, COMPRESS_LEVEL)
+    _write_file(path, packed)
+    return digest, len(packed)
+
+
+def read_object(digest, store=STORE_DIR):
+    with open(object_path(digest, store), 'rb') as f: return zlib.decompress(f.read())
+
+
+def _iter_files(root):
+    if os.path.isfile(root):
+        yield root
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames): yield os.path.join(dirpath, name)
+
+
+def create_snapshot(roots, label="", store=STORE_DIR):
+    """Snapshots every file under roots (files or directories). Returns the manifest plus write stats."""
+    previous = {}
+    if (latest := list_snapshots(store)): previous = load_snapshot(latest[0]["id"], store)["files"]
+    files, new_objects, new_bytes = {}, 0, 0
+    for root in roots:
+        if not os.path.exists(root): continue
+        for path in _iter_files(root):
+            st = os.stat(path)
+            old = previous.get(path)
+            # Unchanged size and mtime: the object is already stored, skip reading the file
+            if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns \
+                    and os.path.exists(object_path(old["sha256"], store)):
+                digest = old["sha256"]
+            else:
+                with open(path, 'rb') as f: digest, written = write_object(f.read(), store)
+                if written: new_objects += 1; new_bytes += written
+            files[path] = {"sha256": digest, "size": st.st_size, "mode": st.st_mode & 0o7777, "mtime_ns": st.st_mtime_ns}
+
+    created = time.time()
+    digest = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+    snap_id = time.strftime("%Y%m%d-%H%M%S", time.localtime(created)) + "-" + digest[:8]
+    manifest = {"version": MANIFEST_VERSION, "id": snap_id, "created": created, "label": label,
+                "roots": list(roots), "files": files}
+    _write_file(os.path.join(_snapshots_dir(store), snap_id + ".json"), json.dumps(manifest, indent=1).encode())
+    return {**manifest, "new_objects": new_objects, "new_bytes": new_bytes}
+
+
+def list_snapshots(store=STORE_DIR):
+    """Snapshot summaries, newest first: {id, created, label, files, size}."""
+    try: names = os.listdir(_snapshots_dir(store))
+    except FileNotFoundError: return []
+    summaries = []
+    for name in names:
+        if not name.endswith(".json"): continue
+        try: manifest = load_snapshot(name[:-5], store)
+        except (OSError, ValueError): continue
+        summaries.append({"id": manifest["id"], "created": manifest["created"], "label": manifest["label"],
+                          "files": len(manifest["files"]), "size": sum(f["size"] for f in manifest["files"].values())})
+    return sorted(summaries, key=lambda s: s["created"], reverse=True)
+
+
+def load_snapshot(snap_id, store=STORE_DIR):
+    with open(os.path.join(_snapshots_dir(store), snap_id + ".json"), 'r') as f: manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION: raise ValueError(f"snapshot {snap_id} has an unknown format")
+    return manifest
+
+
+def live_files(roots, known=None):
+    """The current state of roots in manifest form (hashes only, nothing is stored).
+
+    Files whose size and mtime match their record in known are not re-hashed.
+    """
+    files, known = {}, known or {}
+    for root in roots:
+        if not os.path.exists(root): continue
+        for path in _iter_files(root):
+            try: st = os.stat(path)
+            except OSError: continue
+            record = {"size": st.st_size, "mode": st.st_mode & 0o7777, "mtime_ns": st.st_mtime_ns}
+            old = known.get(path)
+            if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns: record["sha256"] = old["sha256"]
+            else:
+                try:
+                    with open(path, 'rb') as f: record["sha256"] = hashlib.sha256(f.read()).hexdigest()
+                except OSError: continue
+            files[path] = record
+    return files
+
+
+def diff_files(old, new):
+    """Compares two {path: record} maps. Returns {added, removed, changed} path lists."""
+    return {"added": sorted(p for p in new if p not in old),
+            "removed": sorted(p for p in old if p not in new),
+            "changed": sorted(p for p in new if p in old and new[p]["sha256"] != old[p]["sha256"])}
+
+
+def text_diff(path, old_record, new_record, store=STORE_DIR, live=False):
+    """Unified diff of one file between a snapshot (old) and another snapshot or, with live, the disk."""
+    def content(record, from_disk):
+        if record is None: return b""
+        if record["size"] > MAX_DIFF_BYTES: return None
+        if from_disk:
+            with open(path, 'rb') as f: return f.read()
+        return read_object(record["sha256"], store)
+
+    old, new = content(old_record, False), content(new_record, live)
+    if old is None or new is None or b"\0" in old or b"\0" in new:
+        return f"Binary file {path} differs\n"
+    return "".join(difflib.unified_diff(old.decode(errors="replace").splitlines(keepends=True),
+                                        new.decode(errors="replace").splitlines(keepends=True),
+                                        fromfile=f"a{path}", tofile=f"b{path}"))
+
+
+def restore_plan(snap_id, store=STORE_DIR):
+    """What restoring a snapshot does: {path: bytes} to write (with modes) and paths to remove.
+
+    Files under the snapshot's roots that did not exist when it was taken are removed,
+    so the roots end up exactly as snapshotted.
+    """
+    manifest = load_snapshot(snap_id, store)
+    current = live_files(manifest["roots"], manifest["files"])
+    writes = {path: (read_object(rec["sha256"], store), rec["mode"]) for path, rec in manifest["files"].items()
+              if path not in current or current[path]["sha256"] != rec["sha256"] or current[path]["mode"] != rec["mode"]}
+    removes = [path for path in current if path not in manifest["files"]]
+    return writes, removes
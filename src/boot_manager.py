@@ -1,53 +1,49 @@
-import re
-import subprocess
+import threading
 import gi
+from src.helper import get_helper, op_read, HelperError
+from src.grub_cfg import load_entries, walk, default_value, GRUB_CFG_PATH
+from src.trace import span
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw
+from gi.repository import Gtk, Adw, Gio, GLib, GObject, Pango
 
 
 def get_boot_entries():
-    """Parses /boot/grub/grub.cfg using pkexec to bypass permission issues."""
-    entries = []
-    cfg_path = '/boot/grub/grub.cfg'
+    """Returns (menu tree, error) for /boot/grub/grub.cfg.
 
+    The tree comes from the on-disk cache while grub.cfg is unchanged; the privileged
+    helper is only asked to read the file when it is not world-readable and has changed.
+    """
     try:
-        # FIX: Use pkexec cat instead of open() to read root-owned file
-        # This will trigger a password prompt if the user hasn't authenticated recently
-        result = subprocess.run(
-            ["pkexec", "cat", cfg_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        content = result.stdout
-
-        for line in content.splitlines():
-            # Look for lines starting with: menuentry 'Title' ...
-            # Regex handles both single (' ') and double (" ") quotes
-            match = re.search(r"^\s*menuentry\s+['\"]([^'\"]+)['\"]", line)
-            if match:
-                title = match.group(1)
-                entries.append(title)
-
-    except subprocess.CalledProcessError:
+        entries = load_entries(GRUB_CFG_PATH, read_privileged=lambda p: get_helper().request([op_read(p)])[0]["content"])
+    except HelperError:
         # Occurs if user hits Cancel on password prompt
-        return ["Authentication cancelled"]
+        return [], "Authentication cancelled"
     except Exception as e:
         print(f"Error reading boot entries: {e}")
-        return [f"Error: {e}"]
+        return [], f"Error: {e}"
 
     if not entries:
-        return ["No entries found (Is GRUB installed?)"]
+        return [], "No entries found (Is GRUB installed?)"
 
-    return entries
+    return entries, None
+
+
+class BootEntryItem(GObject.Object):
+    """List model item wrapping one node of the grub.cfg menu tree."""
+    def __init__(self, node, depth):
+        super().__init__()
+        self.node = node
+        self.depth = depth
+        self.search_text = " ".join([default_value(node), node["id"]] + node["classes"]).lower()
 
 
 class BootManagerWindow(Adw.Window):
     def __init__(self, on_select_callback, **kwargs):
         super().__init__(**kwargs)
         self.on_select_callback = on_select_callback
+        self.query = ""
 
         self.set_title("Select Default Boot Entry")
         self.set_default_size(500, 600)
@@ -61,44 +57,116 @@ class BootManagerWindow(Adw.Window):
         header = Adw.HeaderBar()
         box.append(header)
 
-        # Explanation
-        info_row = Adw.ActionRow(title="Select the OS to boot by default",
-                                 subtitle="This sets GRUB_DEFAULT to the exact name, which is safer than using numbers.")
-        info_row.set_selectable(False)
-
-        # List Group
-        page = Adw.PreferencesPage()
-        group = Adw.PreferencesGroup()
-        group.add(info_row)
-
-        # Populate List
-        entries = get_boot_entries()
-        for entry in entries:
-            row = Adw.ActionRow(title=entry)
-
-            # Selection Button
-            btn = Gtk.Button(label="Select")
-            btn.set_valign(Gtk.Align.CENTER)
-            btn.add_css_class("pill")
+        # Explanation + Search
+        info = Gtk.Label(label="Select the OS to boot by default. This sets GRUB_DEFAULT to the exact name, "
+                               "which is safer than using numbers.", wrap=True, xalign=0.0)
+        info.add_css_class("dim-label")
+        info.set_margin_top(6); info.set_margin_bottom(6)
+        info.set_margin_start(12); info.set_margin_end(12)
+        box.append(info)
+
+        self.search_entry = Gtk.SearchEntry(placeholder_text="Filter entries...")
+        self.search_entry.set_margin_start(12); self.search_entry.set_margin_end(12)
+        self.search_entry.set_margin_bottom(6)
+        self.search_entry.connect("search-changed", self.on_search_changed)
+        box.append(self.search_entry)
+
+        # Model: ListStore -> FilterListModel -> NoSelection. Rows are recycled by the ListView,
+        # so only the visible handful of widgets ever exist.
+        self.store = Gio.ListStore.new(BootEntryItem)
+        self.filter = Gtk.CustomFilter.new(self.filter_func, None)
+        self.filter_model = Gtk.FilterListModel(model=self.store, filter=self.filter)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_factory_setup)
+        factory.connect("bind", self.on_factory_bind)
+
+        list_view = Gtk.ListView(model=Gtk.NoSelection(model=self.filter_model), factory=factory)
+        list_view.set_single_click_activate(True)
+        list_view.add_css_class("navigation-sidebar")
+        list_view.connect("activate", self.on_row_activated)
 
-            # Connect click
-            # If extraction failed (e.g. "Authentication cancelled"), disable the button
-            if entry.startswith("Error") or entry.startswith("Auth") or entry.startswith("No entries"):
-                btn.set_sensitive(False)
-
-            btn.connect("clicked", self.on_entry_clicked, entry)
-
-            row.add_suffix(btn)
-            group.add(row)
-
-        page.add(group)
-
-        # Scrollable container
         scrolled = Gtk.ScrolledWindow()
-        scrolled.set_child(page)
+        scrolled.set_child(list_view)
         scrolled.set_vexpand(True)
-        box.append(scrolled)
+
+        # Loading / error / list states
+        self.stack = Gtk.Stack()
+        self.stack.set_vexpand(True)
+        loading = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        loading.set_valign(Gtk.Align.CENTER)
+        spinner = Gtk.Spinner(); spinner.set_size_request(32, 32); spinner.start()
+        loading.append(spinner)
+        loading.append(Gtk.Label(label="Reading boot entries..."))
+        self.stack.add_named(loading, "loading")
+        self.stack.add_named(scrolled, "list")
+        self.status_page = Adw.StatusPage(icon_name="dialog-warning-symbolic")
+        self.stack.add_named(self.status_page, "error")
+        box.append(self.stack)
+
+        threading.Thread(target=self.load_entries, daemon=True).start()
+
+    def load_entries(self):
+        with span("boot_entries.load") as s:
+            entries, error = get_boot_entries()
+            s.set(entries=len(entries), error=error)
+        items = [BootEntryItem(node, depth) for node, depth in walk(entries)]
+        GLib.idle_add(self.on_entries_loaded, items, error)
+
+    def on_entries_loaded(self, items, error):
+        if error:
+            self.status_page.set_title(error)
+            self.stack.set_visible_child_name("error")
+        else:
+            self.store.splice(0, 0, items)
+            self.stack.set_visible_child_name("list")
+        return GLib.SOURCE_REMOVE
+
+    @staticmethod
+    def on_factory_setup(factory, list_item):
+        row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        row.set_margin_top(6); row.set_margin_bottom(6)
+        icon = Gtk.Image()
+        labels = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        title = Gtk.Label(xalign=0.0, ellipsize=Pango.EllipsizeMode.END)
+        subtitle = Gtk.Label(xalign=0.0, ellipsize=Pango.EllipsizeMode.END)
+        subtitle.add_css_class("dim-label"); subtitle.add_css_class("caption")
+        labels.append(title); labels.append(subtitle)
+        row.append(icon); row.append(labels)
+        row.icon, row.title, row.subtitle = icon, title, subtitle
+        list_item.set_child(row)
+
+    @staticmethod
+    def on_factory_bind(factory, list_item):
+        item = list_item.get_item()
+        row = list_item.get_child()
+        node = item.node
+        row.set_margin_start(item.depth * 24)
+        row.icon.set_from_icon_name("folder-symbolic" if node["type"] == "submenu" else "system-run-symbolic")
+        row.title.set_text(node["title"])
+        row.subtitle.set_text(node["id"] or " ")
+        # Submenus only group entries; they cannot be a default target here
+        list_item.set_activatable(node["type"] != "submenu")
+
+    def filter_func(self, item, _):
+        return not self.query or self.query in item.search_text
+
+    def on_search_changed(self, entry):
+        query = entry.get_text().strip().lower()
+        if query == self.query: return
+        # Telling the filter model which way the query moved lets it skip re-checking
+        # rows that cannot change state (hidden ones when narrowing, shown ones when widening)
+        if self.query in query: change = Gtk.FilterChange.MORE_STRICT
+        elif query in self.query: change = Gtk.FilterChange.LESS_STRICT
+        else: change = Gtk.FilterChange.DIFFERENT
+        self.query = query
+        self.filter.changed(change)
+
+    def on_row_activated(self, list_view, position):
+        item = self.filter_model.get_item(position)
+        if item is None or item.node["type"] == "submenu": return
+        self.on_entry_clicked(None, default_value(item.node))
 
     def on_entry_clicked(self, button, entry_name):
         self.on_select_callback(entry_name)
-        self.close()
\ No newline at end of file
+        self.close()
@@ -0,0 +1,191 @@
+"""Headless front end: stamps GRUB settings and theme changes into many target roots.
+
+    python3 -m src.cli --set GRUB_TIMEOUT=3 --theme-set title-color=#ffffff \\
+        --mkconfig --jobs 8 --report report.json /mnt/img1 /mnt/img2
+
+Uses the same parser and theme modules as the GUI but never imports GTK.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.parser import GrubConfigFile, GRUB_PATH
+from src.theme_parser import parse_theme, save_theme, THEME_GLOBALS
+from src.fingerprint import (compute_fingerprint, load_fingerprint, dump_fingerprint, changed_inputs,
+                             FINGERPRINT_PATH, GRUB_CFG_PATH)
+from src.helper import write_atomic
+from src.validator import validate_grub, validate_theme, describe_errors
+from src.trace import span, enabled, clear, recent, add_spans
+
+
+def in_root(root, path):
+    return os.path.join(root, path.lstrip('/'))
+
+
+def parse_assignment(text):
+    if '=' not in text: raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got '{text}'")
+    key, value = text.split('=', 1)
+    return key.strip(), value
+
+
+def load_plan_file(path):
+    """Reads settings from a JSON plan or from a /etc/default/grub style KEY=VALUE file."""
+    with open(path, 'r') as f: text = f.read()
+    if path.endswith(".json"):
+        data = json.loads(text)
+        return data.get("settings", {}), data.get("unset", []), data.get("theme", {})
+    return GrubConfigFile(text).settings(), [], {}
+
+
+def run_mkconfig(root):
+    argv = ["grub-mkconfig", "-o", GRUB_CFG_PATH]
+    if os.path.realpath(root) != "/": argv = ["chroot", root] + argv
+    with span("exec.grub-mkconfig", argv=argv, root=root) as s:
+        proc = subprocess.run(argv, capture_output=True, text=True)
+        s.set(returncode=proc.returncode)
+    return {"argv": argv, "returncode": proc.returncode, "output": (proc.stdout + proc.stderr)[-2000:]}
+
+
+def apply_to_root(root, plan):
+    """Applies a plan to one target root. Runs in a worker process; returns a result dict."""
+    started = time.monotonic()
+    clear()  # worker processes are reused; only this root's spans go back with the result
+    result = {"root": root, "ok": True, "changed_settings": [], "theme_changed": False,
+              "mkconfig": None, "error": None}
+    try:
+        grub_path = in_root(root, GRUB_PATH)
+        try: model = GrubConfigFile.load(grub_path)
+        except FileNotFoundError: model = GrubConfigFile()
+        errors = validate_grub(plan["settings"], root=root)
+        if errors: raise ValueError(describe_errors(errors))
+        for key, value in plan["settings"].items(): model.set(key, value)
+        for key in plan["unset"]: model.remove(key)
+        result["changed_settings"] = sorted(model.changed_keys)
+
+        # Render everything before writing anything, so a bad theme leaves the root untouched
+        theme_path = plan["theme_path"] or model.get("GRUB_THEME", "")
+        theme_file = content = None
+        if plan["theme"]:
+            theme_file = in_root(root, theme_path) if theme_path else ""
+            if not theme_file or not os.path.exists(theme_file):
+                raise FileNotFoundError(f"theme file not found: {theme_path or '(GRUB_THEME unset)'}")
+            errors, _ = validate_theme(plan["theme"], os.path.dirname(theme_file))
+            if errors: raise ValueError(describe_errors(errors))
+            with open(theme_file, 'r') as f: original = f.read()
+            data = parse_theme(theme_file)
+            data.update(plan["theme"])
+            content = save_theme(theme_file, data)
+            if content is None: raise ValueError(f"could not render {theme_path}")
+            result["theme_changed"] = content != original
+
+        if not plan["dry_run"]:
+            if model.is_dirty():
+                os.makedirs(os.path.dirname(grub_path), exist_ok=True)
+                write_atomic(grub_path, model.render().encode())
+            if result["theme_changed"]: write_atomic(theme_file, content.encode())
+
+        if plan["mkconfig"] and not plan["dry_run"]:
+            fp_path = in_root(root, FINGERPRINT_PATH)
+            fingerprint = compute_fingerprint(model.render(), theme_path, root=root)
+            changed = changed_inputs(load_fingerprint(fp_path), fingerprint, fp_path, in_root(root, GRUB_CFG_PATH))
+            if changed or plan["force"]:
+                result["mkconfig"] = run_mkconfig(root)
+                result["mkconfig"]["changed_inputs"] = changed
+                if result["mkconfig"]["returncode"] != 0:
+                    raise RuntimeError(f"grub-mkconfig exited with status {result['mkconfig']['returncode']}")
+                write_atomic(fp_path, dump_fingerprint(fingerprint).encode())
+            else:
+                result["mkconfig"] = {"skipped": True, "changed_inputs": []}
+    except Exception as e:
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.monotonic() - started, 3)
+    if enabled(): result["spans"] = recent()
+    return result
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="grubtamer-cli", description="Apply GRUB settings and theme changes to target roots.")
+    p.add_argument("roots", nargs="*", help="Root directories of the target systems (chroots, mounted images).")
+    p.add_argument("--roots-file", help="File with one root directory per line.")
+    p.add_argument("--set", dest="settings", action="append", type=parse_assignment, default=[],
+                   metavar="KEY=VALUE", help="Set a /etc/default/grub key. Repeatable.")
+    p.add_argument("--unset", action="append", default=[], metavar="KEY", help="Remove a key. Repeatable.")
+    p.add_argument("--settings-file", help="KEY=VALUE file, or JSON with 'settings', 'unset' and 'theme'.")
+    p.add_argument("--theme-set", action="append", type=parse_assignment, default=[], metavar="PROP=VALUE",
+                   help=f"Set a theme property ({', '.join(THEME_GLOBALS)}). Repeatable.")
+    p.add_argument("--theme-path", help="theme.txt to edit, relative to each root (default: GRUB_THEME).")
+    p.add_argument("--mkconfig", action="store_true", help="Run grub-mkconfig in each root when its inputs changed.")
+    p.add_argument("--force", action="store_true", help="With --mkconfig, run it even if no input changed.")
+    p.add_argument("--dry-run", action="store_true", help="Report what would change without writing anything.")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Parallel worker processes.")
+    p.add_argument("--report", help="Write a JSON report to this file ('-' for stdout).")
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    settings, unset, theme = {}, list(args.unset), {}
+    try:
+        if args.settings_file:
+            settings, file_unset, theme = load_plan_file(args.settings_file)
+            unset += file_unset
+    except (OSError, ValueError) as e:
+        print(f"Error reading {args.settings_file}: {e}", file=sys.stderr)
+        return 2
+    settings.update(dict(args.settings))
+    theme.update(dict(args.theme_set))
+    unknown = [k for k in theme if k not in THEME_GLOBALS]
+    if unknown:
+        print(f"Unknown theme properties: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    # Paths are checked per root; everything else can be rejected before any worker starts
+    errors = {**validate_grub(settings, root=None), **validate_theme(theme)[0]}
+    if errors:
+        print(f"Invalid values: {describe_errors(errors, limit=len(errors))}", file=sys.stderr)
+        return 2
+
+    roots = list(args.roots)
+    if args.roots_file:
+        with open(args.roots_file, 'r') as f: roots += [l.strip() for l in f if l.strip() and not l.startswith('#')]
+    if not roots:
+        print("No target roots given.", file=sys.stderr)
+        return 2
+
+    plan = {"settings": settings, "unset": unset, "theme": theme, "theme_path": args.theme_path,
+            "mkconfig": args.mkconfig, "force": args.force, "dry_run": args.dry_run}
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(roots)))) as pool:
+        futures = [pool.submit(apply_to_root, root, plan) for root in roots]
+        for future in as_completed(futures):
+            r = future.result()
+            add_spans(r.pop("spans", []))
+            results.append(r)
+            status = "ok" if r["ok"] else "FAILED"
+            details = [f"{len(r['changed_settings'])} setting(s)"]
+            if r["theme_changed"]: details.append("theme")
+            if r["mkconfig"]: details.append("mkconfig skipped" if r["mkconfig"].get("skipped") else "mkconfig ran")
+            line = f"[{status}] {r['root']}: {', '.join(details)} ({r['seconds']}s)"
+            if r["error"]: line += f" - {r['error']}"
+            print(line, file=sys.stderr)
+
+    results.sort(key=lambda r: roots.index(r["root"]))
+    failed = sum(1 for r in results if not r["ok"])
+    report = {"ok": failed == 0, "total": len(results), "failed": failed, "dry_run": args.dry_run, "results": results}
+    if args.report == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.report:
+        with open(args.report, 'w') as f: json.dump(report, f, indent=2)
+    print(f"{len(results) - failed}/{len(results)} roots succeeded.", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""Dry run of grub-mkconfig: what would the boot menu look like with these settings?
+
+    python3 -m src.dry_run --set GRUB_CMDLINE_LINUX_DEFAULT="quiet" [--config FILE] [--json]
+
+The pending /etc/default/grub is written to a temp file and bind-mounted over the
+real one inside a private mount namespace (unshare), where grub-mkconfig writes
+to a temp file. Nothing outside the namespace sees the substituted file and
+/boot is never written. Without root, a user namespace is used; grub-probe
+usually needs root to read block devices, so callers can pass a privileged
+fallback (the helper's mkconfig_dry_run op) that runs the same sandbox as root.
+"""
+import argparse
+import difflib
+import io
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from src.grub_cfg import parse_grub_cfg, diff_entries, GRUB_CFG_PATH
+from src.parser import GrubConfigFile, GRUB_PATH
+from src.trace import span
+
+# Runs as "root" of the new mount namespace: swap in the pending config, then generate
+SANDBOX_SCRIPT = 'mount --bind "$1" "$2" && exec "$3" -o "$4"'
+
+
+class DryRunError(Exception):
+    """grub-mkconfig could not be run or failed."""
+    def __init__(self, message, returncode=1):
+        super().__init__(message)
+        self.returncode = returncode
+
+
+def mkconfig_command(config_path, output_path, unprivileged):
+    mkconfig = shutil.which("grub-mkconfig") or shutil.which("grub2-mkconfig")
+    if not mkconfig: raise DryRunError("grub-mkconfig is not installed")
+    if not shutil.which("unshare"): raise DryRunError("unshare (util-linux) is not installed")
+    cmd = ["unshare", "--mount", "--propagation", "private"]
+    if unprivileged: cmd[1:1] = ["--user", "--map-root-user"]
+    return cmd + ["sh", "-c", SANDBOX_SCRIPT, "sh", config_path, GRUB_PATH, mkconfig, output_path]
+
+
+def run_mkconfig(config_text, on_line=None, cancel=None, unprivileged=True):
+    """Generates grub.cfg for config_text in a private mount namespace and returns it.
+
+    on_line receives grub-mkconfig's output as it runs; setting the cancel Event kills it.
+    """
+    with tempfile.TemporaryDirectory(prefix="grubtamer-dry-run-") as tmp:
+        config_path, output_path = os.path.join(tmp, "grub"), os.path.join(tmp, "grub.cfg")
+        with open(config_path, 'w') as f: f.write(config_text)
+        argv = mkconfig_command(config_path, output_path, unprivileged)
+        try:
+            proc = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    text=True, bufsize=1, start_new_session=True)
+        except OSError as e:
+            raise DryRunError(f"could not start grub-mkconfig: {e}")
+
+        def watch_cancel():
+            while proc.poll() is None:
+                if cancel.wait(0.2):
+                    try: os.killpg(proc.pid, signal.SIGTERM)
+                    except ProcessLookupError: pass
+                    return
+
+        if cancel is not None: threading.Thread(target=watch_cancel, daemon=True).start()
+        tail = []
+        with span("exec.grub-mkconfig", argv=argv) as s:
+            for line in proc.stdout:
+                tail = (tail + [line])[-5:]
+                if on_line: on_line(line)
+            returncode = proc.wait()
+            s.set(returncode=returncode)
+        if cancel is not None and cancel.is_set(): raise DryRunError("dry run cancelled", returncode or -signal.SIGTERM)
+        if returncode != 0:
+            raise DryRunError(f"grub-mkconfig exited with status {returncode}: {''.join(tail).strip()}", returncode)
+        with open(output_path, 'r', errors='replace') as f: return f.read()
+
+
+def read_current(path=GRUB_CFG_PATH, read_privileged=None):
+    try:
+        with open(path, 'r', errors='replace') as f: return f.read()
+    except FileNotFoundError:
+        return ""
+    except PermissionError:
+        if read_privileged is None: raise
+        return read_privileged(path)
+
+
+def dry_run(config_text, current_text, on_line=None, cancel=None, privileged=None):
+    """Generates grub.cfg for config_text and diffs it against current_text.
+
+    privileged(config_text, on_line) -> str is tried when the unprivileged sandbox fails.
+    Returns {generated, changes, other_lines, privileged}: the new grub.cfg, the
+    structural menu diff (see grub_cfg.diff_entries), and the number of added or
+    removed lines outside menu entries (timeout, theme, terminal setup...).
+    """
+    used_privileged = False
+    try:
+        generated = run_mkconfig(config_text, on_line, cancel, unprivileged=os.geteuid() != 0)
+    except DryRunError as e:
+        if privileged is None or (cancel is not None and cancel.is_set()): raise
+        if on_line: on_line(f"Unprivileged run failed ({e}), retrying as root...\n")
+        generated, used_privileged = privileged(config_text, on_line), True
+
+    old, new = parse_grub_cfg(io.StringIO(current_text)), parse_grub_cfg(io.StringIO(generated))
+    changes = diff_entries(old, new)
+    other = sum(1 for line in difflib.unified_diff(_outside_entries(current_text, old), _outside_entries(generated, new),
+                                                   lineterm="", n=0)
+                if line[:1] in "+-" and not line.startswith(("+++", "---")))
+    return {"generated": generated, "changes": changes, "other_lines": other, "privileged": used_privileged}
+
+
+def _outside_entries(text, entries):
+    lines = text.splitlines()
+    inside = set()
+    for node in entries:
+        if node["end_line"]: inside.update(range(node["line"], node["end_line"] + 1))
+    # Comments only carry the "DO NOT EDIT" banner and script names
+    return [l for i, l in enumerate(lines, 1) if i not in inside and l.strip() and not l.lstrip().startswith('#')]
+
+
+def format_changes(result):
+    """The diff as text, one line per entry: + added, - removed, ~ changed."""
+    lines = []
+    for c in result["changes"]:
+        name = " > ".join(c["path"])
+        if c["change"] == "added": lines.append(f"+ {name}")
+        elif c["change"] == "removed": lines.append(f"- {name}")
+        else:
+            details = []
+            for field, (before, after) in c["fields"].items():
+                if field == "position": details.append(f"moved {_pos(before)} → {_pos(after)}")
+                elif field == "initrd": details.append(f"initrd {' '.join(before)} → {' '.join(after)}")
+                else: details.append(f"{field} {before} → {after}")
+            params = [f"+{p}" for p in c["params_added"]] + [f"-{p}" for p in c["params_removed"]]
+            if params: details.append(f"kernel params {' '.join(params)}")
+            lines.append(f"~ {name}: {'; '.join(details)}")
+    if not lines: lines.append("Menu entries are unchanged.")
+    if result["other_lines"]: lines.append(f"{result['other_lines']} other line(s) of grub.cfg change (timeout, theme, terminal...).")
+    elif not result["changes"]: lines[-1] = "The generated grub.cfg is equivalent to the current one."
+    return "\n".join(lines)
+
+
+def _pos(position):
+    return ">".join(str(p) for p in position)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="grubtamer-dry-run", description="Preview how grub-mkconfig would change the boot menu.")
+    p.add_argument("--config", default=GRUB_PATH, help=f"Settings file to start from (default: {GRUB_PATH}).")
+    p.add_argument("--set", dest="settings", action="append", default=[], metavar="KEY=VALUE", help="Override a setting. Repeatable.")
+    p.add_argument("--current", default=GRUB_CFG_PATH, help=f"grub.cfg to compare against (default: {GRUB_CFG_PATH}).")
+    p.add_argument("--output", help="Also write the generated grub.cfg here.")
+    p.add_argument("--json", action="store_true", help="Print the result as JSON.")
+    args = p.parse_args(argv)
+
+    try:
+        model = GrubConfigFile.load(args.config)
+        for assignment in args.settings:
+            key, sep, value = assignment.partition("=")
+            if not sep: raise ValueError(f"expected KEY=VALUE, got '{assignment}'")
+            model.set(key.strip(), value)
+        result = dry_run(model.render(), read_current(args.current), on_line=lambda l: print(l, end="", file=sys.stderr))
+    except (OSError, ValueError, DryRunError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, 'w') as f: f.write(result["generated"])
+    if args.json: print(json.dumps({k: v for k, v in result.items() if k != "generated"}, indent=2))
+    else: print(format_changes(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
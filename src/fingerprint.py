@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import re
+
+# Fingerprint of everything grub-mkconfig reads, stored next to the config it generated.
+FINGERPRINT_PATH = "/boot/grub/grubtamer.fingerprint"
+GRUB_CFG_PATH = "/boot/grub/grub.cfg"
+GRUB_D_DIR = "/etc/grub.d"
+BOOT_DIR = "/boot"
+KERNEL_PREFIXES = ("vmlinuz", "vmlinux", "kernel", "initrd", "initramfs")
+
+INPUT_LABELS = {
+    "default_grub": "GRUB settings",
+    "grub.d": "/etc/grub.d scripts",
+    "kernels": "kernels/initrds in /boot",
+    "theme": "theme",
+    "grub.cfg": "grub.cfg (regenerated elsewhere)",
+    "forced": "manual regeneration",
+}
+
+
+def _digest(parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def generative_lines(payload):
+    """Returns the payload lines that grub-mkconfig actually consumes.
+
+    grub-mkconfig only exports GRUB_* variables to the /etc/grub.d scripts, so
+    other assignments only matter when a GRUB_* value references them.
+    """
+    assignments = []
+    for line in payload.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#') or '=' not in line: continue
+        key, value = line.split('=', 1)
+        assignments.append((key.strip(), value.strip()))
+
+    referenced = set()
+    for key, value in assignments:
+        if key.startswith("GRUB_"):
+            referenced.update(re.findall(r'\$\{?(\w+)', value))
+
+    return [f"{k}={v}" for k, v in assignments if k.startswith("GRUB_") or k in referenced]
+
+
+def _hash_grub_d(grub_d_dir):
+    parts = []
+    if os.path.isdir(grub_d_dir):
+        for name in sorted(os.listdir(grub_d_dir)):
+            path = os.path.join(grub_d_dir, name)
+            if not os.path.isfile(path): continue
+            st = os.stat(path)
+            # Only executable scripts are run by grub-mkconfig
+            parts += [name, st.st_mode & 0o111 != 0]
+            try:
+                with open(path, 'rb') as f: parts.append(hashlib.sha256(f.read()).hexdigest())
+            except PermissionError:
+                parts += [st.st_size, st.st_mtime_ns]
+    return _digest(parts)
+
+
+def _hash_kernels(boot_dir):
+    parts = []
+    if os.path.isdir(boot_dir):
+        for name in sorted(os.listdir(boot_dir)):
+            if not name.startswith(KERNEL_PREFIXES): continue
+            try: st = os.stat(os.path.join(boot_dir, name))
+            except OSError: continue
+            parts += [name, st.st_size, st.st_mtime_ns]
+    return _digest(parts)
+
+
+def _hash_theme(theme_path, root="/"):
+    # 00_header emits the theme path and a loadfont line for every .pf2 next to it
+    parts = [theme_path or ""]
+    theme_dir = os.path.join(root, os.path.dirname(theme_path).lstrip('/')) if theme_path else ""
+    if theme_dir and os.path.isdir(theme_dir):
+        parts += sorted(n for n in os.listdir(theme_dir) if n.endswith(".pf2"))
+    return _digest(parts)
+
+
+def compute_fingerprint(payload, theme_path, root="/"):
+    """Fingerprints every input that feeds grub-mkconfig. Returns {input: hash}."""
+    def at_root(path): return os.path.join(root, path.lstrip('/'))
+    return {
+        "default_grub": _digest(generative_lines(payload)),
+        "grub.d": _hash_grub_d(at_root(GRUB_D_DIR)),
+        "kernels": _hash_kernels(at_root(BOOT_DIR)),
+        "theme": _hash_theme(theme_path, root),
+    }
+
+
+def load_fingerprint(path=FINGERPRINT_PATH):
+    """Reads the stored fingerprint, or {} if there is none."""
+    try:
+        with open(path, 'r') as f: return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def dump_fingerprint(fingerprint):
+    """Serializes a fingerprint for storage."""
+    return json.dumps(fingerprint, indent=2, sort_keys=True) + "\n"
+
+
+def _regenerated_since(fp_path, cfg_path):
+    # The fingerprint is written right after update-grub, so a newer grub.cfg means
+    # someone else regenerated it and our record no longer describes it.
+    try: return os.stat(cfg_path).st_mtime_ns > os.stat(fp_path).st_mtime_ns
+    except OSError: return True
+
+
+def changed_inputs(stored, current, fp_path=FINGERPRINT_PATH, cfg_path=GRUB_CFG_PATH):
+    """Lists the inputs whose hash differs from the stored fingerprint."""
+    if not stored: return list(current.keys())
+    changed = [k for k, v in current.items() if stored.get(k) != v]
+    if _regenerated_since(fp_path, cfg_path): changed.append("grub.cfg")
+    return changed
+
+
+def describe_inputs(keys):
+    return ", ".join(INPUT_LABELS.get(k, k) for k in keys)
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+from src.system import CACHE_DIR
+from src.theme_parser import iter_components, component_props, FONT_KEYS, FONT_PROPS
+from src.trace import span
+
+FONT_CACHE_DIR = os.path.join(CACHE_DIR, "fonts")
+
+# Aliases fontconfig resolves to whatever the system prefers; any answer matches them
+GENERIC_FAMILIES = {"sans", "sansserif", "serif", "monospace", "mono", "systemui"}
+STYLE_WORDS = {"bold", "italic", "oblique", "light", "medium", "semi-bold", "semibold", "heavy", "black",
+               "condensed", "regular", "book", "normal", "thin", "ultra-light"}
+
+_hash_memo = {}
+
+
+class FontError(Exception):
+    """A font could not be resolved or compiled."""
+
+
+def parse_description(desc):
+    """Splits a Pango description ("DejaVu Sans Bold Italic 12") into (family, [styles], pixel size)."""
+    words = desc.strip('"').split()
+    size = 16
+    if words and re.match(r'^\d+(\.\d+)?(px)?$', words[-1]):
+        size = max(1, round(float(words.pop().rstrip("px"))))
+    styles = []
+    while words and words[-1].lower().rstrip(',') in STYLE_WORDS: styles.insert(0, words.pop().lower().rstrip(','))
+    return " ".join(words).rstrip(',') or "Sans", styles, size
+
+
+def _family_key(family):
+    return re.sub(r'[^a-z0-9]', '', family.lower())
+
+
+def resolve_font_file(desc):
+    """Asks fontconfig which file renders a Pango font description.
+
+    fc-match always answers, falling back to DejaVu; a file of another family counts as not found.
+    """
+    if not shutil.which("fc-match"): raise FontError("fc-match (fontconfig) is not installed")
+    family, styles, _ = parse_description(desc)
+    pattern = family + "".join(f":{s.replace('-', '')}" for s in styles if s not in ("regular", "normal", "book"))
+    argv = ["fc-match", "--format=%{file}\n%{family}", pattern]
+    with span("exec.fc-match", argv=argv) as s:
+        proc = subprocess.run(argv, capture_output=True, text=True)
+        s.set(returncode=proc.returncode)
+    path, _, families = proc.stdout.strip().partition("\n")
+    if proc.returncode != 0 or not os.path.isfile(path): raise FontError(f"no font file found for '{desc}'")
+    if _family_key(family) not in GENERIC_FAMILIES and \
+            _family_key(family) not in {_family_key(f) for f in families.split(",")}:
+        raise FontError(f"'{family}' is not installed (fontconfig offered {families.split(',')[0] or path})")
+    return path
+
+
+def font_file_hash(path):
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    if key not in _hash_memo:
+        with open(path, 'rb') as f: _hash_memo[key] = hashlib.sha256(f.read()).hexdigest()
+    return _hash_memo[key]
+
+
+def pf2_name(path):
+    """Reads the font name GRUB knows a .pf2 file by (its NAME section)."""
+    with open(path, 'rb') as f:
+        while header := f.read(8):
+            if len(header) < 8: break
+            tag, length = header[:4], struct.unpack(">I", header[4:])[0]
+            if tag == b"NAME": return f.read(length).rstrip(b"\0").decode(errors="replace")
+            if tag == b"DATA": break
+            f.seek(length, os.SEEK_CUR)
+    raise FontError(f"{path} has no NAME section")
+
+
+def compile_font(font_file, size):
+    """Compiles font_file at size with grub-mkfont, cached by (file hash, size). Returns the .pf2 path."""
+    digest = font_file_hash(font_file)
+    cached = os.path.join(FONT_CACHE_DIR, f"{digest[:24]}-{size}.pf2")
+    if os.path.exists(cached): return cached
+    mkfont = shutil.which("grub-mkfont") or shutil.which("grub2-mkfont")
+    if not mkfont: raise FontError("grub-mkfont is not installed")
+    os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=FONT_CACHE_DIR, suffix=".pf2")
+    os.close(fd)
+    try:
+        argv = [mkfont, "-s", str(size), "-o", tmp_path, font_file]
+        with span("exec.grub-mkfont", argv=argv) as s:
+            proc = subprocess.run(argv, capture_output=True, text=True)
+            s.set(returncode=proc.returncode)
+        if proc.returncode != 0: raise FontError(f"grub-mkfont failed: {proc.stderr.strip() or proc.returncode}")
+        os.replace(tmp_path, cached)
+    finally:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+    return cached
+
+
+def build_font(desc):
+    """Resolves and compiles a font description. Slow on a cache miss; call it off the main thread.
+
+    Returns {name, pf2, file, inputs}: the exact GRUB font name, the cached .pf2,
+    the filename to install it under in the theme directory, and the cache key.
+    """
+    _, _, size = parse_description(desc)
+    font_file = resolve_font_file(desc)
+    pf2 = compile_font(font_file, size)
+    name = pf2_name(pf2)
+    filename = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_') + ".pf2"
+    return {"name": name, "pf2": pf2, "file": filename,
+            "inputs": {"kind": "font", "font_sha256": font_file_hash(font_file), "size": size}}
+
+
+def installed_font_names(theme_dir):
+    """GRUB names of the .pf2 files in a theme directory, e.g. the Terminus or Unifont a theme ships."""
+    try: entries = os.listdir(theme_dir)
+    except OSError: return set()
+    names = set()
+    for entry in entries:
+        if not entry.endswith(".pf2"): continue
+        try: names.add(pf2_name(os.path.join(theme_dir, entry)))
+        except (OSError, FontError): pass
+    return names
+
+
+def chosen_fonts(data, baseline, theme_dir):
+    """Font descriptions to compile on save: global fonts picked in the editor that the theme doesn't ship.
+
+    Fonts only read from theme.txt are left alone; recompiling them would swap in whatever fontconfig offers.
+    """
+    installed = installed_font_names(theme_dir)
+    return {data[k] for k in FONT_KEYS if data.get(k) and data[k] != baseline.get(k) and data[k] not in installed}
+
+
+def referenced_fonts(data, doc=None):
+    """Font descriptions a theme uses: the global font values plus component font properties."""
+    fonts = {data[k] for k in FONT_KEYS if data.get(k)}
+    if doc is not None:
+        for comp, _ in iter_components(doc):
+            props = component_props(comp)
+            fonts |= {props[p] for p in FONT_PROPS if props.get(p)}
+    return fonts
@@ -0,0 +1,253 @@
+import io
+import json
+import os
+from src.system import CACHE_DIR
+from src.trace import span
+
+GRUB_CFG_PATH = "/boot/grub/grub.cfg"
+CACHE_PATH = os.path.join(CACHE_DIR, "grub_cfg.json")
+CACHE_VERSION = 2
+
+# menuentry/submenu options that take a value; everything else starting with -- is a flag
+VALUE_OPTIONS = {"--class", "--id", "--users", "--hotkey", "--source", "$menuentry_id_option"}
+
+# Commands inside a menuentry that say what it boots
+KERNEL_COMMANDS = {"linux", "linux16", "linuxefi", "multiboot", "multiboot2", "chainloader"}
+INITRD_COMMANDS = {"initrd", "initrd16", "initrdefi", "module2"}
+
+
+def tokenize(stream):
+    """Splits GRUB script into commands in a single pass.
+
+    Yields (words, line_no, offset) for every command, where words have their
+    quotes removed. Handles '...' and "..." strings (including ones spanning
+    lines), backslash escapes, comments and ';' separators.
+    """
+    words, word = [], None
+    quote = None
+    escaped = False
+    cmd_line, cmd_offset = None, 0
+    offset = 0
+
+    for line_no, line in enumerate(stream, 1):
+        for i, ch in enumerate(line):
+            if cmd_line is None and not ch.isspace():
+                cmd_line, cmd_offset = line_no, offset + i
+            if escaped:
+                if ch != '\n': word = (word or "") + ch
+                escaped = False
+            elif quote == "'":
+                if ch == "'": quote = None
+                else: word += ch
+            elif quote == '"':
+                if ch == '"': quote = None
+                elif ch == '\\': escaped = True
+                else: word += ch
+            elif ch == '\\':
+                escaped = True
+            elif ch in "'\"":
+                quote = ch
+                word = word or ""
+            elif ch == '#' and word is None:
+                break  # comment runs to end of line
+            elif ch in " \t\r":
+                if word is not None: words.append(word); word = None
+            elif ch in "\n;":
+                if word is not None: words.append(word); word = None
+                if words: yield words, cmd_line, cmd_offset
+                words, cmd_line = [], None
+            else:
+                word = (word or "") + ch
+        else:
+            offset += len(line)
+            continue
+        # Comment: the rest of the line is dropped but the command ends here
+        offset += len(line)
+        if word is not None: words.append(word); word = None
+        if words: yield words, cmd_line, cmd_offset
+        words, cmd_line = [], None
+
+    if word is not None: words.append(word)
+    if words: yield words, cmd_line, cmd_offset
+
+
+def _parse_header(kind, args, line_no, offset):
+    node = {"type": kind, "title": "", "id": "", "classes": [], "line": line_no, "offset": offset,
+            "end_line": None}
+    if kind == "submenu": node["children"] = []
+    else: node.update(kernel="", cmdline="", initrd=[])
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in VALUE_OPTIONS and i + 1 < len(args):
+            value = args[i + 1]
+            if arg == "--class": node["classes"].append(value)
+            elif arg in ("--id", "$menuentry_id_option"): node["id"] = value
+            i += 2
+            continue
+        if arg.startswith("--"):
+            key, _, value = arg.partition("=")
+            if key == "--class" and value: node["classes"].append(value)
+            elif key == "--id" and value: node["id"] = value
+        elif not node["title"]:
+            node["title"] = arg
+        i += 1
+    return node
+
+
+def parse_grub_cfg(stream):
+    """Builds the menu tree of a grub.cfg from any iterable of lines.
+
+    Returns a list of nodes. Each node is a dict with type ("menuentry" or
+    "submenu"), title, id, classes, line, end_line, offset and path (the
+    titles leading to it, as used by GRUB_DEFAULT). Submenus also carry children;
+    menu entries carry the kernel, its command line and the initrd images they load.
+    """
+    root = []
+    # One stack slot per open '{': the node it belongs to, or None for other blocks
+    stack = []
+    parents = [root]
+
+    for words, line_no, offset in tokenize(stream):
+        head = words[0]
+        if head == "}":
+            if stack:
+                node = stack.pop()
+                if node is not None:
+                    node["end_line"] = line_no
+                    parents.pop()
+            continue
+        if words[-1] != "{":
+            entry = next((n for n in reversed(stack) if n is not None), None)
+            if entry is not None and entry["type"] == "menuentry" and len(words) > 1:
+                if head in KERNEL_COMMANDS: entry.update(kernel=words[1], cmdline=" ".join(words[2:]))
+                elif head in INITRD_COMMANDS: entry["initrd"] = words[1:]
+            continue
+        if head in ("menuentry", "submenu"):
+            node = _parse_header(head, words[1:-1], line_no, offset)
+            path = [n["title"] for n in stack if n is not None]
+            node["path"] = path + [node["title"]]
+            parents[-1].append(node)
+            stack.append(node)
+            parents.append(node.get("children", []))
+        else:
+            stack.append(None)
+    return root
+
+
+def walk(entries, depth=0):
+    """Yields (node, depth) for every node in the tree, depth first."""
+    for node in entries:
+        yield node, depth
+        yield from walk(node.get("children", []), depth + 1)
+
+
+def default_value(node):
+    """The GRUB_DEFAULT string that selects this node ("Submenu>Entry" for nested ones)."""
+    return ">".join(node["path"])
+
+
+def entry_key(node):
+    """Identity of a node across regenerations: its --id, or its title path when it has none."""
+    return node["id"] or default_value(node)
+
+
+def _positions(entries, prefix=()):
+    for i, node in enumerate(entries):
+        yield node, prefix + (i,)
+        yield from _positions(node.get("children", []), prefix + (i,))
+
+
+def diff_entries(old, new):
+    """Structural diff of two menu trees, in the order of the new menu (removed entries last).
+
+    Returns change dicts {change: added|removed|changed, key, type, path, position}.
+    "changed" entries also have fields ({name: (old, new)} for title, kernel,
+    initrd and position) and params_added / params_removed for the kernel command line.
+    """
+    old_nodes = {entry_key(n): (n, pos) for n, pos in _positions(old)}
+    changes, seen = [], set()
+    for node, pos in _positions(new):
+        key = entry_key(node)
+        seen.add(key)
+        base = {"key": key, "type": node["type"], "path": node["path"], "position": list(pos)}
+        if key not in old_nodes:
+            changes.append({"change": "added", **base})
+            continue
+        before, old_pos = old_nodes[key]
+        fields = {f: (before.get(f), node.get(f)) for f in ("title", "kernel", "initrd") if before.get(f) != node.get(f)}
+        if old_pos != pos: fields["position"] = (list(old_pos), list(pos))
+        old_params, new_params = before.get("cmdline", "").split(), node.get("cmdline", "").split()
+        added = [p for p in new_params if p not in old_params]
+        removed = [p for p in old_params if p not in new_params]
+        if fields or added or removed:
+            changes.append({"change": "changed", **base, "fields": fields, "params_added": added, "params_removed": removed})
+    for key, (node, pos) in old_nodes.items():
+        if key not in seen:
+            changes.append({"change": "removed", "key": key, "type": node["type"], "path": node["path"], "position": list(pos)})
+    return changes
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+_memo = {}
+
+
+def load_cached(path=GRUB_CFG_PATH):
+    """Returns the parsed tree if grub.cfg is unchanged since it was cached, else None."""
+    try: key = _stat_key(path)
+    except PermissionError: return None  # /boot/grub not searchable: nothing to check a cache against
+    if _memo.get(path, (None,))[0] == key: return _memo[path][1]
+    try:
+        with open(CACHE_PATH, 'r') as f: cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    entry = cached.get(path) if cached.get("version") == CACHE_VERSION else None
+    if not entry or entry.get("key") != key: return None
+    _memo[path] = (key, entry["entries"])
+    return entry["entries"]
+
+
+def store_cached(entries, key, path=GRUB_CFG_PATH):
+    _memo[path] = (key, entries)
+    try:
+        try:
+            with open(CACHE_PATH, 'r') as f: cached = json.load(f)
+            if cached.get("version") != CACHE_VERSION: cached = {}
+        except (OSError, ValueError):
+            cached = {}
+        cached["version"] = CACHE_VERSION
+        cached[path] = {"key": key, "entries": entries}
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = CACHE_PATH + ".tmp"
+        with open(tmp_path, 'w') as f: json.dump(cached, f)
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError as e:
+        print(f"Could not write grub.cfg cache: {e}")
+
+
+def load_entries(path=GRUB_CFG_PATH, read_privileged=None):
+    """Returns the menu tree of grub.cfg, parsing it only when (inode, size, mtime) changed.
+
+    read_privileged(path) -> str is used when the file is not readable by us.
+    """
+    with span("parse.grub_cfg", path=path) as s:
+        entries = load_cached(path)
+        s.set(cached=entries is not None)
+        if entries is not None: return entries
+        try:
+            key = _stat_key(path)
+            with open(path, 'r', errors='replace') as f: entries = parse_grub_cfg(f)
+        except PermissionError:
+            if read_privileged is None: raise
+            key = None
+            entries = parse_grub_cfg(io.StringIO(read_privileged(path)))
+        s.set(entries=len(entries))
+        # Only cache what we parsed if grub.cfg wasn't rewritten meanwhile, or it would pass for the new file
+        try: current = _stat_key(path)
+        except OSError: current = None
+        if key is not None and current == key: store_cached(entries, key, path)
+        return entries
@@ -0,0 +1,516 @@
+"""Long-lived privileged helper.
+
+The GUI starts this file once per session through pkexec and then talks to it over
+stdin/stdout with one JSON object per line:
+
+    -> {"id": 1, "ops": [{"op": "mkdir", "path": "/boot/grub/themes/X"}, ...]}
+    <- {"id": 1, "line": "Generating grub configuration file ..."}   (update_grub only)
+    <- {"id": 1, "ok": true, "results": [{...}, ...]}
+    -> {"cancel": true}                                 (aborts a running update_grub / mkconfig_dry_run)
+
+A request with "trace": true (sent while tracing is on in the GUI) gets the helper's
+own timing spans back in a "spans" list, for the GUI's trace (see src/trace.py).
+
+The ops of one request run in order and stop at the first failure, like a `&&` chain.
+A request with "transaction": true is all-or-nothing instead: each run of consecutive
+file ops is staged, fsynced and renamed into place together, commands (update_grub...)
+run where they appear, and any failure puts every touched file back as it was. File
+ops listed after update_grub (the fingerprint) therefore land only once it succeeded.
+"""
+import base64
+import json
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+
+HELPER_PATH = os.path.abspath(__file__)
+
+if __name__ == "__main__":
+    # Started as a script by pkexec: make the src package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(HELPER_PATH)))
+
+from src.parser import apply_patch
+from src.trace import span, enable, enabled, clear, recent, add_spans
+
+
+class HelperError(Exception):
+    """A privileged request failed or authentication was refused.
+
+    rolled_back is True when a transaction had started and every file was put back.
+    """
+    def __init__(self, message, returncode=1, rolled_back=False):
+        super().__init__(message)
+        self.returncode = returncode
+        self.rolled_back = rolled_back
+
+
+# --- SERVER (runs as root) ---
+
+def write_atomic(path, data, mode=None, if_missing=False):
+    """Writes bytes to a temp file next to path, fsyncs it and renames it into place."""
+    if if_missing and os.path.exists(path): return {"skipped": True}
+    if mode is None:
+        try: mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError: mode = 0o644
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".grubtamer-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+    return {"bytes": len(data)}
+
+
+def _op_data(op):
+    if "data_b64" in op: return base64.b64decode(op["data_b64"])
+    return op.get("content", "").encode()
+
+
+def _run_update_grub(send, cancel):
+    argv = ["update-grub"] if shutil.which("update-grub") else ["grub-mkconfig", "-o", "/boot/grub/grub.cfg"]
+    proc = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, bufsize=1, start_new_session=True)
+
+    def watch_cancel():
+        while proc.poll() is None:
+            if cancel.wait(0.2):
+                try: os.killpg(proc.pid, signal.SIGTERM)
+                except ProcessLookupError: pass
+                return
+
+    threading.Thread(target=watch_cancel, daemon=True).start()
+    with span(f"exec.{argv[0]}", argv=argv) as s:
+        for line in proc.stdout: send(line)
+        returncode = proc.wait()
+        s.set(returncode=returncode)
+    if cancel.is_set(): raise HelperError("update-grub cancelled", returncode or -signal.SIGTERM)
+    if returncode != 0: raise HelperError(f"{argv[0]} exited with status {returncode}", returncode)
+    return {"returncode": returncode}
+
+
+def run_traced(op, send, cancel):
+    with span(f"helper.{op.get('op')}", path=op.get("path") or op.get("dest")):
+        return run_op(op, send, cancel)
+
+
+def run_op(op, send, cancel):
+    """Executes a single operation and returns its result dict."""
+    name = op.get("op")
+    if name == "read":
+        with open(op["path"], 'rb') as f: data = f.read()
+        if op.get("binary"): return {"data_b64": base64.b64encode(data).decode()}
+        return {"content": data.decode(errors="replace")}
+    if name == "write_atomic":
+        return write_atomic(op["path"], _op_data(op), op.get("mode"), op.get("if_missing", False))
+    if name == "patch":
+        try:
+            with open(op["path"], 'r') as f: lines = f.read().splitlines(keepends=True)
+        except FileNotFoundError:
+            lines = []
+        try: lines = apply_patch(lines, op["edits"])
+        except ValueError as e: raise HelperError(f"{op['path']}: {e}")
+        return write_atomic(op["path"], "".join(lines).encode(), op.get("mode"))
+    if name == "mkdir":
+        os.makedirs(op["path"], mode=op.get("mode", 0o755), exist_ok=True)
+        return {}
+    if name == "remove":
+        try: os.remove(op["path"])
+        except FileNotFoundError: pass
+        return {}
+    if name == "chmod":
+        os.chmod(op["path"], op["mode"])
+        return {}
+    if name == "copy":
+        with open(op["src"], 'rb') as f: data = f.read()
+        return write_atomic(op["dest"], data, op.get("mode"))
+    if name == "update_grub":
+        return _run_update_grub(send, cancel)
+    if name == "mkconfig_dry_run":
+        # Same sandbox as the unprivileged dry run, but able to probe devices. Writes nothing outside a temp dir.
+        from src.dry_run import run_mkconfig, DryRunError
+        try: return {"content": run_mkconfig(op["content"], send, cancel, unprivileged=False)}
+        except DryRunError as e: raise HelperError(str(e), e.returncode)
+    if name == "snapshot":
+        from src.backup_store import create_snapshot
+        manifest = create_snapshot(op["roots"], op.get("label", ""))
+        return {"id": manifest["id"], "files": len(manifest["files"]), "new_objects": manifest["new_objects"],
+                "new_bytes": manifest["new_bytes"]}
+    if name == "restore_snapshot":
+        return _restore_snapshot(op["id"])
+    if name == "ping":
+        return {"uid": os.getuid()}
+    raise HelperError(f"Unknown operation: {name}")
+
+
+# --- Transactions ---
+
+FILE_OPS = {"write_atomic", "patch", "copy", "remove", "chmod", "mkdir"}
+
+
+class Transaction:
+    """Stages file ops in memory, swaps them in with atomic renames and can undo the swap."""
+
+    def __init__(self):
+        self.files = {}          # path -> {"data": bytes, or None to remove, "mode": int or None}
+        self.new_dirs = []
+        self.undo = []           # (path, original bytes or None, original mode), in commit order
+
+    def _current(self, path):
+        if path in self.files: return self.files[path]["data"]
+        try:
+            with open(path, 'rb') as f: return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, path, data, mode=None):
+        previous = self.files.get(path, {})
+        self.files[path] = {"data": data, "mode": mode if mode is not None else previous.get("mode")}
+
+    def stage(self, op):
+        """Records the effect of a file op without touching the target. Returns the op's result."""
+        name, path = op["op"], op.get("path")
+        if name == "mkdir":
+            # Directories are created now: temp files have to live next to their targets
+            missing = []
+            d = path
+            while d and not os.path.isdir(d): missing.insert(0, d); d = os.path.dirname(d)
+            for d in missing:
+                os.mkdir(d, op.get("mode", 0o755))
+                self.new_dirs.append(d)
+            return {}
+        if name == "write_atomic":
+            if op.get("if_missing") and self._current(path) is not None: return {"skipped": True}
+            data = _op_data(op)
+            self.put(path, data, op.get("mode"))
+            return {"bytes": len(data)}
+        if name == "patch":
+            current = self._current(path)
+            lines = current.decode().splitlines(keepends=True) if current is not None else []
+            try: lines = apply_patch(lines, op["edits"])
+            except ValueError as e: raise HelperError(f"{path}: {e}")
+            data = "".join(lines).encode()
+            self.put(path, data, op.get("mode"))
+            return {"bytes": len(data)}
+        if name == "copy":
+            data = self._current(op["src"])
+            if data is None: raise HelperError(f"{op['src']}: no such file")
+            self.put(op["dest"], data, op.get("mode"))
+            return {"bytes": len(data)}
+        if name == "remove":
+            self.put(path, None)
+            return {}
+        if name == "chmod":
+            data = self._current(path)
+            if data is None: raise HelperError(f"{path}: no such file")
+            self.put(path, data, op["mode"])
+            return {}
+        raise HelperError(f"Not a file operation: {name}")
+
+    def commit(self):
+        """Writes and fsyncs every staged file, then renames them all into place."""
+        prepared = []
+        try:
+            for path, staged in self.files.items():
+                if staged["data"] is None: continue
+                mode = staged["mode"]
+                if mode is None:
+                    try: mode = os.stat(path).st_mode & 0o7777
+                    except FileNotFoundError: mode = 0o644
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".grubtamer-")
+                prepared.append(tmp_path)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(staged["data"])
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp_path, mode)
+            # Nothing has been replaced yet; from here on every step is a rename or unlink
+            tmp_paths = iter(prepared)
+            for path, staged in self.files.items():
+                try: original = (self._read_original(path), os.stat(path).st_mode & 0o7777)
+                except FileNotFoundError: original = (None, None)
+                if staged["data"] is None:
+                    if original[0] is None: continue
+                    self.undo.append((path, *original))
+                    os.remove(path)
+                else:
+                    self.undo.append((path, *original))
+                    os.replace(next(tmp_paths), path)
+            for d in {os.path.dirname(p) for p in self.files}: _fsync_dir(d)
+        finally:
+            for tmp_path in prepared:
+                if os.path.exists(tmp_path): os.remove(tmp_path)
+
+    @staticmethod
+    def _read_original(path):
+        with open(path, 'rb') as f: return f.read()
+
+    def rollback(self):
+        """Restores every file the commit replaced or removed and drops directories it created."""
+        for path, data, mode in reversed(self.undo):
+            try:
+                if data is None: os.remove(path)
+                else: write_atomic(path, data, mode)
+            except OSError as e:
+                print(f"Rollback of {path} failed: {e}", file=sys.stderr)
+        for d in reversed(self.new_dirs):
+            try: os.rmdir(d)
+            except OSError: pass
+        self.undo = []
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try: os.fsync(fd)
+    finally: os.close(fd)
+
+
+def run_transaction(ops, send, cancel):
+    """Runs ops in request order, committing each run of consecutive file ops together.
+
+    Commands run between the commits, so file ops after update_grub are only written
+    once it succeeded. Any failure, including a failed or cancelled update_grub, rolls
+    back every file committed so far. Results come back in request order.
+    """
+    txns = []
+    results = [None] * len(ops)
+
+    def rollback():
+        with span("helper.rollback", files=lambda: sum(len(t.undo) for t in txns)):
+            for txn in reversed(txns): txn.rollback()
+
+    try:
+        i = 0
+        while i < len(ops):
+            if ops[i].get("op") not in FILE_OPS:
+                results[i] = run_traced(ops[i], send, cancel)
+                i += 1
+                continue
+            txn = Transaction()
+            txns.append(txn)
+            with span("helper.stage") as s:
+                start = i
+                while i < len(ops) and ops[i].get("op") in FILE_OPS:
+                    results[i] = txn.stage(ops[i])
+                    i += 1
+                s.set(ops=i - start)
+            with span("helper.commit", files=len(txn.files)): txn.commit()
+    except HelperError as e:
+        rollback()
+        raise HelperError(f"{e}; all changes were rolled back", e.returncode, rolled_back=True)
+    except Exception as e:
+        rollback()
+        raise HelperError(f"{type(e).__name__}: {e}; all changes were rolled back", rolled_back=True)
+    except BaseException:
+        rollback()
+        raise
+    return results
+
+
+def _restore_snapshot(snap_id):
+    """Puts a snapshot's files back in one transaction, after snapshotting the current state."""
+    from src.backup_store import create_snapshot, load_snapshot, restore_plan
+    roots = load_snapshot(snap_id)["roots"]
+    # Restoring is itself undoable: the state it replaces becomes the newest snapshot
+    safety = create_snapshot(roots, f"Before restoring {snap_id}")
+    writes, removes = restore_plan(snap_id)
+    txn = Transaction()
+    try:
+        for path, (data, mode) in writes.items():
+            txn.stage({"op": "mkdir", "path": os.path.dirname(path)})
+            txn.put(path, data, mode)
+        for path in removes: txn.put(path, None)
+        txn.commit()
+    except BaseException:
+        txn.rollback()
+        raise
+    return {"written": sorted(writes), "removed": sorted(removes), "safety_snapshot": safety["id"]}
+
+
+def serve():
+    out_lock = threading.Lock()
+    requests = queue.Queue()
+    cancel = threading.Event()
+    # A cancel names its request id: it can arrive before the request it aborts, e.g. when
+    # the user pressed Cancel while pkexec was still asking for the password
+    state_lock = threading.Lock()
+    state = {"current": None, "cancelled": set()}
+
+    def emit(msg):
+        with out_lock:
+            sys.stdout.write(json.dumps(msg) + "\n")
+            sys.stdout.flush()
+
+    def reader():
+        for raw in sys.stdin:
+            try: msg = json.loads(raw)
+            except ValueError: continue
+            if not msg.get("cancel"):
+                requests.put(msg)
+                continue
+            with state_lock:
+                if msg.get("id") is not None: state["cancelled"].add(msg["id"])
+                if msg.get("id") in (None, state["current"]): cancel.set()
+        # The GUI went away: abort whatever is running and exit
+        cancel.set()
+        requests.put(None)
+
+    threading.Thread(target=reader, daemon=True).start()
+    emit({"ready": True})
+
+    while (msg := requests.get()) is not None:
+        req_id = msg.get("id")
+        with state_lock:
+            state["current"] = req_id
+            if req_id in state["cancelled"]: cancel.set()
+            else: cancel.clear()
+        results = []
+        # Spans are collected per request and sent back with the reply
+        enable(msg.get("trace", False))
+        clear()
+
+        def reply(**fields):
+            emit({"id": req_id, **fields, **({"spans": recent()} if enabled() else {})})
+
+        try:
+            send = lambda line: emit({"id": req_id, "line": line})
+            if cancel.is_set(): raise HelperError("Cancelled before it started", -signal.SIGTERM)
+            if msg.get("transaction"): results = run_transaction(msg.get("ops", []), send, cancel)
+            else:
+                for op in msg.get("ops", []): results.append(run_traced(op, send, cancel))
+            reply(ok=True, results=results)
+        except HelperError as e:
+            reply(ok=False, error=str(e), returncode=e.returncode, rolled_back=e.rolled_back, results=results)
+        except Exception as e:
+            reply(ok=False, error=f"{type(e).__name__}: {e}", returncode=1, results=results)
+
+
+# --- CLIENT (runs in the GUI) ---
+
+class PrivilegedHelper:
+    """Client side of the helper. Authenticates once, then every request is a pipe round trip."""
+
+    def __init__(self):
+        self.proc = None
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.next_id = 1
+        self.current_id = None
+        self.cancelled_id = None
+
+    def is_running(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        if self.is_running(): return
+        argv = ["pkexec", sys.executable, HELPER_PATH]
+        # Mostly time spent in the polkit prompt
+        with span("exec.pkexec", argv=argv) as s:
+            self.proc = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+            # The first line only arrives once polkit let us through
+            line = self.proc.stdout.readline()
+            if not line:
+                returncode = self.proc.wait()
+                self.proc = None
+                s.set(returncode=returncode)
+                raise HelperError("Authentication cancelled", returncode)
+
+    def _send(self, msg):
+        with self.write_lock:
+            self.proc.stdin.write(json.dumps(msg) + "\n")
+            self.proc.stdin.flush()
+
+    def request(self, ops, on_line=None, transaction=False):
+        """Runs a batch of operations as root and returns their results.
+
+        With transaction=True the batch is all-or-nothing (see run_transaction).
+        """
+        with self.lock, span("helper.request", ops=lambda: [op.get("op") for op in ops], transaction=transaction):
+            req_id = self.next_id
+            self.next_id += 1
+            self.current_id = req_id
+            self.start()
+            # Cancel pressed during the polkit prompt: don't send the request at all
+            if self.cancelled_id == req_id: raise HelperError("Cancelled", -signal.SIGTERM)
+            request = {"id": req_id, "ops": ops, "transaction": transaction}
+            if enabled(): request["trace"] = True
+            try:
+                self._send(request)
+                while True:
+                    line = self.proc.stdout.readline()
+                    if not line: raise HelperError("Privileged helper exited unexpectedly")
+                    msg = json.loads(line)
+                    if msg.get("id") != req_id: continue
+                    if "line" in msg:
+                        if on_line: on_line(msg["line"])
+                        continue
+                    if msg.get("spans"): add_spans(msg["spans"])
+                    if not msg.get("ok"):
+                        raise HelperError(msg.get("error", "Unknown error"), msg.get("returncode", 1),
+                                          msg.get("rolled_back", False))
+                    return msg["results"]
+            except (BrokenPipeError, ValueError) as e:
+                self.proc = None
+                raise HelperError(f"Privileged helper failed: {e}")
+
+    def call(self, op, **kwargs):
+        return self.request([dict(op=op, **kwargs)])[0]
+
+    def cancel(self):
+        """Aborts the current request, also one still waiting for authentication. Safe to call from any thread."""
+        req_id = self.cancelled_id = self.current_id
+        if self.is_running():
+            try: self._send({"cancel": True, "id": req_id})
+            except BrokenPipeError: pass
+
+    def stop(self):
+        if self.is_running():
+            self.proc.stdin.close()
+            self.proc.wait()
+        self.proc = None
+
+
+_helper = None
+
+
+def get_helper():
+    """Returns the session-wide helper. It is started (and authenticated) on first request."""
+    global _helper
+    if _helper is None: _helper = PrivilegedHelper()
+    return _helper
+
+
+# Op builders so callers don't spell out dicts everywhere
+def op_read(path): return {"op": "read", "path": path}
+def op_mkdir(path): return {"op": "mkdir", "path": path}
+def op_chmod(path, mode): return {"op": "chmod", "path": path, "mode": mode}
+def op_remove(path): return {"op": "remove", "path": path}
+def op_copy(src, dest, mode=None): return {"op": "copy", "src": src, "dest": dest, "mode": mode}
+def op_update_grub(): return {"op": "update_grub"}
+def op_mkconfig_dry_run(content): return {"op": "mkconfig_dry_run", "content": content}
+def op_snapshot(roots, label=""): return {"op": "snapshot", "roots": roots, "label": label}
+def op_restore_snapshot(snap_id): return {"op": "restore_snapshot", "id": snap_id}
+def op_patch(path, edits): return {"op": "patch", "path": path, "edits": edits}
+
+
+def op_write(path, content, mode=None, if_missing=False):
+    op = {"op": "write_atomic", "path": path, "mode": mode, "if_missing": if_missing}
+    if isinstance(content, bytes): op["data_b64"] = base64.b64encode(content).decode()
+    else: op["content"] = content
+    return op
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,95 @@
+"""Prepares background images for GRUB: downscale to the boot resolution, re-encode, drop metadata.
+
+    python3 -m src.image_import wallpaper.jpg out.jpg --size 1920x1080
+
+Uses GdkPixbuf only, so it works without a display (and from worker threads).
+"""
+import argparse
+import os
+import sys
+import time
+import gi
+
+gi.require_version('GdkPixbuf', '2.0')
+# noinspection PyUnresolvedReferences
+from gi.repository import GdkPixbuf, GLib
+
+DEFAULT_IMPORT_SIZE = (1920, 1080)
+JPEG_QUALITY = "90"
+PNG_COMPRESSION = "9"
+
+
+def fit_size(width, height, target_w, target_h):
+    """Smallest size that still covers the target while keeping the aspect ratio. Never upscales."""
+    scale = max(target_w / width, target_h / height)
+    if scale >= 1: return width, height
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def import_image(source_path, size=DEFAULT_IMPORT_SIZE):
+    """Decodes, downscales and re-encodes an image for use as desktop-image.
+
+    Photos stay JPEG (re-encoded as baseline, which GRUB's decoder needs); anything
+    else becomes PNG. Nothing but pixels is written, so EXIF, ICC profiles and
+    text chunks are gone. Returns {data, ext, before, after, source_size, size, seconds}.
+    """
+    started = time.monotonic()
+    before = os.path.getsize(source_path)
+    info = GdkPixbuf.Pixbuf.get_file_info(source_path)
+    src_format = info[0].get_name() if info and info[0] else ""
+
+    pixbuf = GdkPixbuf.Pixbuf.new_from_file(source_path)
+    # Bake in the EXIF rotation before the EXIF data is dropped
+    pixbuf = pixbuf.apply_embedded_orientation() or pixbuf
+    width, height = pixbuf.get_width(), pixbuf.get_height()
+    new_w, new_h = fit_size(width, height, *size)
+    if (new_w, new_h) != (width, height):
+        pixbuf = pixbuf.scale_simple(new_w, new_h, GdkPixbuf.InterpType.HYPER)
+
+    if src_format == "jpeg" and not pixbuf.get_has_alpha():
+        ext, ok, data = "jpg", *pixbuf.save_to_bufferv("jpeg", ["quality"], [JPEG_QUALITY])
+    else:
+        ext, ok, data = "png", *pixbuf.save_to_bufferv("png", ["compression"], [PNG_COMPRESSION])
+    if not ok: raise ValueError(f"could not encode {source_path}")
+
+    # A small, already optimized PNG can only grow by re-encoding: keep the original bytes then
+    if src_format == "png" and (new_w, new_h) == (width, height) and len(data) >= before:
+        with open(source_path, 'rb') as f: data = f.read()
+
+    return {"data": data, "ext": ext, "before": before, "after": len(data), "source_size": (width, height),
+            "size": (new_w, new_h), "seconds": round(time.monotonic() - started, 3)}
+
+
+def describe_import(result):
+    """Human readable summary, e.g. "7680x4320 → 1920x1080, 21.4 MB → 612.3 kB"."""
+    sizes = f"{GLib.format_size(result['before'])} → {GLib.format_size(result['after'])}"
+    if result["source_size"] == result["size"]: return sizes
+    (sw, sh), (w, h) = result["source_size"], result["size"]
+    return f"{sw}x{sh} → {w}x{h}, {sizes}"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="grubtamer-import-image", description="Prepare an image as a GRUB background.")
+    p.add_argument("source")
+    p.add_argument("output", nargs="?", help="Output file (default: <source name>.<png|jpg> in the current directory).")
+    p.add_argument("--size", default="x".join(map(str, DEFAULT_IMPORT_SIZE)), help="Target resolution, e.g. 1920x1080.")
+    args = p.parse_args(argv)
+    try:
+        size = tuple(int(v) for v in args.size.lower().split('x'))
+        if len(size) != 2: raise ValueError
+    except ValueError:
+        print(f"Invalid --size '{args.size}'", file=sys.stderr)
+        return 2
+
+    try: result = import_image(args.source, size)
+    except (GLib.Error, OSError, ValueError) as e:
+        print(f"Error: {getattr(e, 'message', e)}", file=sys.stderr)
+        return 1
+    output = args.output or os.path.splitext(os.path.basename(args.source))[0] + "." + result["ext"]
+    with open(output, 'wb') as f: f.write(result["data"])
+    print(f"{output}: {describe_import(result)} ({result['seconds']}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import json
+import os
+import re
+
+# Documented GRUB_* keys for "Add Command" and the extra rows, loaded on first use
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "grub_options.json")
+
+# Field weights: a hit in the key beats one in the label, which beats one in the description
+FIELD_WEIGHTS = {"key": 3, "label": 2, "desc": 1}
+EXACT_BONUS = 100
+SUBSTRING_BONUS = 40
+# Fraction of a term's trigrams a key/label word must share to count as a fuzzy (typo) match
+FUZZY_THRESHOLD = 0.5
+
+_catalog = None
+_index = None
+
+
+def load_catalog():
+    """Returns {key: {label, desc, type, example?, values?}}, reading the data file once."""
+    global _catalog
+    if _catalog is None:
+        try:
+            with open(CATALOG_PATH, 'r') as f: _catalog = json.load(f)["options"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading option catalog: {e}")
+            _catalog = {}
+    return _catalog
+
+
+def get_option(key):
+    return load_catalog().get(key)
+
+
+def _words(text):
+    return [w for w in re.split(r'[^a-z0-9]+', text.lower()) if w]
+
+
+def _trigrams(word):
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class OptionIndex:
+    """Prefix and trigram index over option keys, labels and descriptions.
+
+    Every word of every field is registered under all of its prefixes, so a
+    lookup per query term is a single dict access. Key and label words are
+    also indexed by trigram to catch typos ("timout", "distrbutor").
+    """
+    def __init__(self, catalog):
+        self.order = {key: i for i, key in enumerate(catalog)}
+        self.prefixes = {}
+        self.trigrams = {}
+        for key, data in catalog.items():
+            name = key[5:] if key.startswith("GRUB_") else key
+            fields = {"key": _words(name), "label": _words(data.get("label", "")), "desc": _words(data.get("desc", ""))}
+            for field, words in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for word in words:
+                    for n in range(1, len(word) + 1):
+                        hits = self.prefixes.setdefault(word[:n], {})
+                        hits[key] = max(hits.get(key, 0), weight * (2 if n == len(word) else 1))
+            for word in fields["key"] + fields["label"]:
+                for gram in _trigrams(word): self.trigrams.setdefault(gram, set()).add(key)
+
+    def _term_scores(self, term):
+        scores = {key: weight * 10 for key, weight in self.prefixes.get(term, {}).items()}
+        if len(term) >= 3:
+            grams = _trigrams(term)
+            counts = {}
+            for gram in grams:
+                for key in self.trigrams.get(gram, ()): counts[key] = counts.get(key, 0) + 1
+            for key, count in counts.items():
+                similarity = count / len(grams)
+                if key not in scores and similarity >= FUZZY_THRESHOLD: scores[key] = similarity * 10
+        return scores
+
+    def rank(self, query):
+        """Returns {key: score} for keys matching every term of query, or None for an empty query."""
+        terms = _words(query)
+        if not terms: return None
+        # Keys are indexed without their GRUB_ prefix
+        if terms[0] == "grub" and len(terms) > 1: terms = terms[1:]
+        ranks = None
+        for term in terms:
+            scores = self._term_scores(term)
+            ranks = scores if ranks is None else {k: ranks[k] + s for k, s in scores.items() if k in ranks}
+            if not ranks: return {}
+        # Typing (part of) a key verbatim should put that key first
+        compact = "_".join(terms).upper()
+        for key in ranks:
+            if key == compact or key == "GRUB_" + compact: ranks[key] += EXACT_BONUS
+            elif compact in key: ranks[key] += SUBSTRING_BONUS
+        return ranks
+
+    def search(self, query):
+        """Matching keys, best first; every key in catalog order for an empty query."""
+        ranks = self.rank(query)
+        if ranks is None: return list(self.order)
+        return sorted(ranks, key=lambda k: (-ranks[k], self.order[k]))
+
+
+def search_index():
+    global _index
+    if _index is None: _index = OptionIndex(load_catalog())
+    return _index
@@ -1,43 +1,208 @@
+import difflib
 import os
+import re
+from src.trace import span
 GRUB_PATH = "/etc/default/grub"
 
-def read_grub_config():
+# KEY=value, optionally behind "export" and/or a comment marker (commented-out defaults)
+ASSIGNMENT_RE = re.compile(r'^(?P<indent>\s*)(?P<comment>#\s*)?(?P<export>export\s+)?(?P<key>[A-Za-z_][A-Za-z0-9_]*)=(?P<rest>.*)$')
+BARE_VALUE_RE = re.compile(r'^[\w./:,+@%-]*$')
+
+
+def _split_value(rest):
+    """Splits the text after '=' into (raw value, unquoted value, quote char, trailing text)."""
+    if rest[:1] in ('"', "'"):
+        quote = rest[0]
+        i, chars = 1, []
+        while i < len(rest):
+            ch = rest[i]
+            if ch == quote: break
+            if quote == '"' and ch == '\\' and i + 1 < len(rest) and rest[i + 1] in '"\\$`':
+                i += 1
+                ch = rest[i]
+            chars.append(ch)
+            i += 1
+        return rest[:i + 1], "".join(chars), quote, rest[i + 1:]
+    # Unquoted shell word: runs to the first blank outside `...`, $(...) and embedded quotes
+    i, depth, inner = 0, 0, None
+    while i < len(rest):
+        ch = rest[i]
+        if inner:
+            if ch == inner: inner = None
+        elif ch in '"\'`':
+            inner = ch
+        elif rest.startswith('$(', i):
+            depth += 1
+            i += 1
+        elif ch == ')' and depth:
+            depth -= 1
+        elif ch in ' \t' and not depth:
+            break
+        i += 1
+    return rest[:i], rest[:i], "", rest[i:]
+
+
+def format_value(value, quote=None):
+    """Quotes a value for /etc/default/grub, reusing the line's original quote style when possible."""
+    value = str(value)
+    if quote == "'" and "'" not in value: return f"'{value}'"
+    if quote == "" and value and BARE_VALUE_RE.match(value): return value
+    if quote is None and value.isdigit(): return value
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class GrubConfigFile:
+    """Concrete-syntax model of /etc/default/grub.
+
+    Every line (comments, blank lines, ordering, quoting) is kept as-is. set() and
+    remove() only touch the lines of the keys they change, so an unchanged file
+    renders byte-identical and patch() describes just the edited lines.
+    """
+
+    def __init__(self, text=""):
+        self.original = text.splitlines(keepends=True)
+        self.lines = list(self.original)
+        self.changed_keys = set()
+
+    @classmethod
+    def load(cls, path=GRUB_PATH):
+        with span("parse.default_grub", path=path):
+            with open(path, 'r') as f: return cls(f.read())
+
+    @staticmethod
+    def parse_line(line):
+        """Returns {key, value, quote, commented} for an assignment line, else None."""
+        m = ASSIGNMENT_RE.match(line.rstrip('\n'))
+        if not m: return None
+        _, value, quote, _ = _split_value(m.group('rest'))
+        return {"key": m.group('key'), "value": value, "quote": quote, "commented": bool(m.group('comment'))}
+
+    def _find(self, key, commented=False):
+        # Like the shell sourcing the file, the last assignment wins
+        for i in range(len(self.lines) - 1, -1, -1):
+            parsed = self.parse_line(self.lines[i])
+            if parsed and parsed["key"] == key and parsed["commented"] == commented: return i
+        return None
+
+    def settings(self):
+        """Returns the active assignments as a dict, in file order."""
+        settings = {}
+        for line in self.lines:
+            parsed = self.parse_line(line)
+            if parsed and not parsed["commented"]:
+                settings.pop(parsed["key"], None)
+                settings[parsed["key"]] = parsed["value"]
+        return settings
+
+    def get(self, key, default=None):
+        return self.settings().get(key, default)
+
+    def set(self, key, value):
+        value = str(value)
+        idx = self._find(key)
+        if idx is not None:
+            m = ASSIGNMENT_RE.match(self.lines[idx].rstrip('\n'))
+            raw, old_value, quote, trailing = _split_value(m.group('rest'))
+            if old_value == value: return
+            newline = "\n" if self.lines[idx].endswith("\n") else ""
+            prefix = m.group('indent') + (m.group('export') or "")
+            self.lines[idx] = f"{prefix}{key}={format_value(value, quote)}{trailing}{newline}"
+        else:
+            new_line = f"{key}={format_value(value)}\n"
+            commented_idx = self._find(key, commented=True)
+            if commented_idx is not None:
+                # Put it right below the distro's commented-out default
+                self.lines.insert(commented_idx + 1, new_line)
+            else:
+                if self.lines and not self.lines[-1].endswith("\n"): self.lines[-1] += "\n"
+                self.lines.append(new_line)
+        self.changed_keys.add(key)
+
+    def remove(self, key):
+        while (idx := self._find(key)) is not None:
+            del self.lines[idx]
+            self.changed_keys.add(key)
+
+    def update(self, settings):
+        """Applies a settings dict. Missing keys are removed; empty values are only
+        written for keys the file already has, so cleared new fields add nothing."""
+        current = self.settings()
+        for key in current:
+            if key not in settings: self.remove(key)
+        for key, value in settings.items():
+            if str(value).strip(): self.set(key, value)
+            elif key in current: self.set(key, "")
+
+    def render(self):
+        return "".join(self.lines)
+
+    def is_dirty(self):
+        return self.lines != self.original
+
+    def patch(self):
+        """Line-level edits turning the original file into the current one.
+
+        Each edit is {"start", "end", "old", "new"} over original line indices and
+        can be applied in reverse order after checking the old lines still match.
+        """
+        matcher = difflib.SequenceMatcher(None, self.original, self.lines, autojunk=False)
+        return [{"start": i1, "end": i2, "old": self.original[i1:i2], "new": self.lines[j1:j2]}
+                for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+    def commit(self):
+        """Marks the current state as what is on disk."""
+        self.original = list(self.lines)
+        self.changed_keys.clear()
+
+
+def apply_patch(lines, edits):
+    """Applies GrubConfigFile.patch() edits to a list of lines. Raises ValueError on conflicts."""
+    lines = list(lines)
+    for edit in sorted(edits, key=lambda e: e["start"], reverse=True):
+        if lines[edit["start"]:edit["end"]] != edit["old"]:
+            raise ValueError(f"line {edit['start'] + 1} changed on disk since it was read")
+        lines[edit["start"]:edit["end"]] = edit["new"]
+    return lines
+
+
+def changed_settings(old, new):
+    """Keys whose value differs between two settings dicts, mapped to the new value (None if removed)."""
+    return {key: new.get(key) for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+
+
+def read_grub_config(path=GRUB_PATH):
     """Reads the GRUB config file and returns a dictionary of settings."""
-    settings = {}
     try:
-        with open(GRUB_PATH, 'r') as f:
-            for line in f:
-                line = line.strip()
-                # Skip comments and empty lines
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    # Clean up quotes from values
-                    settings[key.strip()] = value.strip().strip('"').strip("'")
-        return settings
+        return GrubConfigFile.load(path).settings()
     except FileNotFoundError:
         return {"error": "GRUB configuration file not found."}
     except PermissionError:
         return {"error": "Permission denied. Please run with elevated privileges."}
 
+
+def render_grub_config(settings, base_text=""):
+    """Renders a settings dict into the /etc/default/grub payload written on Save.
+
+    Lines of base_text that the settings don't touch are kept verbatim.
+    """
+    model = GrubConfigFile(base_text)
+    model.update(settings)
+    return model.render()
+
+
 if __name__ == "__main__":
     # Quick test
     print(read_grub_config())
 
-def save_grub_config(settings_dict):
-    """Writes the dictionary back to /etc/default/grub."""
+def save_grub_config(settings_dict, path=GRUB_PATH):
+    """Writes the dictionary back to /etc/default/grub, preserving comments and untouched lines."""
     try:
-        # It's best practice to read the file first to preserve comments,
-        # but for this iteration, we will write a clean key-value file.
-        with open(GRUB_PATH, 'w') as f:
-            for key, value in settings_dict.items():
-                # Ensure values with spaces are quoted
-                if " " in str(value) or not str(value).isdigit():
-                    f.write(f'{key}="{value}"\n')
-                else:
-                    f.write(f'{key}={value}\n')
+        try: model = GrubConfigFile.load(path)
+        except FileNotFoundError: model = GrubConfigFile()
+        model.update(settings_dict)
+        if not model.is_dirty(): return True
+        with open(path, 'w') as f: f.write(model.render())
         return True
     except Exception as e:
         print(f"Error saving config: {e}")
-        return False
\ No newline at end of file
+        return False
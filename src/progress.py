@@ -0,0 +1,109 @@
+import threading
+import gi
+
+gi.require_version('Gtk', '4.0')
+gi.require_version('Adw', '1')
+# noinspection PyUnresolvedReferences
+from gi.repository import Gtk, Adw, GLib, Pango
+
+
+class ProgressWindow(Adw.Window):
+    """Runs a job in a worker thread and streams its output line by line.
+
+    run(on_line) does the work off the main thread and returns an exit code;
+    cancel() is called from the main thread when the user aborts.
+    """
+
+    def __init__(self, title, run, cancel=None, on_finished=None, **kwargs):
+        super().__init__(**kwargs)
+        self.job = run
+        self.cancel_job = cancel
+        self.on_finished = on_finished
+        self.cancelled = False
+        self.running = False
+        self.close_requested = False
+
+        self.set_title(title)
+        self.set_default_size(640, 420)
+        self.set_modal(True)
+        self.connect("close-request", self.on_close_request)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self.set_content(box)
+
+        header = Adw.HeaderBar()
+        self.spinner = Gtk.Spinner()
+        header.pack_start(self.spinner)
+        self.action_btn = Gtk.Button(label="Cancel")
+        self.action_btn.add_css_class("destructive-action")
+        self.action_btn.connect("clicked", self.on_action_clicked)
+        header.pack_end(self.action_btn)
+        box.append(header)
+
+        self.status_label = Gtk.Label(label="Waiting for authentication...", xalign=0.0)
+        self.status_label.set_ellipsize(Pango.EllipsizeMode.END)
+        self.status_label.set_margin_top(8); self.status_label.set_margin_bottom(8)
+        self.status_label.set_margin_start(12); self.status_label.set_margin_end(12)
+        box.append(self.status_label)
+
+        self.buffer = Gtk.TextBuffer()
+        self.end_mark = self.buffer.create_mark(None, self.buffer.get_end_iter(), False)
+        view = Gtk.TextView(buffer=self.buffer, editable=False, cursor_visible=False, monospace=True)
+        view.set_wrap_mode(Gtk.WrapMode.WORD_CHAR)
+        view.set_left_margin(12); view.set_right_margin(12)
+        self.view = view
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.set_child(view)
+        box.append(scrolled)
+
+    def start(self):
+        self.running = True
+        self.spinner.start()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def _worker(self):
+        try:
+            returncode = self.job(lambda line: GLib.idle_add(self.append_line, line))
+        except Exception as e:
+            GLib.idle_add(self.append_line, f"Error: {e}\n")
+            returncode = getattr(e, "returncode", -1)
+        GLib.idle_add(self._finish, returncode)
+
+    def append_line(self, line):
+        if self.running and line.strip(): self.status_label.set_text(line.strip())
+        self.buffer.insert(self.buffer.get_end_iter(), line)
+        self.view.scroll_to_mark(self.end_mark, 0.0, False, 0.0, 1.0)
+        return GLib.SOURCE_REMOVE
+
+    def cancel(self):
+        if not self.running or self.cancelled: return
+        self.cancelled = True
+        self.status_label.set_text("Cancelling...")
+        if self.cancel_job: self.cancel_job()
+
+    def _finish(self, returncode):
+        self.running = False
+        self.spinner.stop()
+        # A cancel that arrives after the job is past the point of no return doesn't undo it
+        if self.cancelled and returncode != 0: self.status_label.set_text("Cancelled.")
+        elif returncode == 0: self.status_label.set_text("Finished successfully.")
+        else: self.status_label.set_text(f"Failed (exit code {returncode}).")
+        self.action_btn.set_label("Close")
+        self.action_btn.remove_css_class("destructive-action")
+        if self.on_finished: self.on_finished(returncode, self.cancelled)
+        if self.close_requested: self.close()
+        return GLib.SOURCE_REMOVE
+
+    def on_action_clicked(self, _):
+        if self.running: self.cancel()
+        else: self.close()
+
+    def on_close_request(self, _):
+        # Closing mid-run cancels; the window goes away once the job has stopped.
+        if self.running:
+            self.close_requested = True
+            self.cancel()
+            return True
+        return False
@@ -0,0 +1,44 @@
+"""The helper request behind the main window's Save, built without GTK."""
+import os
+from src.fingerprint import (compute_fingerprint, load_fingerprint, dump_fingerprint, changed_inputs,
+                             FINGERPRINT_PATH, GRUB_CFG_PATH)
+from src.helper import op_mkdir, op_write, op_patch, op_update_grub
+from src.parser import GRUB_PATH
+from src.trace import span
+
+
+def theme_provision_ops(theme_path):
+    """Helper ops creating an empty theme.txt and its directory, if it doesn't exist yet."""
+    if not theme_path or os.path.exists(theme_path): return []
+    return [op_mkdir(os.path.dirname(theme_path)), op_write(theme_path, "", mode=0o644, if_missing=True)]
+
+
+def provisioned_paths(theme_path):
+    """Files the save will create, which validation must not require to exist yet."""
+    return [op["path"] for op in theme_provision_ops(theme_path) if op["op"] == "write_atomic"]
+
+
+def plan_save(grub_file, settings, force=False, root="/", grub_path=GRUB_PATH, fp_path=FINGERPRINT_PATH,
+              cfg_path=GRUB_CFG_PATH):
+    """Applies settings to grub_file and returns (ops, changed inputs, whether the file changed).
+
+    ops is empty when neither /etc/default/grub nor any grub-mkconfig input changed.
+    """
+    # Only the lines of changed keys are touched; comments and ordering survive
+    grub_file.update(settings)
+    file_changed = grub_file.is_dirty()
+    theme = settings.get("GRUB_THEME", "")
+
+    # Decide how much work this save needs by comparing input fingerprints
+    with span("save.fingerprint"):
+        fingerprint = compute_fingerprint(grub_file.render(), theme, root)
+    changed = changed_inputs(load_fingerprint(fp_path), fingerprint, fp_path, cfg_path)
+    if force and not changed: changed = ["forced"]
+    if not changed and not file_changed: return [], changed, file_changed
+
+    # ONE helper request:
+    # A. Patch the changed lines of /etc/default/grub (atomically swapped in)
+    # B. Run update-grub and record the fingerprint it was generated from
+    ops = theme_provision_ops(theme) + ([op_patch(grub_path, grub_file.patch())] if file_changed else [])
+    if changed: ops += [op_update_grub(), op_write(fp_path, dump_fingerprint(fingerprint))]
+    return ops, changed, file_changed
@@ -0,0 +1,133 @@
+import threading
+import time
+import gi
+from src.backup_store import list_snapshots, load_snapshot, live_files, diff_files, text_diff
+
+gi.require_version('Gtk', '4.0')
+gi.require_version('Adw', '1')
+from gi.repository import Gtk, Adw, Gio, GLib, GObject, Pango
+
+
+class SnapshotItem(GObject.Object):
+    """List model item for one snapshot summary."""
+    def __init__(self, summary):
+        super().__init__()
+        self.summary = summary
+        self.id = summary["id"]
+
+
+def describe_diff(manifest):
+    """What changed on disk since a snapshot, as text: a file summary followed by unified diffs."""
+    live = live_files(manifest["roots"], manifest["files"])
+    diff = diff_files(manifest["files"], live)
+    if not any(diff.values()): return "Identical to the current files."
+    lines = [f"{sign} {path}" for sign, key in (("+", "added"), ("-", "removed"), ("~", "changed"))
+             for path in diff[key]]
+    lines.append("")
+    for path in diff["changed"] + diff["removed"]:
+        lines.append(text_diff(path, manifest["files"][path], live.get(path), live=True))
+    return "\n".join(lines)
+
+
+class SnapshotsWindow(Adw.Window):
+    """Lists the backup history; selecting a snapshot shows how it differs from the files on disk now."""
+
+    def __init__(self, on_restore_callback, **kwargs):
+        super().__init__(**kwargs)
+        self.on_restore_callback = on_restore_callback
+        self.diff_serial = 0
+
+        self.set_title("Snapshots")
+        self.set_default_size(720, 600)
+        self.set_modal(True)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self.set_content(box)
+
+        header = Adw.HeaderBar()
+        self.restore_btn = Gtk.Button(label="Restore")
+        self.restore_btn.add_css_class("destructive-action")
+        self.restore_btn.set_sensitive(False)
+        self.restore_btn.connect("clicked", self.on_restore_clicked)
+        header.pack_end(self.restore_btn)
+        box.append(header)
+
+        self.store = Gio.ListStore.new(SnapshotItem)
+        self.store.splice(0, 0, [SnapshotItem(s) for s in list_snapshots()])
+        self.selection = Gtk.SingleSelection(model=self.store, autoselect=False)
+        self.selection.set_selected(Gtk.INVALID_LIST_POSITION)
+        self.selection.connect("notify::selected", self.on_selection_changed)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_factory_setup)
+        factory.connect("bind", self.on_factory_bind)
+        list_view = Gtk.ListView(model=self.selection, factory=factory)
+        list_view.add_css_class("navigation-sidebar")
+
+        list_scroll = Gtk.ScrolledWindow()
+        list_scroll.set_child(list_view)
+        list_scroll.set_size_request(-1, 180)
+
+        self.buffer = Gtk.TextBuffer()
+        view = Gtk.TextView(buffer=self.buffer, editable=False, cursor_visible=False, monospace=True)
+        view.set_left_margin(12); view.set_right_margin(12)
+        diff_scroll = Gtk.ScrolledWindow()
+        diff_scroll.set_child(view)
+
+        paned = Gtk.Paned(orientation=Gtk.Orientation.VERTICAL, vexpand=True)
+        paned.set_start_child(list_scroll)
+        paned.set_end_child(diff_scroll)
+        paned.set_position(220)
+
+        if self.store.get_n_items():
+            box.append(paned)
+            self.buffer.set_text("Select a snapshot to compare it with the current files.")
+        else:
+            box.append(Adw.StatusPage(icon_name="document-open-recent-symbolic", title="No snapshots yet",
+                                      description="Use \"Create Snapshot\" to record the current settings and theme.",
+                                      vexpand=True))
+
+    @staticmethod
+    def on_factory_setup(factory, list_item):
+        row = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        row.set_margin_top(6); row.set_margin_bottom(6)
+        title = Gtk.Label(xalign=0.0, ellipsize=Pango.EllipsizeMode.END)
+        subtitle = Gtk.Label(xalign=0.0, ellipsize=Pango.EllipsizeMode.END)
+        subtitle.add_css_class("dim-label"); subtitle.add_css_class("caption")
+        row.append(title); row.append(subtitle)
+        row.title, row.subtitle = title, subtitle
+        list_item.set_child(row)
+
+    @staticmethod
+    def on_factory_bind(factory, list_item):
+        summary = list_item.get_item().summary
+        row = list_item.get_child()
+        row.title.set_text(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(summary["created"])))
+        row.subtitle.set_text(f"{summary['label'] or summary['id']} · {summary['files']} file(s), "
+                              f"{GLib.format_size(summary['size'])}")
+
+    def on_selection_changed(self, selection, _):
+        item = selection.get_selected_item()
+        self.restore_btn.set_sensitive(item is not None)
+        if item is None: return
+        self.buffer.set_text("Comparing...")
+        # Hashing a theme with large images takes a moment; later selections win
+        self.diff_serial += 1
+        serial = self.diff_serial
+
+        def work():
+            try: text = describe_diff(load_snapshot(item.id))
+            except (OSError, ValueError) as e: text = f"Could not read snapshot: {e}"
+            GLib.idle_add(self.on_diff_ready, serial, text)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def on_diff_ready(self, serial, text):
+        if serial == self.diff_serial: self.buffer.set_text(text)
+        return GLib.SOURCE_REMOVE
+
+    def on_restore_clicked(self, _):
+        item = self.selection.get_selected_item()
+        if item is None: return
+        self.on_restore_callback(item.id)
+        self.close()
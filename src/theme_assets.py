@@ -0,0 +1,244 @@
+import hashlib
+import io
+import json
+import math
+import os
+from src.theme_parser import iter_components, component_props, CIRCLE_SIZE
+from src.theme_render import parse_color
+from src.trace import span
+
+try:
+    import cairo
+    HAS_CAIRO = True
+except ImportError:
+    HAS_CAIRO = False
+
+# Records, per theme directory, which inputs produced each generated PNG
+MANIFEST_NAME = ".grubtamer-assets.json"
+MANIFEST_VERSION = 1
+
+# Bump when a generator's drawing code changes so existing assets get redrawn
+GENERATOR_VERSION = 2
+
+# Asset sizes are designed for 768 lines and scaled to GRUB_GFXMODE in quarter steps
+BASE_HEIGHT = 768
+MAX_SCALE = 4
+
+# GRUB's styled box pieces, row by row
+SLICES = ("nw", "n", "ne", "w", "c", "e", "sw", "s", "se")
+
+
+def gfxmode_size(gfxmode):
+    """First explicit WIDTHxHEIGHT of a GRUB_GFXMODE value ("1920x1080x32,auto"), or None."""
+    for mode in (gfxmode or "").replace(';', ',').split(','):
+        parts = mode.strip().lower().split('x')
+        if len(parts) >= 2 and parts[0].isdigit() and parts[1].isdigit(): return int(parts[0]), int(parts[1])
+    return None
+
+
+def asset_scale(gfxmode):
+    size = gfxmode_size(gfxmode)
+    if size is None: return 1
+    return max(1, min(MAX_SCALE, round(size[1] / BASE_HEIGHT * 4) / 4))
+
+
+def _int(value, default=0):
+    try: return int(str(value).strip('"'))
+    except ValueError: return default
+
+
+def planned_assets(data, styles=(), scale=1):
+    """Returns {filename: inputs} for every PNG the editor generates for these theme values.
+
+    styles are the pixmap styles the theme references (see referenced_styles); box
+    sets are only generated for those, the circle only for the circle progress style.
+    Every file of a set shares the set's inputs.
+    """
+    assets = {}
+    radius, border = _int(data.get("box-corner-radius")), _int(data.get("box-border-width"))
+    if "box-bg-color" in data and "menu_*.png" in styles:
+        inputs = {"kind": "box", "prefix": "menu_", "fill": data["box-bg-color"], "radius": radius,
+                  "border": border, "border_color": data.get("box-border-color", "white"), "scale": scale}
+        for name in box_files(inputs): assets[name] = inputs
+    if "selected-item-bg-color" in data and "select_*.png" in styles:
+        inputs = {"kind": "box", "prefix": "select_", "fill": data["selected-item-bg-color"], "radius": radius,
+                  "border": 0, "border_color": None, "scale": scale}
+        for name in box_files(inputs): assets[name] = inputs
+    if data.get("progress-style") == "circle":
+        inputs = {"kind": "circle", "color": data.get("progress-bg-color", "white"),
+                  "tick_color": data.get("progress-color", "red"), "scale": scale}
+        assets["c_center.png"] = assets["c_tick.png"] = inputs
+    return assets
+
+
+def referenced_styles(doc):
+    """Pixmap style patterns ("menu_*.png") used by the boot menus of a parsed theme."""
+    styles = set()
+    for comp, _ in iter_components(doc):
+        if comp["type"] == "boot_menu":
+            props = component_props(comp)
+            styles |= {props[k] for k in ("menu_pixmap_style", "selected_item_pixmap_style") if k in props}
+    return styles
+
+
+def box_files(inputs):
+    # Without corners there is nothing to slice: a single stretched centre is enough
+    if _corner(inputs) == 0: return [inputs["prefix"] + "c.png"]
+    return [f"{inputs['prefix']}{part}.png" for part in SLICES]
+
+
+def _corner(inputs):
+    return max(round(inputs["radius"] * inputs["scale"]), round(inputs["border"] * inputs["scale"]))
+
+
+def inputs_hash(inputs):
+    payload = json.dumps({"generator": GENERATOR_VERSION, **inputs}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def data_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path):
+    try:
+        with open(path, 'rb') as f: return data_hash(f.read())
+    except OSError:
+        return None
+
+
+def load_manifest(theme_dir):
+    try:
+        with open(os.path.join(theme_dir, MANIFEST_NAME), 'r') as f: manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("assets", {}) if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def dump_manifest(assets):
+    return json.dumps({"version": MANIFEST_VERSION, "assets": assets}, indent=2, sort_keys=True) + "\n"
+
+
+def stale_assets(theme_dir, planned, manifest):
+    """Names of planned assets that must be regenerated.
+
+    An asset is current when the manifest says it was made from the same inputs
+    and the installed file still has the content hash recorded for it.
+    """
+    stale = []
+    for name, inputs in planned.items():
+        record = manifest.get(name)
+        if (not record or record.get("inputs") != inputs_hash(inputs)
+                or record.get("sha256") != file_hash(os.path.join(theme_dir, name))):
+            stale.append(name)
+    return stale
+
+
+def retired_assets(manifest, planned):
+    """Generated files the manifest records that these values no longer produce.
+
+    E.g. the eight corner and edge slices once the corner radius goes to 0. GRUB
+    would keep drawing them with their old colours, so they have to go.
+    """
+    return [name for name, record in manifest.items() if record.get("kind") != "font" and name not in planned]
+
+
+def asset_records(theme_dir, planned, manifest, rendered):
+    """Manifest records for the generated files installed after a save, and for no others.
+
+    Freshly rendered files get new records; the rest keep theirs only while the
+    installed file still matches it (not re-rendered without cairo, or deleted by hand).
+    """
+    records = {}
+    for name, inputs in planned.items():
+        if name in rendered: records[name] = {"inputs": inputs_hash(inputs), "sha256": data_hash(rendered[name])}
+        elif (record := manifest.get(name)) and record.get("sha256") == file_hash(os.path.join(theme_dir, name)):
+            records[name] = record
+    return records
+
+
+# --- Rendering ---
+# Each set is drawn once on one surface and then cut into its files.
+
+def _png(surface, x, y, w, h):
+    out = cairo.ImageSurface(cairo.FORMAT_ARGB32, w, h)
+    ctx = cairo.Context(out)
+    ctx.set_operator(cairo.OPERATOR_SOURCE)
+    ctx.set_source_surface(surface, -x, -y)
+    ctx.paint()
+    buf = io.BytesIO()
+    out.write_to_png(buf)
+    return buf.getvalue()
+
+
+def _rounded_rect(ctx, x, y, w, h, r):
+    if r <= 0:
+        ctx.rectangle(x, y, w, h)
+        return
+    ctx.new_sub_path()
+    ctx.arc(x + w - r, y + r, r, -math.pi / 2, 0)
+    ctx.arc(x + w - r, y + h - r, r, 0, math.pi / 2)
+    ctx.arc(x + r, y + h - r, r, math.pi / 2, math.pi)
+    ctx.arc(x + r, y + r, r, math.pi, 3 * math.pi / 2)
+    ctx.close_path()
+
+
+def render_box_set(inputs):
+    """Draws a nine-slice box (corners, 1px edges, 1px centre) and returns {filename: png bytes}."""
+    corner = _corner(inputs)
+    radius = round(inputs["radius"] * inputs["scale"])
+    border = round(inputs["border"] * inputs["scale"])
+    size = 2 * corner + 1
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, size, size)
+    ctx = cairo.Context(surface)
+    _rounded_rect(ctx, 0, 0, size, size, radius)
+    ctx.set_source_rgba(*parse_color(inputs["fill"], (0, 0, 0, 0.5)))
+    ctx.fill()
+    if border:
+        inset = border / 2
+        _rounded_rect(ctx, inset, inset, size - border, size - border, max(radius - inset, 0))
+        ctx.set_source_rgba(*parse_color(inputs["border_color"]))
+        ctx.set_line_width(border)
+        ctx.stroke()
+
+    prefix = inputs["prefix"]
+    if corner == 0: return {prefix + "c.png": _png(surface, 0, 0, 1, 1)}
+    cells = {"nw": (0, 0, corner, corner), "n": (corner, 0, 1, corner), "ne": (corner + 1, 0, corner, corner),
+             "w": (0, corner, corner, 1), "c": (corner, corner, 1, 1), "e": (corner + 1, corner, corner, 1),
+             "sw": (0, corner + 1, corner, corner), "s": (corner, corner + 1, 1, corner),
+             "se": (corner + 1, corner + 1, corner, corner)}
+    return {f"{prefix}{part}.png": _png(surface, *cells[part]) for part in SLICES}
+
+
+def render_circle_set(inputs):
+    """Draws the circular progress ring and tick side by side and returns both PNGs."""
+    scale = inputs["scale"]
+    center, tick = round(CIRCLE_SIZE * scale), max(round(10 * scale), 2)
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, center + tick, max(center, tick))
+    ctx = cairo.Context(surface)
+    ctx.set_source_rgba(*parse_color(inputs["color"]))
+    ctx.arc(center / 2, center / 2, center * 25 / 60, 0, 2 * math.pi)
+    ctx.set_line_width(4 * scale)
+    ctx.stroke()
+    ctx.set_source_rgba(*parse_color(inputs["tick_color"], (1, 0, 0, 1)))
+    ctx.arc(center + tick / 2, tick / 2, tick * 0.4, 0, 2 * math.pi)
+    ctx.fill()
+    return {"c_center.png": _png(surface, 0, 0, center, center), "c_tick.png": _png(surface, center, 0, tick, tick)}
+
+
+def render_assets(planned, names):
+    """Renders every set that contains one of names. Returns {filename: png bytes} for those names."""
+    if not HAS_CAIRO: return {}
+    rendered, done = {}, []
+    for name in names:
+        inputs = planned[name]
+        if any(inputs is d for d in done): continue
+        done.append(inputs)
+        try:
+            with span("theme.render_assets", set=name, kind=inputs["kind"]):
+                files = render_circle_set(inputs) if inputs["kind"] == "circle" else render_box_set(inputs)
+        except Exception as e:
+            print(f"Asset generation error ({name}): {e}")
+            continue
+        rendered.update({n: data for n, data in files.items() if n in names})
+    return rendered
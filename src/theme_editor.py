@@ -1,126 +1,198 @@
-import subprocess
 import os
+import threading
 import gi
-import tempfile
-from src.theme_parser import parse_theme, save_theme, THEME_GLOBALS
+from src.theme_parser import (read_theme_ast, parse_theme_ast, theme_properties, iter_components, component_props, save_theme,
+                              THEME_GLOBALS)
+from src.helper import get_helper, op_mkdir, op_write, op_remove
+from src.theme_assets import (planned_assets, referenced_styles, stale_assets, retired_assets, asset_records,
+                              render_assets, load_manifest, dump_manifest, inputs_hash, file_hash, data_hash, asset_scale,
+                              gfxmode_size, MANIFEST_NAME, HAS_CAIRO)
+from src.image_import import import_image, describe_import, DEFAULT_IMPORT_SIZE
+from src.fonts import build_font, referenced_fonts, chosen_fonts, pf2_name, FontError
+from src.parser import GrubConfigFile, changed_settings
+from src.validator import validate_theme, describe_errors
+from src.trace import span
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-gi.require_version('GdkPixbuf', '2.0')
 
-# Try importing Cairo for circle drawing
-try:
-    import cairo
-    HAS_CAIRO = True
-except ImportError:
-    HAS_CAIRO = False
-    print("Warning: 'python3-cairo' not found. Circular progress assets cannot be generated.")
+if not HAS_CAIRO:
+    print("Warning: 'python3-cairo' not found. Menu and progress assets cannot be generated.")
 
 # noinspection PyUnresolvedReferences
-from gi.repository import Gtk, Adw, Gdk, Pango, Gio, GLib, GdkPixbuf
+from gi.repository import Gtk, Adw, Gdk, Pango, Gio, GLib
 
 # --- PREVIEW WINDOW ---
+PREVIEW_DEBOUNCE_MS = 120
+THEME_RELOAD_DELAY_MS = 300
+# Monitor events that can replace theme.txt's content
+RELOAD_EVENTS = {Gio.FileMonitorEvent.CHANGES_DONE_HINT, Gio.FileMonitorEvent.CREATED, Gio.FileMonitorEvent.DELETED,
+                 Gio.FileMonitorEvent.MOVED_IN, Gio.FileMonitorEvent.RENAMED}
+
+PREVIEW_DEFAULTS = {
+    "desktop-color": "#333333", "box-bg-color": "rgba(0,0,0,0.5)", "box-border-color": "white",
+    "title-text": "GNU GRUB version 2.06", "title-color": "white", "selected-item-color": "white",
+    "selected-item-bg-color": "#4a90d9", "progress-color": "white", "progress-bg-color": "grey",
+    "message-color": "#cccccc", "menu-position": "Center", "progress-style": "bar",
+}
+
+# The single application-wide provider all previews are styled from
+_preview_provider = None
+
+
+def _css_color(value, fallback):
+    rgba = Gdk.RGBA()
+    if value and rgba.parse(value.strip('"')): return rgba.to_string()
+    rgba.parse(fallback)
+    return rgba.to_string()
+
+
+def _css_font(value):
+    if not value: return ""
+    desc = Pango.FontDescription.from_string(value)
+    css = f'font-family: "{desc.get_family() or "Sans"}";'
+    if desc.get_size(): css += f" font-size: {desc.get_size() / Pango.SCALE}pt;"
+    if desc.get_weight() >= Pango.Weight.BOLD: css += " font-weight: bold;"
+    return css
+
+
+def build_preview_css(data):
+    """Generates the preview stylesheet from the theme state."""
+    def get(key): return _css_color(data.get(key), PREVIEW_DEFAULTS[key])
+    radius = data.get("box-corner-radius") if str(data.get("box-corner-radius", "")).isdigit() else "6"
+    border = data.get("box-border-width") if str(data.get("box-border-width", "")).isdigit() else "2"
+    return f"""
+.grub-preview-desktop {{ background-color: {get('desktop-color')}; }}
+.grub-preview-menu {{ background-color: {get('box-bg-color')}; border: {border}px solid {get('box-border-color')}; border-radius: {radius}px; }}
+.grub-preview-title {{ color: {get('title-color')}; font-weight: bold; margin-bottom: 10px; {_css_font(data.get('title-font'))} }}
+.grub-preview-item {{ color: {get('box-border-color')}; {_css_font(data.get('terminal-font'))} }}
+.grub-preview-item.selected {{ background-color: {get('selected-item-bg-color')}; color: {get('selected-item-color')}; border-radius: {radius}px; }}
+.grub-preview-progress trough {{ background-color: {get('progress-bg-color')}; min-height: 8px; }}
+.grub-preview-progress progress {{ background-color: {get('progress-color')}; min-height: 8px; }}
+.grub-preview-countdown {{ color: {get('progress-color')}; }}
+.grub-preview-message {{ color: {get('message-color')}; font-size: 14px; {_css_font(data.get('message-font'))} }}
+"""
+
+
+def get_preview_provider():
+    global _preview_provider
+    if _preview_provider is None:
+        _preview_provider = Gtk.CssProvider()
+        Gtk.StyleContext.add_provider_for_display(Gdk.Display.get_default(), _preview_provider,
+                                                  Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+    return _preview_provider
+
+
 class ThemePreviewWindow(Gtk.Window):
-    def __init__(self, theme_data):
-        super().__init__(title="Theme Preview")
+    """Persistent live preview. update() only touches the widgets whose inputs changed;
+    all colours and fonts come from one shared stylesheet."""
+
+    def __init__(self, theme_data, theme_dir="", **kwargs):
+        super().__init__(title="Theme Preview", **kwargs)
         self.set_default_size(900, 650)
-        self.set_modal(True)
-        
+        self.set_hide_on_close(True)
+        self.theme_dir = theme_dir
+        self.state = {}
+        self.css = None
+
         overlay = Gtk.Overlay()
         self.set_child(overlay)
 
         # Background
-        bg_image = theme_data.get('desktop-image', '').strip('"')
-        bg_color = theme_data.get('desktop-color', '#333333').strip('"')
-        
-        # Handle RGB vs Hex in Preview
-        if "rgb" in bg_color: 
-             # Fallback if previewing bad data, though we fix it on save
-             pass 
-
-        pic = Gtk.Picture(); pic.set_content_fit(Gtk.ContentFit.COVER)
-        if bg_image and os.path.exists(bg_image): pic.set_file(Gio.File.new_for_path(bg_image))
-        else: self.apply_css(pic, f"picture {{ background-color: {bg_color}; }}") 
-        overlay.set_child(pic)
+        self.pic = Gtk.Picture(); self.pic.set_content_fit(Gtk.ContentFit.COVER)
+        self.pic.add_css_class("grub-preview-desktop")
+        overlay.set_child(self.pic)
 
         # Boot Menu
-        pos_name = theme_data.get('menu-position', 'Center')
-        halign, valign = Gtk.Align.CENTER, Gtk.Align.CENTER
-        if "North" in pos_name: valign = Gtk.Align.START
-        elif "South" in pos_name: valign = Gtk.Align.END
-        if "West" in pos_name: halign = Gtk.Align.START
-        elif "East" in pos_name: halign = Gtk.Align.END
-
-        menu_frame = Gtk.Frame()
-        menu_frame.set_halign(halign); menu_frame.set_valign(valign)
-        menu_frame.set_margin_top(50); menu_frame.set_margin_bottom(50)
-        menu_frame.set_margin_start(50); menu_frame.set_margin_end(50)
-        menu_frame.set_size_request(350, 200)
-        overlay.add_overlay(menu_frame)
-        
-        # Colors - handle potential garbage data safely
-        box_bg = theme_data.get('box-bg-color', 'rgba(0,0,0,0.5)').strip('"')
-        box_border = theme_data.get('box-border-color', 'white').strip('"')
-        self.apply_css(menu_frame, f"frame {{ background-color: {box_bg}; border: 2px solid {box_border}; border-radius: 6px; }}")
+        self.menu_frame = Gtk.Frame()
+        self.menu_frame.set_margin_top(50); self.menu_frame.set_margin_bottom(50)
+        self.menu_frame.set_margin_start(50); self.menu_frame.set_margin_end(50)
+        self.menu_frame.set_size_request(350, 200)
+        self.menu_frame.add_css_class("grub-preview-menu")
+        overlay.add_overlay(self.menu_frame)
 
         vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         vbox.set_margin_top(15); vbox.set_margin_bottom(15)
         vbox.set_margin_start(15); vbox.set_margin_end(15)
-        menu_frame.set_child(vbox)
-        
-        title_text = theme_data.get('title-text', 'GNU GRUB version 2.06').strip('"')
-        title_color = theme_data.get('title-color', 'white').strip('"')
-        lbl_title = Gtk.Label(label=title_text)
-        lbl_title.add_css_class("title-2")
-        self.apply_css(lbl_title, f"label {{ color: {title_color}; font-weight: bold; margin-bottom: 10px; }}")
-        vbox.append(lbl_title)
-
-        sel_txt = theme_data.get('selected-item-color', 'white').strip('"')
-        sel_bg = theme_data.get('selected-item-bg-color', '#4a90d9').strip('"')
+        self.menu_frame.set_child(vbox)
+
+        self.lbl_title = Gtk.Label()
+        self.lbl_title.add_css_class("title-2")
+        self.lbl_title.add_css_class("grub-preview-title")
+        vbox.append(self.lbl_title)
+
         items = ["Ubuntu", "Advanced options for Ubuntu", "Windows Boot Manager", "UEFI Firmware Settings"]
         for i, item in enumerate(items):
             item_lbl = Gtk.Label(label=item)
             item_lbl.set_xalign(0.0)
             item_lbl.set_margin_start(10); item_lbl.set_margin_end(10)
             item_lbl.set_margin_top(4); item_lbl.set_margin_bottom(4)
-            if i == 0: self.apply_css(item_lbl, f"label {{ background-color: {sel_bg}; color: {sel_txt}; border-radius: 3px; }}")
-            else: self.apply_css(item_lbl, f"label {{ color: {box_border}; }}")
+            item_lbl.add_css_class("grub-preview-item")
+            if i == 0: item_lbl.add_css_class("selected")
             vbox.append(item_lbl)
-        
+
         # Footer
         footer_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         footer_box.set_valign(Gtk.Align.END); footer_box.set_halign(Gtk.Align.CENTER)
         footer_box.set_margin_bottom(40)
         overlay.add_overlay(footer_box)
 
-        prog_style = theme_data.get('progress-style', 'bar').strip('"').lower()
-        prog_color = theme_data.get('progress-color', 'white').strip('"')
-        prog_bg = theme_data.get('progress-bg-color', 'grey').strip('"')
-
-        if prog_style == 'circle':
-            box_spin = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
-            box_spin.set_halign(Gtk.Align.CENTER)
-            spinner = Gtk.Spinner(); spinner.set_size_request(32, 32); spinner.start()
-            box_spin.append(spinner)
-            lbl = Gtk.Label(label="Booting in 5s..."); self.apply_css(lbl, f"label {{ color: {prog_color}; }}")
-            box_spin.append(lbl)
-            footer_box.append(box_spin)
-        else:
-            pbar = Gtk.ProgressBar(); pbar.set_fraction(0.6); pbar.set_size_request(400, 20)
-            self.apply_css(pbar, f"progressbar trough {{ background-color: {prog_bg}; min-height: 8px; }} progressbar progress {{ background-color: {prog_color}; min-height: 8px; }}")
-            footer_box.append(pbar)
+        self.progress_stack = Gtk.Stack()
+        box_spin = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        box_spin.set_halign(Gtk.Align.CENTER)
+        self.spinner = Gtk.Spinner(); self.spinner.set_size_request(32, 32)
+        box_spin.append(self.spinner)
+        lbl = Gtk.Label(label="Booting in 5s...")
+        lbl.add_css_class("grub-preview-countdown")
+        box_spin.append(lbl)
+        self.progress_stack.add_named(box_spin, "circle")
+        pbar = Gtk.ProgressBar(); pbar.set_fraction(0.6); pbar.set_size_request(400, 20)
+        pbar.add_css_class("grub-preview-progress")
+        self.progress_stack.add_named(pbar, "bar")
+        footer_box.append(self.progress_stack)
 
-        msg_color = theme_data.get('message-color', '#cccccc').strip('"')
         lbl_msg = Gtk.Label(label="Use the ↑ and ↓ keys to select an entry. Press Enter to boot.")
-        self.apply_css(lbl_msg, f"label {{ color: {msg_color}; font-size: 14px; }}")
+        lbl_msg.add_css_class("grub-preview-message")
         footer_box.append(lbl_msg)
 
-    @staticmethod
-    def apply_css(widget, css):
-        try:
-            p = Gtk.CssProvider(); p.load_from_data(css.encode())
-            widget.get_style_context().add_provider(p, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-        except: pass
+        self.update(theme_data)
+
+    def update(self, theme_data):
+        data = {k: v.strip('"') if isinstance(v, str) else v for k, v in theme_data.items()}
+        changed = {k for k in set(data) | set(self.state) if data.get(k) != self.state.get(k)}
+        first = not self.state
+        self.state = data
+
+        # Colours and fonts: regenerate the shared stylesheet, reload only if it differs
+        css = build_preview_css(data)
+        if css != self.css:
+            self.css = css
+            try: get_preview_provider().load_from_data(css.encode())
+            except Exception as e: print(f"Preview CSS error: {e}")
+
+        if first or "desktop-image" in changed:
+            bg_image = data.get('desktop-image', '')
+            if bg_image and not os.path.isabs(bg_image) and self.theme_dir:
+                bg_image = os.path.join(self.theme_dir, bg_image)
+            self.pic.set_file(Gio.File.new_for_path(bg_image) if bg_image and os.path.exists(bg_image) else None)
+
+        if first or "menu-position" in changed:
+            pos_name = data.get('menu-position') or PREVIEW_DEFAULTS["menu-position"]
+            halign, valign = Gtk.Align.CENTER, Gtk.Align.CENTER
+            if "North" in pos_name: valign = Gtk.Align.START
+            elif "South" in pos_name: valign = Gtk.Align.END
+            if "West" in pos_name: halign = Gtk.Align.START
+            elif "East" in pos_name: halign = Gtk.Align.END
+            self.menu_frame.set_halign(halign); self.menu_frame.set_valign(valign)
+
+        if first or "title-text" in changed:
+            self.lbl_title.set_text(data.get('title-text') or PREVIEW_DEFAULTS["title-text"])
+
+        if first or "progress-style" in changed:
+            style = (data.get('progress-style') or "bar").lower()
+            self.progress_stack.set_visible_child_name("circle" if style == "circle" else "bar")
+            if style == "circle": self.spinner.start()
+            else: self.spinner.stop()
 
 
 # --- MAIN EDITOR WINDOW ---
@@ -132,7 +204,14 @@ class ThemeEditorWindow(Adw.Window):
         self.set_default_size(600, 850)
         self.set_modal(True)
 
-        self.current_data = parse_theme(self.theme_path)
+        try: self.theme_ast = read_theme_ast(self.theme_path)
+        except Exception as e:
+            print(f"Error parsing theme: {e}")
+            self.theme_ast = None
+        self.current_data = theme_properties(self.theme_ast) if self.theme_ast else {}
+        # Generated assets are drawn for the resolution GRUB will run at
+        try: self.gfxmode = GrubConfigFile.load().get("GRUB_GFXMODE", "")
+        except OSError: self.gfxmode = ""
         self.widget_map = {} 
 
         self.toast_overlay = Adw.ToastOverlay()
@@ -147,10 +226,10 @@ class ThemeEditorWindow(Adw.Window):
         preview_btn.connect("clicked", self.on_preview_clicked)
         header.pack_start(preview_btn)
         
-        save_btn = Gtk.Button(label="Save")
-        save_btn.add_css_class("suggested-action")
-        save_btn.connect("clicked", self.on_save_clicked)
-        header.pack_end(save_btn)
+        self.save_btn = Gtk.Button(label="Save")
+        self.save_btn.add_css_class("suggested-action")
+        self.save_btn.connect("clicked", self.on_save_clicked)
+        header.pack_end(self.save_btn)
 
         menu_model = Gio.Menu()
         menu_model.append("Save Copy As...", "win.save_as")
@@ -171,6 +250,7 @@ class ThemeEditorWindow(Adw.Window):
 
         page = Adw.PreferencesPage()
         box.append(page)
+        self.page = page
 
         groups_order = ["General", "Appearance", "Menu Layout", "Boot Menu Styling", "Footer Text", "Progress Bar"]
         group_widgets = {}
@@ -236,8 +316,48 @@ class ThemeEditorWindow(Adw.Window):
                 entry = Gtk.Entry(text=val); entry.set_valign(Gtk.Align.CENTER); entry.set_hexpand(True)
                 self.widget_map[key] = {'type': 'text', 'widget': entry}
                 row.add_suffix(entry)
+            self.widget_map[key]['row'] = row
             target_group.add(row)
 
+        self.components_group = self.build_components_group(page)
+
+        # What the controls showed when the editor opened; save only writes values that differ
+        self.saved_values = self.get_current_values()
+        # Rows edited here that theme.txt also changed underneath us: {key: tooltip}
+        self.conflicts = {}
+
+        self.preview = None
+        self.preview_source = 0
+        self.reload_source = 0
+        self.connect_preview_signals()
+        self.connect_font_signals()
+        self.validate_values()
+        self.theme_monitor = self.watch_theme_file()
+        self.connect("close-request", self.on_editor_close)
+
+    def build_components_group(self, page):
+        """Lists every component in theme.txt, including nested ones the controls above don't cover."""
+        if not self.theme_ast: return None
+        components = list(iter_components(self.theme_ast))
+        errors = self.theme_ast["errors"]
+        if not components and not errors: return None
+
+        group = Adw.PreferencesGroup(title="Components", description=f"{len(components)} component(s) in theme.txt")
+        page.add(group)
+        for comp, depth in components:
+            props = component_props(comp)
+            summary = ", ".join(f"{k} = {v}" for k, v in list(props.items())[:4])
+            row = Adw.ActionRow(title=f"+ {comp['type']}" + (f"  ({props['id']})" if "id" in props else ""),
+                                subtitle=f"line {comp['line']}" + (f" · {summary}" if summary else ""))
+            row.set_subtitle_lines(1)
+            row.set_margin_start(depth * 24)
+            group.add(row)
+        for line_no, message in errors:
+            row = Adw.ActionRow(title=f"Line {line_no}: {message}")
+            row.add_prefix(Gtk.Image(icon_name="dialog-warning-symbolic"))
+            group.add(row)
+        return group
+
     def open_file_dialog(self, entry_widget):
         d = Gtk.FileDialog()
         f = Gtk.FileFilter(); f.add_mime_type("image/*"); f.set_name("Images")
@@ -253,18 +373,31 @@ class ThemeEditorWindow(Adw.Window):
             theme_dir = os.path.dirname(self.theme_path)
             if os.path.commonpath([source_path, theme_dir]) == theme_dir: entry_widget.set_text(source_path)
             else:
-                filename = os.path.basename(source_path)
-                dest_path = os.path.join(theme_dir, filename)
-                try:
-                    subprocess.run(["pkexec", "cp", source_path, dest_path], check=True)
-                    subprocess.run(["pkexec", "chmod", "644", dest_path], check=True)
-                    self.show_toast(f"Imported image to {dest_path}")
-                    entry_widget.set_text(dest_path)
-                except Exception as e:
-                    self.show_toast(f"Failed to import asset: {e}")
-                    entry_widget.set_text(source_path)
+                # Decoding and scaling an 8K photo takes a while; keep the editor responsive
+                size = gfxmode_size(self.gfxmode) or DEFAULT_IMPORT_SIZE
+                self.show_toast(f"Importing {os.path.basename(source_path)}...")
+                threading.Thread(target=self.import_image_worker, args=(source_path, theme_dir, size, entry_widget),
+                                 daemon=True).start()
         except Exception: pass
 
+    def import_image_worker(self, source_path, theme_dir, size, entry_widget):
+        try:
+            with span("theme.import_image", path=source_path) as s:
+                result = import_image(source_path, size)
+                s.set(before=result["before"], after=result["after"])
+            name = os.path.splitext(os.path.basename(source_path))[0] + "." + result["ext"]
+            dest_path = os.path.join(theme_dir, name)
+            get_helper().request([op_write(dest_path, result["data"], mode=0o644)])
+            GLib.idle_add(self.on_image_imported, entry_widget, dest_path, result, None)
+        except Exception as e:
+            GLib.idle_add(self.on_image_imported, entry_widget, source_path, None, getattr(e, "message", e))
+
+    def on_image_imported(self, entry_widget, path, result, error):
+        entry_widget.set_text(path)
+        if error: self.show_toast(f"Failed to import asset: {error}")
+        else: self.show_toast(f"Imported {os.path.basename(path)} ({describe_import(result)})")
+        return GLib.SOURCE_REMOVE
+
     # FIX: Ensure Colors are Hex!
     def get_current_values(self):
         data = {}
@@ -279,7 +412,7 @@ class ThemeEditorWindow(Adw.Window):
             elif w_type == 'color':
                 rgba = widget.get_rgba()
                 # FIX: Check if we need Alpha or standard Hex
-                if key == "box-bg-color":
+                if key in ("box-bg-color", "selected-item-bg-color"):
                     # Keep Alpha for the box asset generator (rgba string is fine for python parsing)
                     val = rgba.to_string() 
                 else:
@@ -290,66 +423,124 @@ class ThemeEditorWindow(Adw.Window):
             if val: data[key] = val
         return data
 
-    def generate_box_asset_tmp(self, color_str):
-        try:
-            rgba = Gdk.RGBA(); rgba.parse(color_str)
-            pixbuf = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, True, 8, 1, 1)
-            r, g, b, a = int(rgba.red*255), int(rgba.green*255), int(rgba.blue*255), int(rgba.alpha*255)
-            pixel = (r << 24) | (g << 16) | (b << 8) | a
-            pixbuf.fill(pixel)
-            fd, tmp_path = tempfile.mkstemp(suffix=".png")
-            os.close(fd); pixbuf.savev(tmp_path, "png", [], [])
-            return tmp_path
-        except: return None
-
-    def generate_circle_assets_tmp(self, bg_color_str, fg_color_str):
-        if not HAS_CAIRO: return None
-        files = {}
-        try:
-            surface_c = cairo.ImageSurface(cairo.FORMAT_ARGB32, 60, 60)
-            ctx = cairo.Context(surface_c)
-            rgba = Gdk.RGBA(); rgba.parse(bg_color_str)
-            ctx.set_source_rgba(rgba.red, rgba.green, rgba.blue, rgba.alpha)
-            ctx.arc(30, 30, 25, 0, 2*3.14159) # Radius 25
-            ctx.set_line_width(4)
-            ctx.stroke()
-            
-            fd, c_path = tempfile.mkstemp(suffix=".png")
-            os.close(fd)
-            surface_c.write_to_png(c_path)
-            files["center"] = c_path
-
-            surface_t = cairo.ImageSurface(cairo.FORMAT_ARGB32, 10, 10)
-            ctx = cairo.Context(surface_t)
-            rgba.parse(fg_color_str)
-            ctx.set_source_rgba(rgba.red, rgba.green, rgba.blue, rgba.alpha)
-            ctx.arc(5, 5, 4, 0, 2*3.14159)
-            ctx.fill()
-            
-            fd, t_path = tempfile.mkstemp(suffix=".png")
-            os.close(fd)
-            surface_t.write_to_png(t_path)
-            files["tick"] = t_path
-            
-            return files
-        except Exception as e:
-            print(f"Circle Gen Error: {e}")
-            return None
-
     def on_preview_clicked(self, _):
-        ThemePreviewWindow(self.get_current_values()).present()
+        # One persistent preview per editor; closing it only hides it
+        if self.preview is None:
+            self.preview = ThemePreviewWindow(self.get_current_values(), os.path.dirname(self.theme_path),
+                                              transient_for=self)
+        else:
+            self.flush_preview_update()
+        self.preview.present()
+
+    def connect_preview_signals(self):
+        signals = {'text': "changed", 'dropdown': "notify::selected", 'color': "notify::rgba", 'font': "notify::font-desc"}
+        for meta in self.widget_map.values():
+            meta['widget'].connect(signals[meta['type']], self.schedule_preview_update)
+            meta['widget'].connect(signals[meta['type']], self.validate_values)
+
+    def validate_values(self, *_):
+        """Flags rows whose value GRUB would reject. Returns the errors."""
+        errors, _ = validate_theme(self.get_current_values(), os.path.dirname(self.theme_path))
+        for key, meta in self.widget_map.items():
+            if key in errors:
+                meta['row'].add_css_class("error")
+                meta['row'].set_tooltip_text(errors[key])
+            else:
+                meta['row'].remove_css_class("error")
+                meta['row'].set_tooltip_text(self.conflicts.get(key))
+        return errors
+
+    def set_widget_value(self, key, val):
+        meta = self.widget_map[key]
+        widget = meta['widget']
+        if meta['type'] == 'text': widget.set_text(val)
+        elif meta['type'] == 'dropdown':
+            if val in meta['options']: widget.set_selected(meta['options'].index(val))
+        elif meta['type'] == 'color':
+            rgba = Gdk.RGBA()
+            if not rgba.parse(val): rgba.parse("white")
+            widget.set_rgba(rgba)
+        elif meta['type'] == 'font' and val:
+            widget.set_font_desc(Pango.FontDescription.from_string(val))
+
+    def mark_conflict(self, key, disk_value):
+        """Flags a row whose unsaved edit disagrees with theme.txt; None clears the flag."""
+        row = self.widget_map[key]['row']
+        if disk_value is None:
+            self.conflicts.pop(key, None)
+            row.remove_css_class("warning")
+        else:
+            self.conflicts[key] = f"Changed on disk to \"{disk_value}\" while you were editing. Saving keeps your value."
+            row.add_css_class("warning")
+        if "error" not in row.get_css_classes(): row.set_tooltip_text(self.conflicts.get(key))
+
+    # --- External changes ---
+
+    def watch_theme_file(self):
+        try: monitor = Gio.File.new_for_path(self.theme_path).monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.Error as e:
+            print(f"Cannot watch {self.theme_path}: {e.message}")
+            return None
+        monitor.connect("changed", self.on_theme_file_changed)
+        return monitor
+
+    def on_theme_file_changed(self, monitor, file, other_file, event):
+        if event not in RELOAD_EVENTS or self.reload_source: return
+        self.reload_source = GLib.timeout_add(THEME_RELOAD_DELAY_MS, self.flush_theme_reload)
+
+    def flush_theme_reload(self):
+        self.reload_source = 0
+        # Our own save lands through the helper while the button is off; finish_save rebases then
+        if self.save_btn.get_sensitive(): self.check_theme_file()
+        return GLib.SOURCE_REMOVE
+
+    def check_theme_file(self):
+        """Merges theme.txt into the controls if its content differs from what they were loaded from."""
+        try: new_ast = read_theme_ast(self.theme_path)
+        except Exception: return
+        if new_ast is None: return  # Mid-replace or removed; the next event brings it back
+        if self.theme_ast and new_ast["source"] == self.theme_ast["source"]: return
+        old_props = theme_properties(self.theme_ast) if self.theme_ast else {}
+        new_props = theme_properties(new_ast)
+        self.theme_ast = new_ast
+
+        current = self.get_current_values()
+        changed, conflicts = [], []
+        for key, value in changed_settings(old_props, new_props).items():
+            if key not in self.widget_map: continue
+            # Untouched rows follow the file; edited ones keep their value unless it now matches
+            if current.get(key) == value: self.mark_conflict(key, None)
+            elif current.get(key) != self.saved_values.get(key):
+                self.mark_conflict(key, value or "")
+                conflicts.append(key)
+                continue
+            self.set_widget_value(key, value or "")
+            new_value = self.get_current_values().get(key)
+            if new_value is None: self.saved_values.pop(key, None)
+            else: self.saved_values[key] = new_value
+            changed.append(key)
+
+        if self.components_group is not None: self.page.remove(self.components_group)
+        self.components_group = self.build_components_group(self.page)
+        self.validate_values()
+        if conflicts: self.show_toast(f"theme.txt changed on disk. Your edits to {', '.join(conflicts)} were kept.")
+        elif changed: self.show_toast(f"theme.txt changed on disk. {len(changed)} value(s) updated.")
+
+    def schedule_preview_update(self, *_):
+        # Debounce: a drag in the colour picker fires dozens of notifies, render once it settles
+        if self.preview is None or not self.preview.get_visible(): return
+        if self.preview_source: GLib.source_remove(self.preview_source)
+        self.preview_source = GLib.timeout_add(PREVIEW_DEBOUNCE_MS, self.flush_preview_update)
+
+    def flush_preview_update(self):
+        self.preview_source = 0
+        if self.preview is not None: self.preview.update(self.get_current_values())
+        return GLib.SOURCE_REMOVE
 
     def on_reset_clicked(self, action, param):
         defaults = { "menu-position": "Center", "box-bg-color": "rgba(0,0,0,0.7)", "title-color": "white" }
         for key, val in defaults.items():
-            if key in self.widget_map:
-                meta = self.widget_map[key]
-                if meta['type'] == 'text': meta['widget'].set_text(val)
-                elif meta['type'] == 'dropdown':
-                    if val in meta['options']: meta['widget'].set_selected(meta['options'].index(val))
-                elif meta['type'] == 'color':
-                    rgba = Gdk.RGBA(); rgba.parse(val)
-                    meta['widget'].set_rgba(rgba)
+            if key in self.widget_map: self.set_widget_value(key, val)
         self.show_toast("Reset to safe defaults.")
 
     def on_save_as_clicked(self, action, param):
@@ -373,63 +564,154 @@ class ThemeEditorWindow(Adw.Window):
             if not name: return
             new_dir = f"/boot/grub/themes/{name}"
             new_file = f"{new_dir}/theme.txt"
-            try:
-                subprocess.run(["pkexec", "mkdir", "-p", new_dir], check=True)
-                content = save_theme(new_file, self.get_current_values())
-                subprocess.run(["pkexec", "tee", new_file], input=content, text=True, check=True, capture_output=True)
-                self.show_toast(f"Theme saved to {name}!")
-                dialog.destroy()
-            except Exception as e: self.show_toast(f"Error: {e}")
+            data, baseline = self.get_current_values(), dict(self.saved_values)
+            btn.set_sensitive(False)
+
+            def done(error):
+                btn.set_sensitive(True)
+                if error: self.show_toast(f"Error: {error}")
+                else:
+                    self.show_toast(f"Theme saved to {name}!")
+                    dialog.destroy()
+                return GLib.SOURCE_REMOVE
+
+            # pkexec waits for the password; the dialog stays responsive meanwhile
+            def work():
+                error = None
+                try:
+                    content = save_theme(self.theme_path, data, baseline=baseline)
+                    get_helper().request([op_mkdir(new_dir), op_write(new_file, content, mode=0o644)], transaction=True)
+                except Exception as e: error = e
+                GLib.idle_add(done, error)
+
+            threading.Thread(target=work, daemon=True).start()
 
         btn.connect("clicked", on_confirm)
         dialog.present()
 
+    def connect_font_signals(self):
+        for meta in self.widget_map.values():
+            if meta['type'] == 'font': meta['widget'].connect("notify::font-desc", self.on_font_changed)
+
+    def on_font_changed(self, widget, _pspec):
+        # Compile in the background as soon as a font is picked, so Save finds it cached
+        desc = widget.get_font_desc()
+        if desc: threading.Thread(target=self.compile_fonts, args=({desc.to_string()},), daemon=True).start()
+
+    @staticmethod
+    def compile_fonts(descriptions):
+        fonts, errors = {}, []
+        for desc in descriptions:
+            try:
+                with span("theme.build_font", font=desc): fonts[desc] = build_font(desc)
+            except (FontError, OSError) as e: errors.append(f"{desc}: {e}")
+        return fonts, errors
+
     def on_save_clicked(self, _):
         data = self.get_current_values()
-        commands = []
-        tmp_files_to_remove = []
         theme_dir = os.path.dirname(self.theme_path)
+        # Components are checked too, so a bad colour left in theme.txt by hand is caught before GRUB sees it
+        generated = planned_assets(data, ("menu_*.png", "select_*.png"), asset_scale(self.gfxmode))
+        errors, warnings = validate_theme(data, theme_dir, self.theme_ast, generated)
+        self.validate_values()
+        for label, message in warnings.items(): print(f"Theme warning: {label}: {message}")
+        if errors:
+            self.show_toast(f"Not saved. {describe_errors(errors)}")
+            return
+        self.save_btn.set_sensitive(False)
+        # Font builds, rendering and pkexec all run off the main loop, on a snapshot of the editor state
+        baseline, theme_ast, gfxmode = dict(self.saved_values), self.theme_ast, self.gfxmode
+
+        def work():
+            fonts, errors = self.compile_fonts(chosen_fonts(data, baseline, theme_dir))
+            for error in errors: print(f"Font error: {error}")
+            try:
+                ops, new_ast, fonts_changed = self.plan_save(data, baseline, theme_ast, gfxmode, fonts)
+                # Assets + theme.txt go to the helper as one transaction: all of them land, or none
+                if ops:
+                    with span("theme.save", ops=len(ops)): get_helper().request(ops, transaction=True)
+                result = {"ops": ops, "ast": new_ast, "fonts_changed": fonts_changed, "errors": errors}
+            except Exception as e:
+                result = {"error": e}
+            GLib.idle_add(self.finish_save, data, result)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def plan_save(self, data, baseline, theme_ast, gfxmode, fonts):
+        """Helper ops saving data; returns (ops, new theme AST or None, whether any .pf2 changes). Runs in a worker."""
+        ops = []
+        theme_dir = os.path.dirname(self.theme_path)
+        scale = asset_scale(gfxmode)
+
+        content = save_theme(self.theme_path, data, baseline=baseline, scale=scale,
+                             font_names={desc: font["name"] for desc, font in fonts.items()})
+        new_ast = parse_theme_ast(content) if content else theme_ast
+
+        # Generated PNGs are keyed on the inputs that draw them; current ones are neither redrawn nor copied
+        planned = planned_assets(data, referenced_styles(new_ast) if new_ast else (), scale)
+        manifest = load_manifest(theme_dir)
+        rendered = render_assets(planned, stale_assets(theme_dir, planned, manifest))
+        # The new manifest describes exactly the generated files installed once this save lands
+        new_manifest = {name: record for name, record in manifest.items() if record.get("kind") == "font"}
+        new_manifest.update(asset_records(theme_dir, planned, manifest, rendered))
+        for name, png in rendered.items():
+            # Identical pixels already installed (e.g. no manifest yet): only the manifest needs writing
+            if data_hash(png) != file_hash(os.path.join(theme_dir, name)):
+                ops.append(op_write(os.path.join(theme_dir, name), png, mode=0o644))
+        for name in retired_assets(manifest, planned): ops.append(op_remove(os.path.join(theme_dir, name)))
+
+        # Fonts: GRUB loads every .pf2 in the theme directory, so install the ones picked and drop the unused
+        wanted = {font["file"]: (desc, font) for desc, font in fonts.items()}
+        for name, (desc, font) in wanted.items():
+            with open(font["pf2"], 'rb') as f: pf2 = f.read()
+            new_manifest[name] = {"kind": "font", "desc": desc, "name": font["name"], "inputs": inputs_hash(font["inputs"]),
+                                  "sha256": data_hash(pf2)}
+            if data_hash(pf2) != file_hash(os.path.join(theme_dir, name)):
+                ops.append(op_write(os.path.join(theme_dir, name), pf2, mode=0o644))
+        referenced = referenced_fonts(data, new_ast)
+        for name, record in manifest.items():
+            if record.get("kind") != "font" or name in wanted: continue
+            # Still referenced, by description or by the GRUB name theme.txt holds: keep it, also when
+            # it failed to recompile this time
+            names = {record.get("desc"), record.get("name")}
+            try: names.add(pf2_name(os.path.join(theme_dir, name)))
+            except (OSError, FontError): pass
+            if names & referenced: continue
+            ops.append(op_remove(os.path.join(theme_dir, name)))
+            del new_manifest[name]
+        fonts_changed = any(op.get("path", "").endswith(".pf2") for op in ops)
+
+        if new_manifest != manifest:
+            ops.append(op_write(os.path.join(theme_dir, MANIFEST_NAME), dump_manifest(new_manifest), mode=0o644))
+
+        source = theme_ast["source"] if theme_ast else None
+        if content and content != source:
+            ops.append(op_write(self.theme_path, content))
+        return ops, new_ast if content else None, fonts_changed
+
+    def finish_save(self, data, result):
+        self.save_btn.set_sensitive(True)
+        errors = result.get("errors", [])
+        if "error" in result:
+            self.show_toast(f"Error: {result['error']}")
+        elif not result["ops"]:
+            self.show_toast("No changes to save." if not errors else f"No changes saved. {len(errors)} font(s) could not be compiled.")
+        else:
+            self.saved_values = data
+            if result["ast"] is not None: self.theme_ast = result["ast"]
+            for key in list(self.conflicts): self.mark_conflict(key, None)
+            if errors: self.show_toast(f"Theme saved, but {len(errors)} font(s) could not be compiled. Their installed .pf2 files were kept.")
+            elif result["fonts_changed"]: self.show_toast("Theme saved. Save the GRUB settings to load the new fonts.")
+            else: self.show_toast("Theme saved successfully!")
+        # Monitor events were held back while saving; pick up anything written by someone else meanwhile
+        self.check_theme_file()
+        return GLib.SOURCE_REMOVE
+
+    def on_editor_close(self, _):
+        if self.preview_source: GLib.source_remove(self.preview_source)
+        if self.reload_source: GLib.source_remove(self.reload_source)
+        if self.theme_monitor is not None: self.theme_monitor.cancel()
+        if self.preview is not None: self.preview.destroy()
+        return False
 
-        if "box-bg-color" in data:
-            tmp_png = self.generate_box_asset_tmp(data["box-bg-color"])
-            if tmp_png:
-                dest_png = os.path.join(theme_dir, "menu_c.png")
-                commands.append(f"mv '{tmp_png}' '{dest_png}'")
-                commands.append(f"chmod 644 '{dest_png}'")
-                tmp_files_to_remove.append(tmp_png)
-
-        if data.get("progress-style") == "circle":
-            p_bg = data.get("progress-bg-color", "white")
-            p_fg = data.get("progress-color", "red")
-            circle_files = self.generate_circle_assets_tmp(p_bg, p_fg)
-            if circle_files:
-                dest_c = os.path.join(theme_dir, "c_center.png")
-                dest_t = os.path.join(theme_dir, "c_tick.png")
-                commands.append(f"mv '{circle_files['center']}' '{dest_c}'")
-                commands.append(f"mv '{circle_files['tick']}' '{dest_t}'")
-                commands.append(f"chmod 644 '{dest_c}' '{dest_t}'")
-                tmp_files_to_remove.append(circle_files['center'])
-                tmp_files_to_remove.append(circle_files['tick'])
-
-        content = save_theme(self.theme_path, data)
-        if content:
-            fd, tmp_txt = tempfile.mkstemp(suffix=".txt")
-            os.write(fd, content.encode())
-            os.close(fd)
-            commands.append(f"cat '{tmp_txt}' > '{self.theme_path}'")
-            tmp_files_to_remove.append(tmp_txt)
-
-        if not commands: return
-
-        full_cmd = " && ".join(commands)
-        print(f"Executing Bundle: {full_cmd}") 
-        
-        try:
-            subprocess.run(["pkexec", "sh", "-c", full_cmd], check=True)
-            self.show_toast("Theme saved successfully!")
-            for f in tmp_files_to_remove: 
-                if os.path.exists(f): os.remove(f)
-        except Exception as e: 
-            self.show_toast(f"Error: {e}")
-    
     def show_toast(self, msg): self.toast_overlay.add_toast(Adw.Toast.new(msg))
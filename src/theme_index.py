@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+from src.system import CACHE_DIR
+
+THEMES_DIR = "/boot/grub/themes"
+INDEX_PATH = os.path.join(CACHE_DIR, "themes.json")
+THUMB_DIR = os.path.join(CACHE_DIR, "thumbnails")
+INDEX_VERSION = 1
+THUMB_SIZE = (1024, 768)
+THUMB_WIDTH = 96
+FALLBACK_THEME = "GrubTamer"
+
+
+def _theme_key(theme_dir):
+    """Cheap change detector: mtimes of the directory and its theme.txt."""
+    key = [os.stat(theme_dir).st_mtime_ns]
+    try: key.append(os.stat(os.path.join(theme_dir, "theme.txt")).st_mtime_ns)
+    except FileNotFoundError: key.append(None)
+    return key
+
+
+def _asset_bytes(theme_dir):
+    total = 0
+    for dirpath, _, files in os.walk(theme_dir):
+        for name in files:
+            try: total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError: pass
+    return total
+
+
+def scan_theme(name, themes_dir=THEMES_DIR):
+    """Builds the index entry of one theme directory, or None if it has no theme.txt."""
+    theme_dir = os.path.join(themes_dir, name)
+    theme_file = os.path.join(theme_dir, "theme.txt")
+    if not os.path.isdir(theme_dir) or not os.path.isfile(theme_file): return None
+    key = _theme_key(theme_dir)
+    return {"name": name, "path": theme_file, "key": key, "mtime": os.stat(theme_file).st_mtime,
+            "asset_bytes": _asset_bytes(theme_dir), "thumbnail": None}
+
+
+class ThemeIndex:
+    """Persistent index of installed themes (name, path, mtime, asset size, thumbnail).
+
+    refresh() only rescans themes whose directory or theme.txt changed, so with
+    nothing new opening the theme list is a handful of stat() calls.
+    """
+
+    def __init__(self, themes_dir=THEMES_DIR, index_path=INDEX_PATH):
+        self.themes_dir = themes_dir
+        self.index_path = index_path
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r') as f: cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get("version") == INDEX_VERSION and cached.get("themes_dir") == self.themes_dir:
+            self.entries = cached.get("themes", {})
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({"version": INDEX_VERSION, "themes_dir": self.themes_dir, "themes": self.entries}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Could not write theme index: {e}")
+
+    def refresh(self, names=None, force=False):
+        """Rescans the given theme names (default: all) if they changed. Returns the names that did."""
+        if names is None:
+            try: names = set(os.listdir(self.themes_dir)) | set(self.entries)
+            except OSError: names = set(self.entries)
+        changed = []
+        for name in names:
+            old = self.entries.get(name)
+            theme_dir = os.path.join(self.themes_dir, name)
+            try: unchanged = old is not None and not force and _theme_key(theme_dir) == old["key"]
+            except OSError: unchanged = False
+            if unchanged: continue
+            entry = scan_theme(name, self.themes_dir)
+            # Assets may have changed too, so the old thumbnail is dropped either way
+            if old and old.get("thumbnail") and os.path.exists(old["thumbnail"]): os.remove(old["thumbnail"])
+            if entry is None:
+                if self.entries.pop(name, None) is not None: changed.append(name)
+                continue
+            self.entries[name] = entry
+            changed.append(name)
+        if changed: self.save()
+        return sorted(changed)
+
+    def themes(self):
+        """All indexed themes sorted by name. Falls back to the bundled theme name when empty."""
+        if not self.entries:
+            return [{"name": FALLBACK_THEME, "path": os.path.join(self.themes_dir, FALLBACK_THEME, "theme.txt"),
+                     "key": None, "mtime": 0, "asset_bytes": 0, "thumbnail": None}]
+        return [self.entries[name] for name in sorted(self.entries, key=str.lower)]
+
+    def thumbnail(self, name):
+        """Returns the cached thumbnail path of a theme if it is still current."""
+        entry = self.entries.get(name)
+        thumb = entry.get("thumbnail") if entry else None
+        return thumb if thumb and os.path.exists(thumb) else None
+
+    def set_thumbnail(self, name, thumb):
+        entry = self.entries.get(name)
+        if entry is None: return
+        old = entry.get("thumbnail")
+        if old and old != thumb and os.path.exists(old): os.remove(old)
+        entry["thumbnail"] = thumb
+        self.save()
+
+
+def render_thumbnail(entry):
+    """Renders a small preview of an index entry into the thumbnail cache and returns its path.
+
+    Slow: call it off the main thread and hand the result to ThemeIndex.set_thumbnail().
+    Returns None when the theme can't be drawn (or python3-cairo is missing).
+    """
+    from src.theme_render import render_theme, HAS_CAIRO
+    if not HAS_CAIRO or not entry.get("key"): return None
+    digest = hashlib.sha1(json.dumps([entry["path"], entry["key"]]).encode()).hexdigest()[:16]
+    thumb = os.path.join(THUMB_DIR, f"{digest}.png")
+    if os.path.exists(thumb): return thumb
+    result = render_theme(entry["path"], thumb, THUMB_SIZE, THUMB_WIDTH)
+    if not result["ok"]:
+        print(f"Thumbnail for {entry['name']} failed: {result['error']}")
+        return None
+    return thumb
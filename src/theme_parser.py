@@ -1,5 +1,6 @@
 import os
 import re
+from src.trace import span
 
 # Expanded Global Properties
 # "virtual": True means "Don't write this as key="val" at the top of the file"
@@ -46,6 +47,29 @@ THEME_GLOBALS = {
         "desc": "Text color of the highlighted entry.", 
         "virtual": True 
     },
+    "selected-item-bg-color": {
+        "label": "Selected Item Background",
+        "type": "color",
+        "group": "Boot Menu Styling",
+        "desc": "Highlight behind the selected entry (generated as select_*.png).",
+        "virtual": True
+    },
+    "box-corner-radius": {
+        "label": "Corner Radius",
+        "type": "dropdown",
+        "group": "Boot Menu Styling",
+        "options": ["0", "2", "4", "6", "8", "12", "16"],
+        "desc": "Rounded corners of the menu box and highlight, in pixels at 768p.",
+        "virtual": True
+    },
+    "box-border-width": {
+        "label": "Border Width",
+        "type": "dropdown",
+        "group": "Boot Menu Styling",
+        "options": ["0", "1", "2", "3", "4"],
+        "desc": "Border drawn around the menu box in the border color.",
+        "virtual": True
+    },
     
     # --- GROUP: Footer Text ---
     "message-font": {"label": "Message Font", "type": "font", "group": "Footer Text", "desc": "Font used for footer messages."},
@@ -76,172 +100,430 @@ POSITION_MAP = {
     "Southwest": ("5%", "55%"), "South": ("25%", "55%"),  "Southeast": ("45%", "55%"),
 }
 
-def parse_theme(theme_path):
-    """Parses a GRUB theme.txt file."""
+# Theme values that name a font, global and per component
+FONT_KEYS = ("title-font", "terminal-font", "message-font")
+FONT_PROPS = ("font", "item_font", "selected_item_font")
+
+# Virtual values GRUB has no property for are kept in '# key: "value"' comments
+PERSISTED_KEYS = ("box-bg-color", "selected-item-bg-color", "box-corner-radius", "box-border-width")
+PERSISTED_RE = re.compile(r'^#\s*([a-z-]+)\s*:\s*"?([^"]*)"?')
+
+# --- AST ---
+# A theme.txt is parsed in one pass into nested dicts:
+#   document:  {"kind": "document", "children": [...], "errors": [(line, msg)], "source": text}
+#   property:  {"kind": "property", "name", "value", "quoted", "span", "value_span", "line"}
+#   component: {"kind": "component", "type", "children": [...], "span", "body_end", "line"}
+#   comment:   {"kind": "comment", "text", "span", "line"}
+# Spans are (start, end) character offsets into the source, so edits can be applied in place.
+
+NAME_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-")
+NEXT_PROPERTY_RE = re.compile(r'[ \t]+[A-Za-z0-9_-]+[ \t]*[:=]')
+
+
+def parse_theme_ast(text):
+    """Tokenizes and parses theme.txt source into an AST in a single linear pass."""
+    n = len(text)
+    doc = {"kind": "document", "children": [], "errors": [], "source": text, "span": (0, n)}
+    stack = [doc]
+    pos, line = 0, 1
+
+    def read_name(p):
+        start = p
+        while p < n and text[p] in NAME_CHARS: p += 1
+        return text[start:p], p
+
+    while pos < n:
+        ch = text[pos]
+        if ch == '\n':
+            line += 1; pos += 1
+        elif ch in ' \t\r':
+            pos += 1
+        elif ch == '#':
+            end = text.find('\n', pos)
+            if end == -1: end = n
+            stack[-1]["children"].append({"kind": "comment", "text": text[pos:end], "span": (pos, end), "line": line})
+            pos = end
+        elif ch == '+':
+            start, start_line = pos, line
+            pos += 1
+            while pos < n and text[pos] in ' \t': pos += 1
+            comp_type, pos = read_name(pos)
+            while pos < n and text[pos] in ' \t\r\n':
+                if text[pos] == '\n': line += 1
+                pos += 1
+            if not comp_type or pos >= n or text[pos] != '{':
+                doc["errors"].append((start_line, f"expected '+ type {{' but found {text[start:pos + 1]!r}"))
+                continue
+            pos += 1
+            node = {"kind": "component", "type": comp_type, "children": [], "span": (start, None),
+                    "body_end": None, "line": start_line}
+            stack[-1]["children"].append(node)
+            stack.append(node)
+        elif ch == '}':
+            if len(stack) > 1:
+                node = stack.pop()
+                node["body_end"] = pos
+                node["span"] = (node["span"][0], pos + 1)
+            else:
+                doc["errors"].append((line, "unmatched '}'"))
+            pos += 1
+        else:
+            start = pos
+            name, pos = read_name(pos)
+            while pos < n and text[pos] in ' \t': pos += 1
+            if not name or pos >= n or text[pos] not in ':=':
+                end = text.find('\n', start)
+                if end == -1: end = n
+                doc["errors"].append((line, f"cannot parse {text[start:end].strip()!r}"))
+                pos = max(end, start + 1)
+                continue
+            pos += 1
+            while pos < n and text[pos] in ' \t': pos += 1
+            value_start = pos
+            if pos < n and text[pos] == '"':
+                close = text.find('"', pos + 1)
+                if close == -1:
+                    doc["errors"].append((line, f"unterminated string for {name}"))
+                    value, pos = text[pos + 1:], n
+                else:
+                    value, pos = text[pos + 1:close], close + 1
+                quoted = True
+            else:
+                # Bare values run to the end of the line, a closing brace, or the next "name =" on the same line
+                while pos < n and text[pos] not in '\n}':
+                    if text[pos] in ' \t' and NEXT_PROPERTY_RE.match(text, pos): break
+                    pos += 1
+                while pos > value_start and text[pos - 1] in ' \t\r': pos -= 1
+                value, quoted = text[value_start:pos], False
+            stack[-1]["children"].append({"kind": "property", "name": name, "value": value, "quoted": quoted,
+                                          "span": (start, pos), "value_span": (value_start, pos), "line": line})
+            line += value.count('\n') if quoted else 0
+
+    for node in stack[1:]:
+        doc["errors"].append((node["line"], f"'+ {node['type']}' is never closed"))
+        node["body_end"] = n
+        node["span"] = (node["span"][0], n)
+    return doc
+
+
+def read_theme_ast(theme_path):
+    """Parses a theme.txt file into an AST, or returns None if it does not exist."""
+    if not os.path.exists(theme_path): return None
+    with span("parse.theme", path=theme_path):
+        with open(theme_path, 'r') as f: return parse_theme_ast(f.read())
+
+
+def iter_components(node, depth=0):
+    """Yields (component, depth) for every component in the tree, depth first."""
+    for child in node["children"]:
+        if child["kind"] == "component":
+            yield child, depth
+            yield from iter_components(child, depth + 1)
+
+
+def component_props(component):
+    """Returns a component's own properties as {name: value}."""
+    return {c["name"]: c["value"] for c in component["children"] if c["kind"] == "property"}
+
+
+def find_component(doc, comp_type, prefer_id=None):
+    """Returns the first component of a type, preferring one with the given id."""
+    found = None
+    for comp, _ in iter_components(doc):
+        if comp["type"] != comp_type: continue
+        if prefer_id is None or component_props(comp).get("id") == prefer_id: return comp
+        found = found or comp
+    return found
+
+
+def theme_properties(doc):
+    """Derives the editor's flat property dict from a parsed theme."""
     properties = {}
-    if not os.path.exists(theme_path): return {}
+    for node in doc["children"]:
+        if node["kind"] == "property" and node["name"] in THEME_GLOBALS:
+            properties[node["name"]] = node["value"]
+        # FIX: Check for our hidden comments to restore state
+        elif node["kind"] == "comment":
+            match = PERSISTED_RE.match(node["text"])
+            if match and match.group(1) in PERSISTED_KEYS: properties[match.group(1)] = match.group(2)
+
+    if find_component(doc, "circular_progress"):
+        properties["progress-style"] = "circle"
+
+    pb = find_component(doc, "progress_bar", prefer_id="__timeout__")
+    if pb:
+        props = component_props(pb)
+        if "fg_color" in props: properties["progress-color"] = props["fg_color"]
+        if "bg_color" in props: properties["progress-bg-color"] = props["bg_color"]
+        properties["progress-style"] = "bar"
+
+    bm = find_component(doc, "boot_menu")
+    if bm:
+        props = component_props(bm)
+        l_val, t_val = props.get("left", ""), props.get("top", "")
+        for name, coords in POSITION_MAP.items():
+            if coords[0] == l_val and coords[1] == t_val:
+                properties["menu-position"] = name
+                break
+        if "item_color" in props: properties["box-border-color"] = props["item_color"]
+        if "selected_item_color" in props: properties["selected-item-color"] = props["selected_item_color"]
 
-    try:
-        with open(theme_path, 'r') as f:
-            content = f.read()
-
-        for line in content.splitlines():
-            line = line.strip()
-            if not line: continue
-            
-            # FIX: Check for our hidden comments to restore state
-            if line.startswith('# box-bg-color:'):
-                 match = re.match(r'^#\s*box-bg-color\s*:\s*"?([^"]*)"?', line)
-                 if match: properties["box-bg-color"] = match.group(1)
-                 continue
-
-            if line.startswith('#'): continue
-
-            match = re.match(r'^([\w\-]+)\s*:\s*"?([^"]*)"?', line)
-            if match:
-                key = match.group(1)
-                val = match.group(2)
-                if key in THEME_GLOBALS:
-                    properties[key] = val
-
-        # Parse Blocks
-        cp_match = re.search(r'\+\s*circular_progress\s*\{(.*?)\}', content, re.DOTALL)
-        if cp_match:
-            properties["progress-style"] = "circle"
-
-        pb_match = re.search(r'\+\s*progress_bar\s*\{(.*?)\}', content, re.DOTALL)
-        if pb_match:
-            block = pb_match.group(1)
-            if m := re.search(r'fg_color\s*=\s*"?([^"\n]*)"?', block): properties["progress-color"] = m.group(1)
-            if m := re.search(r'bg_color\s*=\s*"?([^"\n]*)"?', block): properties["progress-bg-color"] = m.group(1)
-            properties["progress-style"] = "bar"
-
-        bm_match = re.search(r'\+\s*boot_menu\s*\{(.*?)\}', content, re.DOTALL)
-        if bm_match:
-            block = bm_match.group(1)
-            left_m = re.search(r'left\s*=\s*"?([\d%]+)"?', block)
-            top_m = re.search(r'top\s*=\s*"?([\d%]+)"?', block)
-            if left_m and top_m:
-                l_val, t_val = left_m.group(1), top_m.group(1)
-                for name, coords in POSITION_MAP.items():
-                    if coords[0] == l_val and coords[1] == t_val:
-                        properties["menu-position"] = name
-                        break
-            if m := re.search(r'item_color\s*=\s*"?([^"\n]*)"?', block):
-                properties["box-border-color"] = m.group(1) 
-            if m := re.search(r'selected_item_color\s*=\s*"?([^"\n]*)"?', block):
-                properties["selected-item-color"] = m.group(1) 
-
-    except Exception as e: print(f"Error parsing theme: {e}")
     return properties
 
-def save_theme(theme_path, data_dict):
-    if not os.path.exists(theme_path): return None
 
+def parse_theme(theme_path):
+    """Parses a GRUB theme.txt file."""
     try:
-        with open(theme_path, 'r') as f: content = f.read()
+        doc = read_theme_ast(theme_path)
+        return theme_properties(doc) if doc else {}
+    except Exception as e:
+        print(f"Error parsing theme: {e}")
+        return {}
 
-        # 1. Prepare Block Content
-        style = data_dict.get("progress-style", "bar")
-        p_color = data_dict.get("progress-color", "#ffffff")
-        p_bg = data_dict.get("progress-bg-color", "#333333")
-        
-        new_progress_block = ""
-        if style == "circle":
-            new_progress_block = f"""
-+ circular_progress {{
-    id = "__timeout__"
-    left = 50%
-    top = 90%
-    width = 60
-    height = 60
-    center_bitmap = "c_center.png"
-    tick_bitmap = "c_tick.png"
-    num_ticks = 100
-    start_angle = 0
-    ticks_disappear = false
+# --- SAVE ---
+# Blocks appended when a theme has no component to edit yet
+BOOT_MENU_TEMPLATE = """+ boot_menu {{
+    left = {left}
+    top = {top}
+    width = 50%
+    height = 40%
+    item_color = "{item_color}"
+    selected_item_color = "{selected_item_color}"
+    menu_pixmap_style = "menu_*.png"
+    item_height = 30
+    item_spacing = 10
+    icon_width = 32
+    icon_height = 32
 }}
 """
-        else:
-            new_progress_block = f"""
-+ progress_bar {{
+
+PROGRESS_BAR_TEMPLATE = """+ progress_bar {{
     id = "__timeout__"
     left = 15%
     top = 90%
     width = 70%
     height = 20
-    fg_color = "{p_color}"
-    bg_color = "{p_bg}"
-    border_color = "{p_color}"
+    fg_color = "{fg}"
+    bg_color = "{bg}"
+    border_color = "{fg}"
     text = "@TIMEOUT_NOTIFICATION_LONG@"
     font = "Sans Regular 12"
     text_color = "#ffffff"
 }}
 """
 
-        left_val, top_val = "25%", "30%"
-        if "menu-position" in data_dict and data_dict["menu-position"] in POSITION_MAP:
-             left_val, top_val = POSITION_MAP[data_dict["menu-position"]]
-        
-        normal_color = data_dict.get("box-border-color", "#ffffff")
-        sel_color = data_dict.get("selected-item-color", "#000000")
-
-        new_boot_menu = f"""
-+ boot_menu {{
-    left = {left_val}
-    top = {top_val}
-    width = 50%
-    height = 40%
-    item_color = "{normal_color}"
-    selected_item_color = "{sel_color}"
-    menu_pixmap_style = "menu_*.png"
-    item_height = 30
-    item_spacing = 10
-    icon_width = 32
-    icon_height = 32
+CIRCULAR_PROGRESS_TEMPLATE = """+ circular_progress {{
+    id = "__timeout__"
+    left = 50%
+    top = 90%
+    width = {size}
+    height = {size}
+    center_bitmap = "c_center.png"
+    tick_bitmap = "c_tick.png"
+    num_ticks = 100
+    start_angle = 0
+    ticks_disappear = false
 }}
 """
 
-        # 2. Rebuild File
-        lines = content.splitlines()
-        new_lines = []
-        processed_keys = set()
-
-        for line in lines:
-            stripped = line.strip()
-            # Remove existing meta-comments to avoid duplicates
-            if stripped.startswith('# box-bg-color:'): continue
-
-            match = re.match(r'^([\w\-]+)\s*:\s*"?([^"]*)"?', stripped)
-            if match and not stripped.startswith('#') and '{' not in stripped:
-                key = match.group(1)
-                if key in data_dict and key in THEME_GLOBALS and not THEME_GLOBALS[key].get("virtual"):
-                    new_lines.append(f'{key}: "{data_dict[key]}"')
-                    processed_keys.add(key)
-                elif key in THEME_GLOBALS and THEME_GLOBALS[key].get("virtual"): pass 
-                else: new_lines.append(line)
-            else: new_lines.append(line)
+# Size of the generated c_center.png at 768p; it is scaled with the screen resolution
+CIRCLE_SIZE = 60
 
-        # Write Persistence Comments
-        if "box-bg-color" in data_dict:
-             new_lines.append(f'# box-bg-color: "{data_dict["box-bg-color"]}"')
+BARE_NUMBER_RE = re.compile(r'^-?[\d.]+%?([+-][\d.]+)?$')
+
+
+class ThemeEditor:
+    """Collects in-place edits against a parsed theme and applies them in one go.
+
+    Everything not explicitly changed (other components, geometry, comments,
+    formatting) is left byte-for-byte as the author wrote it.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.source = doc["source"]
+        self.edits = []  # (start, end, replacement)
+        self.replaced = []  # spans of whole components being replaced
+
+    def replace(self, start, end, text):
+        self.edits.append((start, end, text))
 
-        for key, val in data_dict.items():
+    def _line_start(self, pos):
+        return self.source.rfind('\n', 0, pos) + 1
+
+    @staticmethod
+    def _format(value, quoted):
+        if quoted or not BARE_NUMBER_RE.match(value): return f'"{value}"'
+        return value
+
+    def set_global(self, name, value):
+        nodes = [c for c in self.doc["children"] if c["kind"] == "property" and c["name"] == name]
+        if nodes:
+            node = nodes[-1]
+            if node["value"] != value: self.replace(*node["value_span"], f'"{value}"')
+            return
+        # New globals go after the last existing one (or at the very top)
+        props = [c for c in self.doc["children"] if c["kind"] == "property"]
+        if props:
+            end = props[-1]["span"][1]
+            self.replace(end, end, f'\n{name}: "{value}"')
+        else:
+            self.replace(0, 0, f'{name}: "{value}"\n')
+
+    def remove_node(self, node):
+        start = self._line_start(node["span"][0])
+        end = self.source.find('\n', node["span"][1])
+        end = len(self.source) if end == -1 else end + 1
+        self.replace(start, end, "")
+
+    def set_comment(self, prefix, text):
+        for node in self.doc["children"]:
+            if node["kind"] == "comment" and re.match(rf'^#\s*{re.escape(prefix)}\s*:', node["text"]):
+                if node["text"] != text: self.replace(*node["span"], text)
+                return
+        end = len(self.source)
+        self.replace(end, end, ("" if self.source.endswith("\n") or not self.source else "\n") + text + "\n")
+
+    def set_prop(self, comp, name, value):
+        if any(s <= comp["span"][0] and comp["span"][1] <= e for s, e in self.replaced): return
+        for child in comp["children"]:
+            if child["kind"] == "property" and child["name"] == name:
+                if child["value"] != value: self.replace(*child["value_span"], self._format(value, child["quoted"]))
+                return
+        # Insert as a new line before the closing brace, matching the block's indentation
+        props = [c for c in comp["children"] if c["kind"] == "property"]
+        if props:
+            first = props[0]["span"][0]
+            indent = self.source[self._line_start(first):first]
+            if indent.strip(): indent = "    "
+        else:
+            indent = "    "
+        body_end = comp["body_end"]
+        line_start = self._line_start(body_end)
+        if self.source[line_start:body_end].strip():
+            self.replace(body_end, body_end, f" {name} = {self._format(value, False)} ")
+        else:
+            self.replace(line_start, line_start, f"{indent}{name} = {self._format(value, False)}\n")
+
+    def replace_component(self, comp, text):
+        self.replaced.append(comp["span"])
+        start, end = comp["span"]
+        if text.endswith("\n") and self.source[end:end + 1] == "\n": text = text[:-1]
+        self.replace(start, end, text)
+
+    def append_block(self, text):
+        end = len(self.source)
+        sep = "" if not self.source else ("\n" if self.source.endswith("\n") else "\n\n")
+        self.replace(end, end, sep + text)
+
+    def render(self):
+        out = self.source
+        # Apply back to front; inserts at the same offset keep the order they were made in
+        ordered = sorted(enumerate(self.edits), key=lambda e: (e[1][0], e[1][1], e[0]), reverse=True)
+        for _, (start, end, text) in ordered:
+            # Property edits inside a component that is being replaced wholesale are dropped
+            if (start, end) not in self.replaced and any(s <= start and end <= e and (s, e) != (start, end)
+                                                         for s, e in self.replaced):
+                continue
+            out = out[:start] + text + out[end:]
+        return out
+
+
+def save_theme(theme_path, data_dict, baseline=None, scale=None, font_names=None):
+    """Returns theme.txt content with data_dict applied in place.
+
+    Only values that differ from baseline (by default, what the file itself
+    says) are touched. If nothing changed, the original content is returned
+    unchanged, so the diff is empty. scale is the HiDPI factor generated assets
+    are drawn at; when given, our circular progress is resized to match.
+    font_names maps font descriptions to the exact names of the compiled .pf2
+    fonts; matching global values and component font properties are rewritten.
+    """
+    if not os.path.exists(theme_path): return None
+
+    try:
+        with open(theme_path, 'r') as f: content = f.read()
+        doc = parse_theme_ast(content)
+        if baseline is None: baseline = theme_properties(doc)
+        font_names = font_names or {}
+        data_dict = {k: font_names.get(v, v) if k in FONT_KEYS else v for k, v in data_dict.items()}
+        changed = {k: v for k, v in data_dict.items() if baseline.get(k) != v}
+        ed = ThemeEditor(doc)
+
+        # 1. Globals. Virtual keys never belong at the top level (GRUB refuses them)
+        for node in doc["children"]:
+            if node["kind"] == "property" and THEME_GLOBALS.get(node["name"], {}).get("virtual"):
+                ed.remove_node(node)
+        for key, val in changed.items():
             if key in THEME_GLOBALS and not THEME_GLOBALS[key].get("virtual"):
-                if key not in processed_keys: new_lines.append(f'{key}: "{val}"')
+                ed.set_global(key, val)
 
-        final_content = "\n".join(new_lines) + "\n"
+        # Write Persistence Comments
+        for key in PERSISTED_KEYS:
+            if key in changed: ed.set_comment(key, f'# {key}: "{changed[key]}"')
+
+        for comp, _ in iter_components(doc):
+            for name, value in component_props(comp).items():
+                if name in FONT_PROPS and font_names.get(value, value) != value: ed.set_prop(comp, name, font_names[value])
+
+        # 2. Boot menu
+        # A theme without a boot_menu/progress block only gets one once those values are edited;
+        # the editor always supplies them, so their mere presence says nothing
+        box_keys = {"box-bg-color", "box-corner-radius", "box-border-width"}
+        menu_keys = {"menu-position", "box-border-color", "selected-item-color", "selected-item-bg-color"} | box_keys
+        bm = find_component(doc, "boot_menu")
+        if menu_keys & changed.keys():
+            left_val, top_val = POSITION_MAP.get(data_dict.get("menu-position"), ("25%", "30%"))
+            if bm is None:
+                block = BOOT_MENU_TEMPLATE.format(
+                    left=left_val, top=top_val,
+                    item_color=data_dict.get("box-border-color", "#ffffff"),
+                    selected_item_color=data_dict.get("selected-item-color", "#000000"))
+                if "selected-item-bg-color" in data_dict:
+                    block = block.replace("    item_height", '    selected_item_pixmap_style = "select_*.png"\n    item_height')
+                ed.append_block(block)
+            else:
+                if "menu-position" in changed and changed["menu-position"] in POSITION_MAP:
+                    ed.set_prop(bm, "left", left_val)
+                    ed.set_prop(bm, "top", top_val)
+                if "box-border-color" in changed: ed.set_prop(bm, "item_color", changed["box-border-color"])
+                if "selected-item-color" in changed:
+                    ed.set_prop(bm, "selected_item_color", changed["selected-item-color"])
+                if box_keys & changed.keys() and "menu_pixmap_style" not in component_props(bm):
+                    ed.set_prop(bm, "menu_pixmap_style", "menu_*.png")
+                if "selected-item-bg-color" in changed and "selected_item_pixmap_style" not in component_props(bm):
+                    ed.set_prop(bm, "selected_item_pixmap_style", "select_*.png")
 
-        # 3. Replace Blocks
-        final_content = re.sub(r'\+\s*progress_bar\s*\{(.*?)\}', '', final_content, flags=re.DOTALL)
-        final_content = re.sub(r'\+\s*circular_progress\s*\{(.*?)\}', '', final_content, flags=re.DOTALL)
-        final_content = re.sub(r'\+\s*boot_menu\s*\{(.*?)\}', '', final_content, flags=re.DOTALL)
-        
-        final_content = final_content.strip() + "\n\n"
-        final_content += new_boot_menu
-        final_content += new_progress_block
+        # 3. Progress indicator
+        style = data_dict.get("progress-style", "bar")
+        p_color = data_dict.get("progress-color", "#ffffff")
+        p_bg = data_dict.get("progress-bg-color", "#333333")
+        bar = find_component(doc, "progress_bar", prefer_id="__timeout__")
+        circle = find_component(doc, "circular_progress", prefer_id="__timeout__")
+        circle_size = str(round(CIRCLE_SIZE * (scale or 1)))
+        if {"progress-style", "progress-color", "progress-bg-color"} & changed.keys():
+            if style == "circle":
+                if circle is None:
+                    block = CIRCULAR_PROGRESS_TEMPLATE.format(size=circle_size)
+                    if bar: ed.replace_component(bar, block)
+                    else: ed.append_block(block)
+            else:
+                if bar is None:
+                    block = PROGRESS_BAR_TEMPLATE.format(fg=p_color, bg=p_bg)
+                    if circle: ed.replace_component(circle, block)
+                    else: ed.append_block(block)
+                else:
+                    if "progress-color" in changed:
+                        ed.set_prop(bar, "fg_color", p_color)
+                        if component_props(bar).get("border_color") == baseline.get("progress-color"):
+                            ed.set_prop(bar, "border_color", p_color)
+                    if "progress-bg-color" in changed: ed.set_prop(bar, "bg_color", p_bg)
+        # Our ring is drawn at the screen's scale, so the component has to be as big as the bitmap
+        if scale and style == "circle" and circle and component_props(circle).get("center_bitmap") == "c_center.png":
+            ed.set_prop(circle, "width", circle_size)
+            ed.set_prop(circle, "height", circle_size)
 
-        return final_content
+        return ed.render()
 
     except Exception as e:
         print(f"Error preparing save: {e}")
@@ -0,0 +1,421 @@
+"""Offscreen GRUB theme renderer: draws a theme.txt into a PNG with pycairo, no display needed.
+
+    python3 -m src.theme_render /boot/grub/themes/X/theme.txt -o x.png --size 1920x1080
+    python3 -m src.theme_render --batch /boot/grub/themes -o thumbs/ --thumb-width 320 -j 8
+
+Batch mode renders every <dir>/theme.txt under the given directory in a process pool.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.theme_parser import read_theme_ast, component_props
+
+try:
+    import cairo
+    HAS_CAIRO = True
+except ImportError:
+    HAS_CAIRO = False
+
+THEMES_DIR = "/boot/grub/themes"
+DEFAULT_SIZE = (1920, 1080)
+
+# What the menu shows in a rendered preview
+SAMPLE_ENTRIES = ["Ubuntu", "Advanced options for Ubuntu", "Windows Boot Manager", "UEFI Firmware Settings"]
+SAMPLE_TEXT = {
+    "@TIMEOUT_NOTIFICATION_LONG@": "The highlighted entry will be executed automatically in 5s.",
+    "@TIMEOUT_NOTIFICATION_MIDDLE@": "Booting in 5s",
+    "@TIMEOUT_NOTIFICATION_SHORT@": "5s",
+    "@KEYMAP_LONG@": "Use the ↑ and ↓ keys to select which entry is highlighted.",
+    "@KEYMAP_MIDDLE@": "Use the ↑ and ↓ keys to select an entry.",
+    "@KEYMAP_SHORT@": "↑↓ to select",
+}
+SAMPLE_PROGRESS = 0.6
+
+# The subset of GRUB's (SVG) colour names themes actually use
+NAMED_COLORS = {
+    "black": (0, 0, 0), "white": (255, 255, 255), "red": (255, 0, 0), "green": (0, 128, 0),
+    "blue": (0, 0, 255), "yellow": (255, 255, 0), "cyan": (0, 255, 255), "magenta": (255, 0, 255),
+    "grey": (128, 128, 128), "gray": (128, 128, 128), "lightgrey": (211, 211, 211), "lightgray": (211, 211, 211),
+    "darkgrey": (169, 169, 169), "darkgray": (169, 169, 169), "silver": (192, 192, 192),
+    "orange": (255, 165, 0), "purple": (128, 0, 128), "navy": (0, 0, 128), "maroon": (128, 0, 0),
+    "teal": (0, 128, 128), "olive": (128, 128, 0), "lime": (0, 255, 0), "transparent": (0, 0, 0, 0),
+}
+
+EXPR_RE = re.compile(r'^\s*(-?[\d.]+)(%?)\s*(?:([+-])\s*([\d.]+))?\s*$')
+FONT_STYLE_WORDS = {"regular", "bold", "italic", "oblique", "book", "medium", "light"}
+
+
+def parse_color(value, fallback=(1.0, 1.0, 1.0, 1.0)):
+    """Parses a GRUB colour (#rgb, #rrggbb(aa), rgb()/rgba(), "r, g, b" or a name) into cairo rgba."""
+    if not value: return fallback
+    value = value.strip().strip('"').strip().lower()
+    try:
+        if value.startswith('#'):
+            h = value[1:]
+            if len(h) in (3, 4): h = "".join(c * 2 for c in h)
+            if len(h) not in (6, 8): return fallback
+            parts = [int(h[i:i + 2], 16) / 255 for i in range(0, len(h), 2)]
+            return tuple(parts) if len(parts) == 4 else tuple(parts) + (1.0,)
+        if value in NAMED_COLORS:
+            c = NAMED_COLORS[value]
+            return (c[0] / 255, c[1] / 255, c[2] / 255, c[3] if len(c) == 4 else 1.0)
+        nums = [float(x) for x in re.sub(r'^rgba?\(|\)$', '', value).split(',')]
+        if len(nums) in (3, 4):
+            alpha = nums[3] if len(nums) == 4 else 1.0
+            if alpha > 1: alpha /= 255
+            return (nums[0] / 255, nums[1] / 255, nums[2] / 255, alpha)
+    except ValueError:
+        pass
+    return fallback
+
+
+def resolve(expr, total, default=0):
+    """Evaluates a GRUB geometry expression ("10", "50%", "50%-20") against the parent size."""
+    m = EXPR_RE.match(str(expr or ""))
+    if not m: return default
+    base = float(m.group(1))
+    if m.group(2): base = total * base / 100
+    if m.group(3): base += float(m.group(4)) * (1 if m.group(3) == '+' else -1)
+    return int(base)
+
+
+def parse_font(value, default_size=16):
+    """Turns a GRUB font name ("DejaVu Sans Bold 14") into (family, bold, italic, px size)."""
+    words = (value or "").strip('"').split()
+    size = default_size
+    if words and words[-1].isdigit(): size = int(words.pop())
+    styles = {w.lower() for w in words if w.lower() in FONT_STYLE_WORDS}
+    family = " ".join(w for w in words if w.lower() not in FONT_STYLE_WORDS) or "Sans"
+    return family, "bold" in styles, bool(styles & {"italic", "oblique"}), size
+
+
+def load_image(path):
+    """Loads an image into a cairo surface. PNG is native; other formats need GdkPixbuf (no display required)."""
+    if not path or not os.path.isfile(path): return None
+    try:
+        if path.lower().endswith(".png"): return cairo.ImageSurface.create_from_png(path)
+        import gi
+        gi.require_version('GdkPixbuf', '2.0')
+        # noinspection PyUnresolvedReferences
+        from gi.repository import GdkPixbuf
+        ok, data = GdkPixbuf.Pixbuf.new_from_file(path).save_to_bufferv("png", [], [])
+        return cairo.ImageSurface.create_from_png(io.BytesIO(data)) if ok else None
+    except Exception as e:
+        print(f"Cannot load image {path}: {e}", file=sys.stderr)
+        return None
+
+
+class ThemeRenderer:
+    """Draws one parsed theme onto a cairo context at a given resolution."""
+
+    def __init__(self, doc, theme_dir, width, height):
+        self.doc = doc
+        self.theme_dir = theme_dir
+        self.width, self.height = width, height
+        self.globals = {c["name"]: c["value"] for c in doc["children"] if c["kind"] == "property"}
+        self.images = {}
+        self.warnings = []
+
+    def asset(self, name):
+        if not name: return None
+        path = os.path.join(self.theme_dir, name.strip('"'))
+        if path not in self.images:
+            self.images[path] = load_image(path)
+            if self.images[path] is None: self.warnings.append(f"missing or unreadable image: {name}")
+        return self.images[path]
+
+    def pixmap_style(self, pattern, part):
+        # "menu_*.png" -> "menu_c.png"; GRUB's 9-slice pieces are n, ne, e, se, s, sw, w, nw and c
+        if not pattern or '*' not in pattern: return None
+        return self.asset(pattern.strip('"').replace('*', part, 1))
+
+    def render(self, ctx):
+        ctx.set_source_rgba(*parse_color(self.globals.get("desktop-color"), (0, 0, 0, 1)))
+        ctx.paint()
+        bg = self.asset(self.globals.get("desktop-image"))
+        if bg: self.draw_surface(ctx, bg, 0, 0, self.width, self.height)
+
+        title = self.globals.get("title-text", "")
+        if title:
+            self.draw_text(ctx, title, 0, 0, self.width, 0, self.globals.get("title-font"),
+                           self.globals.get("title-color", "white"), align="center", top_margin=10)
+
+        self.draw_children(ctx, self.doc, 0, 0, self.width, self.height)
+
+    def draw_children(self, ctx, node, x, y, w, h):
+        for child in node["children"]:
+            if child["kind"] != "component": continue
+            props = component_props(child)
+            cx = x + resolve(props.get("left"), w)
+            cy = y + resolve(props.get("top"), h)
+            cw = resolve(props.get("width"), w, default=w - (cx - x))
+            ch = resolve(props.get("height"), h, default=h - (cy - y))
+            if props.get("visible", "true").strip('"') == "false": continue
+            draw = getattr(self, "draw_" + child["type"], None)
+            if draw: draw(ctx, child, props, cx, cy, cw, ch)
+            else: self.warnings.append(f"unsupported component: {child['type']}")
+
+    # --- Components ---
+    def draw_canvas(self, ctx, node, props, x, y, w, h):
+        self.draw_children(ctx, node, x, y, w, h)
+
+    def draw_vbox(self, ctx, node, props, x, y, w, h):
+        for child in node["children"]:
+            if child["kind"] != "component": continue
+            cp = component_props(child)
+            ch = resolve(cp.get("height"), h, default=20)
+            draw = getattr(self, "draw_" + child["type"], None)
+            if draw: draw(ctx, child, cp, x, y, resolve(cp.get("width"), w, default=w), ch)
+            y += ch
+
+    def draw_hbox(self, ctx, node, props, x, y, w, h):
+        for child in node["children"]:
+            if child["kind"] != "component": continue
+            cp = component_props(child)
+            cw = resolve(cp.get("width"), w, default=20)
+            draw = getattr(self, "draw_" + child["type"], None)
+            if draw: draw(ctx, child, cp, x, y, cw, resolve(cp.get("height"), h, default=h))
+            x += cw
+
+    def draw_image(self, ctx, node, props, x, y, w, h):
+        img = self.asset(props.get("file"))
+        if img: self.draw_surface(ctx, img, x, y, w, h)
+
+    def draw_label(self, ctx, node, props, x, y, w, h):
+        text = props.get("text", "")
+        text = SAMPLE_TEXT.get(props.get("id", ""), SAMPLE_TEXT.get(text, text))
+        self.draw_text(ctx, text, x, y, w, h, props.get("font"), props.get("color", "black"),
+                       align=props.get("align", "left").strip('"'))
+
+    def draw_boot_menu(self, ctx, node, props, x, y, w, h):
+        self.draw_box(ctx, props.get("menu_pixmap_style"), x, y, w, h,
+                      fallback=parse_color(self.box_fallback(), (0, 0, 0, 0)))
+        item_h = resolve(props.get("item_height"), h, default=42)
+        spacing = resolve(props.get("item_spacing"), h, default=14)
+        padding = resolve(props.get("item_padding"), w, default=14)
+        icon_w = resolve(props.get("icon_width"), w, default=32) if props.get("icon_width") else 0
+        left = x + resolve(props.get("item_icon_space"), w, default=4) + icon_w + padding
+        iy = y + padding
+        for i, entry in enumerate(SAMPLE_ENTRIES):
+            if iy + item_h > y + h: break
+            selected = i == 0
+            if selected:
+                self.draw_box(ctx, props.get("selected_item_pixmap_style"), x + padding, iy, w - 2 * padding, item_h,
+                              fallback=parse_color(self.globals.get("selected-item-bg-color"), (0, 0, 0, 0)))
+            color = props.get("selected_item_color" if selected else "item_color", "white")
+            font = props.get("selected_item_font" if selected else "item_font") or props.get("item_font") \
+                   or self.globals.get("terminal-font")
+            self.draw_text(ctx, entry, left, iy, w - (left - x) - padding, item_h, font, color, valign="center")
+            iy += item_h + spacing
+
+    def draw_progress_bar(self, ctx, node, props, x, y, w, h):
+        if props.get("bar_style"):
+            self.draw_box(ctx, props.get("bar_style"), x, y, w, h)
+            self.draw_box(ctx, props.get("highlight_style"), x, y, int(w * SAMPLE_PROGRESS), h)
+        else:
+            ctx.set_source_rgba(*parse_color(props.get("bg_color"), (0.5, 0.5, 0.5, 1)))
+            ctx.rectangle(x, y, w, h); ctx.fill()
+            ctx.set_source_rgba(*parse_color(props.get("fg_color"), (1, 1, 1, 1)))
+            ctx.rectangle(x, y, w * SAMPLE_PROGRESS, h); ctx.fill()
+            ctx.set_source_rgba(*parse_color(props.get("border_color"), (0, 0, 0, 1)))
+            ctx.set_line_width(1); ctx.rectangle(x + 0.5, y + 0.5, w - 1, h - 1); ctx.stroke()
+        text = props.get("text", "")
+        if text:
+            self.draw_text(ctx, SAMPLE_TEXT.get(text, text), x, y, w, h, props.get("font"),
+                           props.get("text_color", "black"), align="center", valign="center")
+
+    def draw_circular_progress(self, ctx, node, props, x, y, w, h):
+        center = self.asset(props.get("center_bitmap"))
+        if center: self.draw_surface(ctx, center, x, y, w, h)
+        tick = self.asset(props.get("tick_bitmap"))
+        if not tick: return
+        ticks = resolve(props.get("num_ticks"), 0, default=64) or 64
+        start = resolve(props.get("start_angle"), 0, default=-64) * 2 * math.pi / 256
+        tw, th = tick.get_width(), tick.get_height()
+        radius = min(w, h) / 2 - max(tw, th) / 2
+        for i in range(int(ticks * SAMPLE_PROGRESS)):
+            angle = start + 2 * math.pi * i / ticks
+            self.draw_surface(ctx, tick, x + w / 2 + radius * math.cos(angle) - tw / 2,
+                              y + h / 2 + radius * math.sin(angle) - th / 2, tw, th)
+
+    # --- Primitives ---
+    def box_fallback(self):
+        # GrubTamer stores the menu box colour as a comment next to its 1x1 menu_c.png
+        for node in self.doc["children"]:
+            if node["kind"] == "comment":
+                m = re.match(r'^#\s*box-bg-color\s*:\s*"?([^"]*)"?', node["text"])
+                if m: return m.group(1)
+        return None
+
+    def draw_box(self, ctx, pattern, x, y, w, h, fallback=None):
+        """Draws a GRUB styled box: corners and edges at their size, sides and centre stretched."""
+        c = self.pixmap_style(pattern, "c")
+        parts = {p: self.pixmap_style(pattern, p) for p in ("nw", "n", "ne", "w", "e", "sw", "s", "se")}
+        left = max((parts[p].get_width() for p in ("nw", "w", "sw") if parts[p]), default=0)
+        right = max((parts[p].get_width() for p in ("ne", "e", "se") if parts[p]), default=0)
+        top = max((parts[p].get_height() for p in ("nw", "n", "ne") if parts[p]), default=0)
+        bottom = max((parts[p].get_height() for p in ("sw", "s", "se") if parts[p]), default=0)
+        if c is None and not any(parts.values()):
+            if fallback and fallback[3] > 0:
+                ctx.set_source_rgba(*fallback); ctx.rectangle(x, y, w, h); ctx.fill()
+            return
+        cw, ch = max(w - left - right, 0), max(h - top - bottom, 0)
+        cells = {"nw": (x, y, left, top), "n": (x + left, y, cw, top), "ne": (x + left + cw, y, right, top),
+                 "w": (x, y + top, left, ch), "c": (x + left, y + top, cw, ch), "e": (x + left + cw, y + top, right, ch),
+                 "sw": (x, y + top + ch, left, bottom), "s": (x + left, y + top + ch, cw, bottom),
+                 "se": (x + left + cw, y + top + ch, right, bottom)}
+        parts["c"] = c
+        for name, surface in parts.items():
+            if surface: self.draw_surface(ctx, surface, *cells[name])
+
+    @staticmethod
+    def draw_surface(ctx, surface, x, y, w, h):
+        sw, sh = surface.get_width(), surface.get_height()
+        if w <= 0 or h <= 0 or not sw or not sh: return
+        ctx.save()
+        ctx.translate(x, y)
+        ctx.scale(w / sw, h / sh)
+        ctx.set_source_surface(surface, 0, 0)
+        ctx.get_source().set_filter(cairo.FILTER_BILINEAR)
+        ctx.paint()
+        ctx.restore()
+
+    @staticmethod
+    def draw_text(ctx, text, x, y, w, h, font, color, align="left", valign="top", top_margin=0):
+        family, bold, italic, size = parse_font(font)
+        ctx.select_font_face(family, cairo.FONT_SLANT_ITALIC if italic else cairo.FONT_SLANT_NORMAL,
+                             cairo.FONT_WEIGHT_BOLD if bold else cairo.FONT_WEIGHT_NORMAL)
+        ctx.set_font_size(size)
+        ascent, descent = ctx.font_extents()[:2]
+        advance = ctx.text_extents(text).x_advance
+        if align == "center": tx = x + (w - advance) / 2
+        elif align == "right": tx = x + w - advance
+        else: tx = x
+        ty = y + top_margin + ascent
+        if valign == "center": ty = y + (h - ascent - descent) / 2 + ascent
+        ctx.set_source_rgba(*parse_color(color, (1, 1, 1, 1)))
+        ctx.move_to(tx, ty)
+        ctx.show_text(text)
+
+
+def render_theme(theme_path, out_path, size=DEFAULT_SIZE, thumb_width=None):
+    """Renders theme_path into a PNG at out_path. Returns a result dict (runs in worker processes)."""
+    started = time.monotonic()
+    result = {"theme": theme_path, "output": out_path, "ok": True, "warnings": [], "error": None}
+    try:
+        if not HAS_CAIRO: raise RuntimeError("python3-cairo is not installed")
+        doc = read_theme_ast(theme_path)
+        if doc is None: raise FileNotFoundError(f"{theme_path} not found")
+        result["warnings"] += [f"line {line}: {msg}" for line, msg in doc["errors"]]
+
+        width, height = size
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        renderer = ThemeRenderer(doc, os.path.dirname(theme_path), width, height)
+        renderer.render(cairo.Context(surface))
+        result["warnings"] += sorted(set(renderer.warnings))
+
+        if thumb_width and thumb_width < width:
+            thumb_h = max(1, round(height * thumb_width / width))
+            thumb = cairo.ImageSurface(cairo.FORMAT_ARGB32, thumb_width, thumb_h)
+            ThemeRenderer.draw_surface(cairo.Context(thumb), surface, 0, 0, thumb_width, thumb_h)
+            surface = thumb
+
+        out_dir = os.path.dirname(out_path)
+        if out_dir: os.makedirs(out_dir, exist_ok=True)
+        surface.write_to_png(out_path)
+        result["size"] = [surface.get_width(), surface.get_height()]
+    except Exception as e:
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+
+def find_themes(themes_dir=THEMES_DIR):
+    """Returns (name, theme.txt path) for every theme directory, sorted by name."""
+    try: names = sorted(os.listdir(themes_dir))
+    except OSError: return []
+    return [(name, os.path.join(themes_dir, name, "theme.txt")) for name in names
+            if os.path.isfile(os.path.join(themes_dir, name, "theme.txt"))]
+
+
+def render_all(themes_dir, out_dir, size=DEFAULT_SIZE, thumb_width=None, jobs=None, on_result=None):
+    """Renders every theme under themes_dir to out_dir/<name>.png in a process pool."""
+    themes = find_themes(themes_dir)
+    results = []
+    if not themes: return results
+    with ProcessPoolExecutor(max_workers=max(1, min(jobs or os.cpu_count() or 1, len(themes)))) as pool:
+        futures = [pool.submit(render_theme, path, os.path.join(out_dir, f"{name}.png"), size, thumb_width)
+                   for name, path in themes]
+        for future in as_completed(futures):
+            results.append(future.result())
+            if on_result: on_result(results[-1])
+    order = [path for _, path in themes]
+    results.sort(key=lambda r: order.index(r["theme"]))
+    return results
+
+
+def parse_size(text):
+    try:
+        w, h = (int(v) for v in text.lower().split('x'))
+        if w > 0 and h > 0: return w, h
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got '{text}'")
+
+
+def print_result(r):
+    status = "ok" if r["ok"] else "FAILED"
+    line = f"[{status}] {r['theme']} -> {r['output']} ({r['seconds']}s)"
+    if r["error"]: line += f" - {r['error']}"
+    elif r["warnings"]: line += f" - {len(r['warnings'])} warning(s)"
+    print(line, file=sys.stderr)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="grubtamer-render", description="Render GRUB themes to PNG without a display.")
+    p.add_argument("theme", nargs="?", help="theme.txt to render.")
+    p.add_argument("--batch", metavar="DIR", nargs="?", const=THEMES_DIR,
+                   help=f"Render every theme under DIR (default: {THEMES_DIR}).")
+    p.add_argument("-o", "--output", help="Output PNG (single theme) or directory (batch).")
+    p.add_argument("--size", type=parse_size, default=DEFAULT_SIZE, help="Screen resolution to lay out for (WIDTHxHEIGHT).")
+    p.add_argument("--thumb-width", type=int, help="Downscale the rendering to this width.")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Parallel worker processes (batch).")
+    p.add_argument("--report", help="Write a JSON report to this file ('-' for stdout).")
+    args = p.parse_args(argv)
+
+    if not HAS_CAIRO:
+        print("python3-cairo is required for rendering.", file=sys.stderr)
+        return 2
+    if bool(args.theme) == bool(args.batch):
+        print("Give either a theme.txt or --batch DIR.", file=sys.stderr)
+        return 2
+
+    if args.batch:
+        results = render_all(args.batch, args.output or "theme-previews", args.size, args.thumb_width, args.jobs,
+                             on_result=print_result)
+        if not results: print(f"No themes found in {args.batch}.", file=sys.stderr)
+    else:
+        out = args.output or os.path.basename(os.path.dirname(os.path.abspath(args.theme))) + ".png"
+        results = [render_theme(args.theme, out, args.size, args.thumb_width)]
+        print_result(results[0])
+
+    failed = sum(1 for r in results if not r["ok"])
+    report = {"ok": failed == 0, "total": len(results), "failed": failed, "results": results}
+    if args.report == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.report:
+        with open(args.report, 'w') as f: json.dump(report, f, indent=2)
+    return 0 if failed == 0 and results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
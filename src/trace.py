@@ -0,0 +1,153 @@
+"""Timing spans for the slow steps: privileged calls, parses, update-grub, asset rendering.
+
+    from src.trace import span
+
+    with span("exec.update-grub", argv=argv) as s:
+        returncode = proc.wait()
+        s.set(returncode=returncode)
+
+Tracing is off unless GRUBTAMER_TRACE is set (to 1, or to a file path that gets a
+Chrome trace when the app exits) or the debug panel turns it on. While it is off,
+span() returns one shared object whose methods do nothing, so an instrumented call
+costs a flag check. Arguments that take work to build can be passed as callables,
+span("helper.request", ops=lambda: [...]); they are only called when tracing is on,
+as the span starts. Finished spans are plain dicts kept in a ring buffer of the
+last MAX_SPANS; chrome_trace() turns them into trace-event JSON for
+chrome://tracing or https://ui.perfetto.dev. Times come from CLOCK_MONOTONIC,
+which the privileged helper shares, so its spans line up with the GUI's.
+"""
+import atexit
+import collections
+import json
+import os
+import threading
+import time
+
+MAX_SPANS = 1000
+TRACE_ENV = "GRUBTAMER_TRACE"
+
+_enabled = False
+_spans = collections.deque(maxlen=MAX_SPANS)
+_lock = threading.Lock()
+_listeners = []
+
+
+class Span:
+    """One timed step. Extra details (argv, returncode, sizes) go in its args."""
+    __slots__ = ("record",)
+
+    def __init__(self, name, args):
+        thread = threading.current_thread()
+        self.record = {"name": name, "args": args, "pid": os.getpid(), "tid": threading.get_native_id(),
+                       "thread": thread.name, "start_ns": 0, "dur_ns": 0}
+
+    def set(self, **args):
+        self.record["args"].update(args)
+
+    def __enter__(self):
+        args = self.record["args"]
+        for key, value in args.items():
+            if callable(value): args[key] = value()
+        self.record["start_ns"] = time.monotonic_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record["dur_ns"] = time.monotonic_ns() - self.record["start_ns"]
+        if exc_type is not None: self.record["args"]["error"] = f"{exc_type.__name__}: {exc}"
+        add_spans([self.record])
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+    def set(self, **args): pass
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, tb): return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """A context manager timing the block it wraps, or NULL_SPAN when tracing is off."""
+    if not _enabled: return NULL_SPAN
+    return Span(name, args)
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def add_spans(records):
+    """Stores finished spans (also ones recorded by the helper process) and tells the listeners."""
+    with _lock: _spans.extend(records)
+    for listener in list(_listeners):
+        for record in records: listener(record)
+
+
+def recent(limit=None):
+    """The last finished spans, oldest first."""
+    with _lock: records = list(_spans)
+    return records[-limit:] if limit else records
+
+
+def clear():
+    with _lock: _spans.clear()
+
+
+def add_listener(callback):
+    """callback(record) runs in the thread that finished the span."""
+    _listeners.append(callback)
+
+
+def remove_listener(callback):
+    if callback in _listeners: _listeners.remove(callback)
+
+
+def chrome_trace(records=None):
+    """Trace-event JSON ("X" complete events, microseconds) for the given or all recent spans."""
+    records = recent() if records is None else records
+    events, threads = [], {}
+    for r in records:
+        events.append({"name": r["name"], "cat": r["name"].split(".")[0], "ph": "X", "ts": r["start_ns"] / 1000,
+                       "dur": r["dur_ns"] / 1000, "pid": r["pid"], "tid": r["tid"], "args": r["args"]})
+        threads[(r["pid"], r["tid"])] = r["thread"]
+    for (pid, tid), name in threads.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path, records=None):
+    with open(path, 'w') as f: json.dump(chrome_trace(records), f)
+
+
+def describe(record):
+    """One line for the debug panel: "12.3 ms  update-grub  → 0"."""
+    args = record["args"]
+    detail = " ".join(args["argv"]) if "argv" in args else ", ".join(
+        f"{k}={v}" for k, v in args.items() if v is not None and k not in ("returncode", "error"))
+    if "returncode" in args: detail += f"  → {args['returncode']}"
+    if "error" in args: detail += f"  ✗ {args['error']}"
+    return f"{record['dur_ns'] / 1e6:9.1f} ms  {detail}"
+
+
+def _export_at_exit(path, owner):
+    # Worker processes inherit the variable; only the process that set it up writes the file
+    if os.getpid() == owner: export_chrome_trace(path)
+
+
+def _init_from_env():
+    value = os.environ.get(TRACE_ENV, "")
+    if not value or value == "0": return
+    enable()
+    if value == "1": return
+    owner = int(os.environ.setdefault(TRACE_ENV + "_PID", str(os.getpid())))
+    atexit.register(_export_at_exit, os.path.abspath(value), owner)
+
+
+_init_from_env()
@@ -0,0 +1,117 @@
+import threading
+import gi
+from src import trace
+
+gi.require_version('Gtk', '4.0')
+gi.require_version('Adw', '1')
+from gi.repository import Gtk, Adw, Gio, GLib, GObject, Pango
+
+# Rows kept in the panel; the trace itself keeps trace.MAX_SPANS for export
+PANEL_LIMIT = 200
+
+
+class SpanItem(GObject.Object):
+    """List model item for one finished span."""
+    def __init__(self, record):
+        super().__init__()
+        self.record = record
+
+
+class TracePanelWindow(Adw.Window):
+    """The last operations with their timings, live while recording, exportable as a Chrome trace."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.set_title("Trace Log")
+        self.set_default_size(640, 520)
+
+        self.toast_overlay = Adw.ToastOverlay()
+        self.set_content(self.toast_overlay)
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self.toast_overlay.set_child(box)
+
+        header = Adw.HeaderBar()
+        self.record_switch = Gtk.Switch(active=trace.enabled(), valign=Gtk.Align.CENTER)
+        self.record_switch.set_tooltip_text("Record timings of privileged calls, parses and update-grub")
+        self.record_switch.connect("notify::active", self.on_record_toggled)
+        header.pack_start(self.record_switch)
+        export_btn = Gtk.Button(label="Export…")
+        export_btn.set_tooltip_text("Save as Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)")
+        export_btn.connect("clicked", self.on_export_clicked)
+        header.pack_end(export_btn)
+        clear_btn = Gtk.Button(icon_name="edit-clear-all-symbolic")
+        clear_btn.set_tooltip_text("Clear")
+        clear_btn.connect("clicked", self.on_clear_clicked)
+        header.pack_end(clear_btn)
+        box.append(header)
+
+        # Newest first; rows are recycled, so a long session costs no widgets
+        self.store = Gio.ListStore.new(SpanItem)
+        self.store.splice(0, 0, [SpanItem(r) for r in reversed(trace.recent(PANEL_LIMIT))])
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_factory_setup)
+        factory.connect("bind", self.on_factory_bind)
+        list_view = Gtk.ListView(model=Gtk.NoSelection(model=self.store), factory=factory)
+        list_view.add_css_class("navigation-sidebar")
+        scrolled = Gtk.ScrolledWindow(vexpand=True)
+        scrolled.set_child(list_view)
+        box.append(scrolled)
+
+        trace.add_listener(self.on_span)
+        self.connect("close-request", self.on_close)
+
+    @staticmethod
+    def on_factory_setup(factory, list_item):
+        row = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        row.set_margin_top(4); row.set_margin_bottom(4)
+        title = Gtk.Label(xalign=0.0, ellipsize=Pango.EllipsizeMode.END)
+        subtitle = Gtk.Label(xalign=0.0, ellipsize=Pango.EllipsizeMode.END)
+        subtitle.add_css_class("dim-label"); subtitle.add_css_class("caption"); subtitle.add_css_class("monospace")
+        row.append(title); row.append(subtitle)
+        row.title, row.subtitle = title, subtitle
+        list_item.set_child(row)
+
+    @staticmethod
+    def on_factory_bind(factory, list_item):
+        record = list_item.get_item().record
+        row = list_item.get_child()
+        row.title.set_text(record["name"] + ("" if record["thread"] == "MainThread" else f"  [{record['thread']}]"))
+        row.subtitle.set_text(trace.describe(record))
+        row.set_tooltip_text(trace.describe(record))
+        if "error" in record["args"] or record["args"].get("returncode", 0) != 0: row.title.add_css_class("error")
+        else: row.title.remove_css_class("error")
+
+    def on_span(self, record):
+        # Spans finish on worker threads too; the store is only touched from the main loop
+        if threading.current_thread() is threading.main_thread(): self.prepend(record)
+        else: GLib.idle_add(self.prepend, record)
+
+    def prepend(self, record):
+        self.store.insert(0, SpanItem(record))
+        if self.store.get_n_items() > PANEL_LIMIT: self.store.remove(PANEL_LIMIT)
+        return GLib.SOURCE_REMOVE
+
+    def on_record_toggled(self, switch, _):
+        trace.enable(switch.get_active())
+
+    def on_clear_clicked(self, _):
+        trace.clear()
+        self.store.remove_all()
+
+    def on_export_clicked(self, _):
+        d = Gtk.FileDialog(initial_name="grubtamer-trace.json")
+        d.save(self, None, self.on_export_finish)
+
+    def on_export_finish(self, dialog, result):
+        try: file = dialog.save_finish(result)
+        except GLib.Error: return  # dismissed
+        if not file: return
+        try:
+            trace.export_chrome_trace(file.get_path())
+            self.toast_overlay.add_toast(Adw.Toast.new(f"Exported {len(trace.recent())} span(s)."))
+        except OSError as e:
+            self.toast_overlay.add_toast(Adw.Toast.new(f"Export failed: {e}"))
+
+    def on_close(self, _):
+        trace.remove_listener(self.on_span)
+        return False
@@ -0,0 +1,206 @@
+import os
+import re
+from src.system import AVAILABLE_OPTIONS
+from src.option_catalog import load_catalog
+from src.theme_parser import THEME_GLOBALS, iter_components, component_props
+
+# Colour names GRUB's parser knows (the SVG 1.0 set); anything else fails when the theme loads
+GRUB_COLOR_NAMES = set("""
+aliceblue antiquewhite aqua aquamarine azure beige bisque black blanchedalmond blue blueviolet brown burlywood
+cadetblue chartreuse chocolate coral cornflowerblue cornsilk crimson cyan darkblue darkcyan darkgoldenrod darkgray
+darkgreen darkgrey darkkhaki darkmagenta darkolivegreen darkorange darkorchid darkred darksalmon darkseagreen
+darkslateblue darkslategray darkslategrey darkturquoise darkviolet deeppink deepskyblue dimgray dimgrey dodgerblue
+firebrick floralwhite forestgreen fuchsia gainsboro ghostwhite gold goldenrod gray grey green greenyellow honeydew
+hotpink indianred indigo ivory khaki lavender lavenderblush lawngreen lemonchiffon lightblue lightcoral lightcyan
+lightgoldenrodyellow lightgray lightgreen lightgrey lightpink lightsalmon lightseagreen lightskyblue lightslategray
+lightslategrey lightsteelblue lightyellow lime limegreen linen magenta maroon mediumaquamarine mediumblue
+mediumorchid mediumpurple mediumseagreen mediumslateblue mediumspringgreen mediumturquoise mediumvioletred
+midnightblue mintcream mistyrose moccasin navajowhite navy oldlace olive olivedrab orange orangered orchid
+palegoldenrod palegreen paleturquoise palevioletred papayawhip peachpuff peru pink plum powderblue purple red
+rosybrown royalblue saddlebrown salmon sandybrown seagreen seashell sienna silver skyblue slateblue slategray
+slategrey snow springgreen steelblue tan teal thistle tomato turquoise violet wheat white whitesmoke yellow
+yellowgreen
+""".split())
+
+GRUB_COLOR_RE = re.compile(r'^#([0-9a-f]{3}|[0-9a-f]{4}|[0-9a-f]{6}|[0-9a-f]{8})$|^\d{1,3}\s*,\s*\d{1,3}\s*,\s*\d{1,3}(\s*,\s*\d{1,3})?$')
+# Virtual colours are only read by our own asset generator, which also takes CSS rgb()/rgba()
+CSS_COLOR_RE = re.compile(r'^rgba?\(\s*\d{1,3}\s*,\s*\d{1,3}\s*,\s*\d{1,3}\s*(,\s*[\d.]+\s*)?\)$')
+GFXMODE_RE = re.compile(r'^(auto|\d+x\d+(x\d+)?)$')
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".tga")
+BOOL_VALUES = ("true", "false")
+
+# Component properties that hold a colour or name a file / pixmap pattern in the theme directory
+COLOR_PROP_RE = re.compile(r'(^|_)color$')
+ASSET_PROPS = ("file", "menu_pixmap_style", "item_pixmap_style", "selected_item_pixmap_style", "scrollbar_frame",
+               "scrollbar_thumb", "bar_style", "highlight_style", "center_bitmap", "tick_bitmap")
+
+_grub_schema = None
+_theme_schema = None
+
+
+# --- Checks ---
+# Each takes a value (quotes stripped) plus context and returns an error message or None.
+
+def _check_bool(value, _):
+    if value.lower() not in BOOL_VALUES: return "must be true or false"
+
+
+def _check_timeout(value, _):
+    if not re.match(r'^-?\d+$', value) or int(value) < -1: return "must be a whole number of seconds, or -1"
+
+
+def _check_gfxmode(value, _):
+    bad = [m for m in re.split(r'[,;]', value) if not GFXMODE_RE.match(m.strip().lower())]
+    if bad: return f"'{bad[0].strip()}' is not 'auto' or WIDTHxHEIGHT[xDEPTH]"
+
+
+def _check_gfxpayload(value, ctx):
+    if value.lower() not in ("keep", "text"): return _check_gfxmode(value, ctx)
+
+
+def _check_tune(value, _):
+    nums = value.split()
+    if not all(n.isdigit() for n in nums) or len(nums) < 3 or len(nums) % 2 == 0:
+        return "must be a tempo followed by pitch/duration number pairs"
+
+
+def _check_badram(value, _):
+    pairs = value.split(',')
+    if len(pairs) % 2 or not all(re.match(r'^0x[0-9a-fA-F]+$', p.strip()) for p in pairs):
+        return "must be comma separated 0x address,mask pairs"
+
+
+def _path_check(exts, kind):
+    def check(value, ctx):
+        if not value.startswith('/'): return "must be an absolute path"
+        if not value.lower().endswith(exts): return f"must be a {kind} ({', '.join(exts)})"
+        if value in ctx["provisioned"]: return None
+        if ctx["root"] is not None and not os.path.isfile(os.path.join(ctx["root"], value.lstrip('/'))):
+            return f"{value} does not exist"
+    return check
+
+
+CHECKS = {
+    "timeout": _check_timeout,
+    "gfxmode": _check_gfxmode,
+    "gfxpayload": _check_gfxpayload,
+    "tune": _check_tune,
+    "badram": _check_badram,
+    "theme": _path_check((".txt",), "theme file"),
+    "image": _path_check(IMAGE_EXTS, "PNG, JPEG or TGA image"),
+    "font": _path_check((".pf2",), "GRUB font"),
+}
+
+
+def _enum_check(values, words=False):
+    def check(value, _):
+        for v in (value.split() if words else [value]):
+            if v not in values: return f"'{v}' is not one of: {', '.join(values)}"
+    return check
+
+
+def _compile(spec):
+    checks = []
+    if spec.get("type") == "toggle": checks.append(_check_bool)
+    if "values" in spec: checks.append(_enum_check(spec["values"], spec.get("check") == "words"))
+    if spec.get("check") in CHECKS: checks.append(CHECKS[spec["check"]])
+    return checks
+
+
+def grub_schema():
+    """{key: [checks]} compiled once from AVAILABLE_OPTIONS and the option catalog."""
+    global _grub_schema
+    if _grub_schema is None:
+        specs = dict(load_catalog())
+        for options in AVAILABLE_OPTIONS.values(): specs.update({opt["key"]: opt for opt in options})
+        _grub_schema = {key: checks for key, spec in specs.items() if (checks := _compile(spec))}
+    return _grub_schema
+
+
+def validate_value(key, value, root="/", provisioned=()):
+    """Error message for one /etc/default/grub value, or None. Empty values unset the key and always pass.
+
+    root is prepended to paths; None skips the filesystem checks. Paths in provisioned
+    are created by the same save, so they need not exist yet.
+    """
+    value = str(value).strip().strip('"').strip("'")
+    if not value: return None
+    for check in grub_schema().get(key, ()):
+        if message := check(value, {"root": root, "provisioned": provisioned}): return message
+    return None
+
+
+def validate_grub(settings, root="/", provisioned=()):
+    """Returns {key: message} for every invalid setting."""
+    return {key: msg for key, value in settings.items() if (msg := validate_value(key, value, root, provisioned))}
+
+
+# --- Theme ---
+
+def is_grub_color(value):
+    value = value.strip().strip('"').strip().lower()
+    return bool(GRUB_COLOR_RE.match(value)) or value in GRUB_COLOR_NAMES
+
+
+def _check_color(value, ctx):
+    if is_grub_color(value): return None
+    if ctx["virtual"] and CSS_COLOR_RE.match(value.lower()): return None
+    return "is not a colour GRUB can parse (#rrggbb, \"r, g, b\" or a name)"
+
+
+def _check_asset(value, ctx):
+    if not value.lower().endswith(IMAGE_EXTS): return "must be a PNG, JPEG or TGA image"
+    if ctx["theme_dir"] is None: return None
+    path = value if os.path.isabs(value) else os.path.join(ctx["theme_dir"], value)
+    if not os.path.isfile(path): return f"{os.path.basename(value)} does not exist"
+
+
+def theme_schema():
+    """{key: [checks]} compiled once from THEME_GLOBALS."""
+    global _theme_schema
+    if _theme_schema is None:
+        _theme_schema = {}
+        for key, meta in THEME_GLOBALS.items():
+            if meta["type"] == "color": _theme_schema[key] = [_check_color]
+            elif meta["type"] == "dropdown": _theme_schema[key] = [_enum_check(meta["options"])]
+            elif meta["type"] == "file": _theme_schema[key] = [_check_asset]
+    return _theme_schema
+
+
+def validate_theme(data, theme_dir=None, doc=None, generated=()):
+    """Checks editor values and, given the parsed theme, its components.
+
+    Returns (errors, warnings), both {key: message}. Errors are values GRUB
+    cannot load; warnings are component assets missing from theme_dir, which
+    GRUB skips silently. generated names the PNGs the save will create.
+    """
+    errors, warnings = {}, {}
+    for key, value in data.items():
+        meta = THEME_GLOBALS.get(key, {})
+        ctx = {"virtual": meta.get("virtual", False), "theme_dir": theme_dir}
+        value = str(value).strip().strip('"')
+        for check in theme_schema().get(key, ()):
+            if value and (message := check(value, ctx)):
+                errors[key] = message
+                break
+    if doc is None: return errors, warnings
+
+    for comp, _ in iter_components(doc):
+        for name, value in component_props(comp).items():
+            label = f"{comp['type']}.{name} (line {comp['line']})"
+            if COLOR_PROP_RE.search(name) and value and not is_grub_color(value):
+                errors[label] = _check_color(value, {"virtual": False})
+            elif name in ASSET_PROPS and value and theme_dir is not None:
+                # A pixmap style is a pattern; its centre piece must exist for GRUB to draw the box
+                file = value.replace("*", "c")
+                if file not in generated and not os.path.isfile(os.path.join(theme_dir, file)):
+                    warnings[label] = f"{file} does not exist"
+    return errors, warnings
+
+
+def describe_errors(errors, limit=3):
+    """One line for a toast: "GRUB_TIMEOUT: must be ...; ... (and 2 more)"."""
+    items = [f"{key}: {message}" for key, message in errors.items()]
+    text = "; ".join(items[:limit])
+    if len(items) > limit: text += f" (and {len(items) - limit} more)"
+    return text
@@ -0,0 +1,53 @@
+import struct
+import subprocess
+
+import pytest
+
+from src import fonts
+from src.fonts import FontError, parse_description, resolve_font_file, installed_font_names, chosen_fonts
+
+
+def fake_fc_match(monkeypatch, tmp_path, family):
+    font_file = tmp_path / "font.ttf"
+    font_file.write_bytes(b"\0")
+    monkeypatch.setattr(fonts.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(fonts.subprocess, "run", lambda argv, **kw: subprocess.CompletedProcess(
+        argv, 0, stdout=f"{font_file}\n{family}", stderr=""))
+    return str(font_file)
+
+
+def write_pf2(path, name):
+    def section(tag, data): return tag + struct.pack(">I", len(data)) + data
+    path.write_bytes(section(b"FILE", b"PFF2") + section(b"NAME", name.encode() + b"\0") + section(b"DATA", b""))
+
+
+def test_parse_description():
+    assert parse_description("DejaVu Sans Bold Italic 12") == ("DejaVu Sans", ["bold", "italic"], 12)
+    assert parse_description("Terminus Regular 14") == ("Terminus", ["regular"], 14)
+    assert parse_description("Unifont") == ("Unifont", [], 16)
+
+
+def test_matching_family_resolves(monkeypatch, tmp_path):
+    path = fake_fc_match(monkeypatch, tmp_path, "DejaVu Sans,DejaVu Sans Condensed")
+    assert resolve_font_file("DejaVu Sans Bold 12") == path
+
+
+def test_fallback_family_is_not_a_match(monkeypatch, tmp_path):
+    # fc-match answers every query; Terminus isn't installed, so it offers DejaVu
+    fake_fc_match(monkeypatch, tmp_path, "DejaVu Sans")
+    with pytest.raises(FontError, match="'Terminus' is not installed"): resolve_font_file("Terminus Regular 14")
+
+
+def test_generic_family_takes_any_match(monkeypatch, tmp_path):
+    path = fake_fc_match(monkeypatch, tmp_path, "DejaVu Sans Mono")
+    assert resolve_font_file("Monospace 12") == path
+
+
+def test_only_fonts_picked_in_the_editor_are_compiled(tmp_path):
+    write_pf2(tmp_path / "terminus_regular_14.pf2", "Terminus Regular 14")
+    assert installed_font_names(str(tmp_path)) == {"Terminus Regular 14"}
+    baseline = {"title-font": "Unifont Regular 16", "terminal-font": "Terminus Regular 14"}
+    # Nothing edited: nothing compiled, whatever the theme references
+    assert chosen_fonts(dict(baseline), baseline, str(tmp_path)) == set()
+    data = dict(baseline, **{"title-font": "DejaVu Sans Bold 20", "message-font": "Terminus Regular 14"})
+    assert chosen_fonts(data, baseline, str(tmp_path)) == {"DejaVu Sans Bold 20"}
@@ -0,0 +1,170 @@
+import io
+import json
+import os
+
+import pytest
+
+from src import grub_cfg
+from src.grub_cfg import load_entries, parse_grub_cfg
+
+SIMPLE_CFG = "menuentry 'Ubuntu' --class ubuntu {\n\tlinux /vmlinuz root=/dev/sda1 ro\n}\n"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(grub_cfg, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(grub_cfg, "CACHE_PATH", str(tmp_path / "cache" / "grub_cfg.json"))
+    grub_cfg._memo.clear()
+    yield
+    grub_cfg._memo.clear()
+
+
+def write_cfg(tmp_path, text, name="grub.cfg"):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_unsearchable_boot_grub_falls_back_to_privileged_read(tmp_path, cache, monkeypatch):
+    path = str(tmp_path / "grub.cfg")
+
+    def stat(p, *args, **kwargs): raise PermissionError(13, "Permission denied", p)
+    monkeypatch.setattr(grub_cfg.os, "stat", stat)
+    entries = load_entries(path, read_privileged=lambda p: SIMPLE_CFG)
+    assert [e["title"] for e in entries] == ["Ubuntu"]
+    # Nothing to key a cache entry on
+    assert not os.path.exists(grub_cfg.CACHE_PATH) and grub_cfg._memo == {}
+    with pytest.raises(PermissionError): load_entries(path)
+
+
+def test_file_rewritten_while_parsing_is_not_cached(tmp_path, cache, monkeypatch):
+    path = write_cfg(tmp_path, SIMPLE_CFG)
+    real_parse = grub_cfg.parse_grub_cfg
+
+    def parse_then_regenerate(stream):
+        entries = real_parse(stream)
+        with open(path, 'a') as f: f.write("menuentry 'Windows' {\n}\n")
+        return entries
+    monkeypatch.setattr(grub_cfg, "parse_grub_cfg", parse_then_regenerate)
+    assert [e["title"] for e in load_entries(path)] == ["Ubuntu"]
+    assert grub_cfg._memo == {} and not os.path.exists(grub_cfg.CACHE_PATH)
+
+    monkeypatch.setattr(grub_cfg, "parse_grub_cfg", real_parse)
+    assert [e["title"] for e in load_entries(path)] == ["Ubuntu", "Windows"]
+
+
+# --- Tokenizer ---
+
+def words(text):
+    return [w for w, _, _ in grub_cfg.tokenize(io.StringIO(text))]
+
+
+def test_quotes_and_escapes():
+    assert words('set a="x y" ; echo \'it\'\'s\' "q\\"q" a\\ b\n') == [
+        ["set", "a=x y"], ["echo", "its", 'q"q', "a b"]]
+    # Single quotes keep backslashes; a backslash-newline continues the command
+    assert words("echo 'a\\b' \\\n  next\n") == [["echo", "a\\b", "next"]]
+
+
+def test_comments():
+    assert words("# menuentry 'Hidden' {\necho a#b # trailing\n  # indented\n") == [["echo", "a#b"]]
+
+
+def test_multiline_strings_are_one_word():
+    # What 40_custom style scripts use instead of heredocs: nothing inside may open a menu entry
+    text = "echo \"menuentry 'Fake' {\n}\" done\nmenuentry 'Real' {\n}\n"
+    assert words(text)[0] == ["echo", "menuentry 'Fake' {\n}", "done"]
+    assert [e["title"] for e in parse_grub_cfg(io.StringIO(text))] == ["Real"]
+
+
+def test_positions():
+    tokens = list(grub_cfg.tokenize(io.StringIO("a\n\n  b c\n")))
+    assert [(line, offset) for _, line, offset in tokens] == [(1, 0), (3, 5)]
+
+
+# --- Menu tree ---
+
+NESTED_CFG = """\
+if [ x$feature_default_font_path = xy ] ; then
+   font=unicode
+fi
+menuentry 'Debian GNU/Linux' --class debian --class gnu-linux $menuentry_id_option 'gnulinux-simple-1234' {
+\tlinux\t/boot/vmlinuz-6.1.0-18-amd64 root=UUID=1234 ro quiet
+\tinitrd\t/boot/initrd.img-6.1.0-18-amd64
+}
+submenu 'Advanced options for Debian GNU/Linux' $menuentry_id_option 'gnulinux-advanced-1234' {
+\tmenuentry 'Debian GNU/Linux, with Linux 6.1.0-18-amd64' --id=gnulinux-6.1.0-18-advanced {
+\t\tif [ x$grub_platform = xxen ]; then insmod xzio; fi
+\t\tlinux\t/boot/vmlinuz-6.1.0-18-amd64 root=UUID=1234 ro single
+\t}
+\tsubmenu 'Older' {
+\t\tmenuentry "Debian GNU/Linux, with Linux 5.10" --id "old-5.10" {
+\t\t\tlinux /boot/vmlinuz-5.10 ro
+\t\t}
+\t}
+}
+menuentry 'UEFI Firmware Settings' --id 'uefi-firmware' {
+\tfwsetup
+}
+"""
+
+
+def test_nested_submenus():
+    entries = parse_grub_cfg(io.StringIO(NESTED_CFG))
+    assert [(n["type"], n["title"], d) for n, d in grub_cfg.walk(entries)] == [
+        ("menuentry", "Debian GNU/Linux", 0),
+        ("submenu", "Advanced options for Debian GNU/Linux", 0),
+        ("menuentry", "Debian GNU/Linux, with Linux 6.1.0-18-amd64", 1),
+        ("submenu", "Older", 1),
+        ("menuentry", "Debian GNU/Linux, with Linux 5.10", 2),
+        ("menuentry", "UEFI Firmware Settings", 0)]
+    old = entries[1]["children"][1]["children"][0]
+    assert grub_cfg.default_value(old) == "Advanced options for Debian GNU/Linux>Older>Debian GNU/Linux, with Linux 5.10"
+    assert (entries[1]["line"], entries[1]["end_line"]) == (8, 18)
+
+
+def test_ids_classes_and_kernels():
+    entries = parse_grub_cfg(io.StringIO(NESTED_CFG))
+    first, advanced, uefi = entries
+    assert first["id"] == "gnulinux-simple-1234" and first["classes"] == ["debian", "gnu-linux"]
+    assert first["kernel"] == "/boot/vmlinuz-6.1.0-18-amd64" and first["cmdline"] == "root=UUID=1234 ro quiet"
+    assert first["initrd"] == ["/boot/initrd.img-6.1.0-18-amd64"]
+    assert advanced["id"] == "gnulinux-advanced-1234"
+    assert advanced["children"][0]["id"] == "gnulinux-6.1.0-18-advanced"
+    assert advanced["children"][0]["cmdline"].endswith("single")
+    assert advanced["children"][1]["children"][0]["id"] == "old-5.10"
+    assert uefi["id"] == "uefi-firmware" and uefi["kernel"] == ""
+    # Without an id, the title path identifies an entry
+    assert grub_cfg.entry_key(advanced["children"][1]) == "Advanced options for Debian GNU/Linux>Older"
+
+
+# --- Cache ---
+
+def test_cache_is_keyed_on_inode_size_and_mtime(tmp_path, cache, monkeypatch):
+    path = write_cfg(tmp_path, SIMPLE_CFG)
+    parses = []
+    real_parse = grub_cfg.parse_grub_cfg
+    monkeypatch.setattr(grub_cfg, "parse_grub_cfg", lambda stream: parses.append(1) or real_parse(stream))
+
+    load_entries(path)
+    load_entries(path)
+    grub_cfg._memo.clear()  # a later app start reads the on-disk cache
+    assert [e["title"] for e in load_entries(path)] == ["Ubuntu"]
+    assert len(parses) == 1
+
+    # Regenerated the way grub-mkconfig does it: a new file renamed over the old one
+    new_path = write_cfg(tmp_path, SIMPLE_CFG.replace("Ubuntu", "Debian"), "grub.cfg.new")
+    os.replace(new_path, path)
+    assert [e["title"] for e in load_entries(path)] == ["Debian"]
+    assert len(parses) == 2
+
+
+def test_cache_from_another_version_is_ignored(tmp_path, cache):
+    path = write_cfg(tmp_path, SIMPLE_CFG)
+    load_entries(path)
+    with open(grub_cfg.CACHE_PATH) as f: cached = json.load(f)
+    cached["version"] = grub_cfg.CACHE_VERSION - 1
+    cached[path]["entries"] = []
+    with open(grub_cfg.CACHE_PATH, 'w') as f: json.dump(cached, f)
+    grub_cfg._memo.clear()
+    assert [e["title"] for e in load_entries(path)] == ["Ubuntu"]
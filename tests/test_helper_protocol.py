@@ -0,0 +1,39 @@
+import json
+import subprocess
+import sys
+
+from src.helper import HELPER_PATH, op_write
+
+
+def start_helper():
+    proc = subprocess.Popen([sys.executable, HELPER_PATH], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    assert json.loads(proc.stdout.readline()) == {"ready": True}
+    return proc
+
+
+def send(proc, msg):
+    proc.stdin.write(json.dumps(msg) + "\n")
+    proc.stdin.flush()
+
+
+def reply(proc, req_id):
+    while (msg := json.loads(proc.stdout.readline())).get("id") != req_id or "line" in msg: pass
+    return msg
+
+
+def test_cancel_sent_before_its_request_rejects_it(tmp_path):
+    proc = start_helper()
+    try:
+        # What the client sends when Cancel is pressed during the polkit prompt
+        send(proc, {"cancel": True, "id": 1})
+        send(proc, {"id": 1, "ops": [op_write(str(tmp_path / "a"), "x")], "transaction": True})
+        assert reply(proc, 1)["ok"] is False
+        assert not (tmp_path / "a").exists()
+
+        # The cancel only applies to its own request
+        send(proc, {"id": 2, "ops": [op_write(str(tmp_path / "b"), "x")], "transaction": True})
+        assert reply(proc, 2)["ok"] is True
+        assert (tmp_path / "b").read_text() == "x"
+    finally:
+        proc.stdin.close()
+        proc.wait()
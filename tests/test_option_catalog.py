@@ -0,0 +1,51 @@
+from src.option_catalog import OptionIndex, search_index, load_catalog
+
+CATALOG = {
+    "GRUB_TIMEOUT": {"label": "Timeout", "desc": "Seconds before the default entry boots"},
+    "GRUB_TERMINAL_OUTPUT": {"label": "Output terminal", "desc": "Where the menu is drawn"},
+    "GRUB_BACKGROUND": {"label": "Background image", "desc": "Image shown behind the menu"},
+    "GRUB_DISABLE_OS_PROBER": {"label": "Disable os-prober", "desc": "Skip looking for other operating systems"},
+}
+
+
+def test_typos_still_find_the_key():
+    index = search_index()
+    assert index.search("timout")[0] == "GRUB_TIMEOUT"
+    assert index.search("distrbutor") == ["GRUB_DISTRIBUTOR"]
+    assert OptionIndex(CATALOG).search("backgrund") == ["GRUB_BACKGROUND"]
+
+
+def test_word_prefix_ranks_above_substring():
+    # "out" starts a word of TERMINAL_OUTPUT but only sits inside TIMEOUT
+    ranks = OptionIndex(CATALOG).rank("out")
+    assert ranks["GRUB_TERMINAL_OUTPUT"] > ranks["GRUB_TIMEOUT"]
+    assert search_index().search("out")[0] == "GRUB_TERMINAL_OUTPUT"
+
+
+def test_field_weights():
+    # A key hit beats a label hit, which beats a description hit
+    index = OptionIndex(CATALOG)
+    assert index.search("menu") == ["GRUB_TERMINAL_OUTPUT", "GRUB_BACKGROUND"]
+    assert index.search("terminal") == ["GRUB_TERMINAL_OUTPUT"]
+    assert index.rank("background")["GRUB_BACKGROUND"] > index.rank("image")["GRUB_BACKGROUND"]
+
+
+def test_exact_key_comes_first():
+    index = search_index()
+    assert index.search("grub_timeout")[0] == "GRUB_TIMEOUT"
+    assert index.search("GRUB TIMEOUT STYLE")[0] == "GRUB_TIMEOUT_STYLE"
+    assert index.search("time")[0] == "GRUB_TIMEOUT"
+
+
+def test_every_term_must_match():
+    index = OptionIndex(CATALOG)
+    assert index.search("image menu") == ["GRUB_BACKGROUND"]
+    assert index.search("os prob") == ["GRUB_DISABLE_OS_PROBER"]
+    assert index.search("image xyzzy") == [] and index.rank("xyzzy") == {}
+
+
+def test_empty_query_lists_everything_in_catalog_order():
+    index = OptionIndex(CATALOG)
+    assert index.rank("") is None and index.rank(" -_ ") is None
+    assert index.search("") == list(CATALOG) and index.search("  ") == list(CATALOG)
+    assert search_index().search("") == list(load_catalog())
@@ -0,0 +1,170 @@
+import pytest
+
+from src.parser import GrubConfigFile, apply_patch, format_value, changed_settings
+
+DEBIAN = """\
+# If you change this file, run 'update-grub' afterwards to update
+# /boot/grub/grub.cfg.
+# For full documentation of the options in this file, see:
+#   info -f grub -n 'Simple configuration'
+
+GRUB_DEFAULT=0
+GRUB_TIMEOUT=5
+GRUB_DISTRIBUTOR=`( . /etc/os-release; echo ${NAME:-Debian} ) 2>/dev/null || echo Debian`
+GRUB_CMDLINE_LINUX_DEFAULT="quiet"
+GRUB_CMDLINE_LINUX=""
+
+# Uncomment to enable graphical terminal (grub-pc only)
+#GRUB_TERMINAL=console
+
+# The resolution used on graphical terminal
+#GRUB_GFXMODE=640x480
+"""
+
+FEDORA = """\
+GRUB_TIMEOUT=5
+GRUB_DISTRIBUTOR="$(sed 's, release .*$,,g' /etc/system-release)"
+GRUB_DEFAULT=saved
+GRUB_DISABLE_SUBMENU=true
+GRUB_TERMINAL_OUTPUT="console"
+GRUB_CMDLINE_LINUX="rhgb quiet"
+GRUB_DISABLE_RECOVERY="true"
+GRUB_ENABLE_BLSCFG=true
+"""
+
+# Hand-edited: export lines, a duplicate key extending itself, trailing comments, no final newline
+HAND_EDITED = """\
+export GRUB_TIMEOUT=3
+GRUB_CMDLINE_LINUX_DEFAULT='quiet splash'
+GRUB_CMDLINE_LINUX="console=tty0"
+GRUB_CMDLINE_LINUX="$GRUB_CMDLINE_LINUX nomodeset"  # for the old GPU
+  GRUB_GFXMODE=1920x1080 # indented
+MY_THEME_DIR=/boot/grub/themes
+GRUB_THEME="$MY_THEME_DIR/Vimix/theme.txt\""""
+
+SAMPLES = [DEBIAN, FEDORA, HAND_EDITED]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_unmodified_render_is_byte_identical(text):
+    model = GrubConfigFile(text)
+    model.update(model.settings())
+    assert model.render() == text
+    assert not model.is_dirty() and model.patch() == []
+
+
+def test_settings():
+    settings = GrubConfigFile(HAND_EDITED).settings()
+    assert settings["GRUB_TIMEOUT"] == "3"
+    assert settings["GRUB_CMDLINE_LINUX_DEFAULT"] == "quiet splash"
+    # The last assignment wins, like the shell sourcing the file
+    assert settings["GRUB_CMDLINE_LINUX"] == "$GRUB_CMDLINE_LINUX nomodeset"
+    assert settings["GRUB_GFXMODE"] == "1920x1080"
+    assert settings["GRUB_THEME"] == "$MY_THEME_DIR/Vimix/theme.txt"
+    assert "GRUB_TERMINAL" not in GrubConfigFile(DEBIAN).settings()
+    assert GrubConfigFile(DEBIAN).get("GRUB_DISTRIBUTOR").startswith("`( . /etc/os-release")
+    assert GrubConfigFile(FEDORA).get("GRUB_DISTRIBUTOR") == "$(sed 's, release .*$,,g' /etc/system-release)"
+
+
+def test_set_keeps_quoting_export_and_trailing_comments():
+    model = GrubConfigFile(HAND_EDITED)
+    model.set("GRUB_TIMEOUT", "10")
+    model.set("GRUB_CMDLINE_LINUX_DEFAULT", "quiet")
+    model.set("GRUB_CMDLINE_LINUX", "nomodeset acpi=off")
+    model.set("GRUB_GFXMODE", "auto")
+    lines = model.render().splitlines()
+    assert lines[0] == "export GRUB_TIMEOUT=10"
+    assert lines[1] == "GRUB_CMDLINE_LINUX_DEFAULT='quiet'"
+    # Only the last, effective assignment changes
+    assert lines[2] == 'GRUB_CMDLINE_LINUX="console=tty0"'
+    assert lines[3] == 'GRUB_CMDLINE_LINUX="nomodeset acpi=off"  # for the old GPU'
+    assert lines[4] == "  GRUB_GFXMODE=auto # indented"
+    assert model.changed_keys == {"GRUB_TIMEOUT", "GRUB_CMDLINE_LINUX_DEFAULT", "GRUB_CMDLINE_LINUX", "GRUB_GFXMODE"}
+
+
+def test_set_same_value_changes_nothing():
+    model = GrubConfigFile(FEDORA)
+    model.set("GRUB_TERMINAL_OUTPUT", "console")
+    assert not model.is_dirty() and model.changed_keys == set()
+
+
+def test_new_key_goes_below_its_commented_default():
+    model = GrubConfigFile(DEBIAN)
+    model.set("GRUB_GFXMODE", "1024x768")
+    model.set("GRUB_DISABLE_OS_PROBER", "false")
+    lines = model.render().splitlines()
+    assert lines[lines.index("#GRUB_GFXMODE=640x480") + 1] == 'GRUB_GFXMODE="1024x768"'
+    assert lines[-1] == 'GRUB_DISABLE_OS_PROBER="false"'
+
+
+def test_new_key_after_a_missing_final_newline():
+    model = GrubConfigFile(HAND_EDITED)
+    model.set("GRUB_DEFAULT", "saved")
+    assert model.render().endswith('theme.txt"\nGRUB_DEFAULT="saved"\n')
+
+
+def test_remove_drops_every_assignment():
+    model = GrubConfigFile(HAND_EDITED)
+    model.remove("GRUB_CMDLINE_LINUX")
+    assert "GRUB_CMDLINE_LINUX=" not in model.render()
+    assert "GRUB_CMDLINE_LINUX_DEFAULT='quiet splash'" in model.render()
+
+
+def test_update():
+    model = GrubConfigFile(DEBIAN)
+    settings = model.settings()
+    del settings["GRUB_CMDLINE_LINUX"]
+    settings.update(GRUB_TIMEOUT="1", GRUB_TERMINAL="")
+    model.update(settings)
+    text = model.render()
+    assert "GRUB_TIMEOUT=1\n" in text and "\nGRUB_CMDLINE_LINUX=" not in text
+    # An empty value for a key the file doesn't have adds nothing
+    assert "\nGRUB_TERMINAL=" not in text and "#GRUB_TERMINAL=console" in text
+
+
+def test_empty_value_clears_an_existing_key():
+    model = GrubConfigFile(FEDORA)
+    model.update(dict(model.settings(), GRUB_CMDLINE_LINUX=""))
+    assert 'GRUB_CMDLINE_LINUX=""\n' in model.render()
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_patch_round_trip(text):
+    model = GrubConfigFile(text)
+    settings = model.settings()
+    settings.pop("GRUB_DEFAULT", None)
+    settings.update(GRUB_TIMEOUT="7", GRUB_GFXMODE="800x600", GRUB_SAVEDEFAULT="true")
+    model.update(settings)
+    edits = model.patch()
+    assert edits and "".join(apply_patch(text.splitlines(keepends=True), edits)) == model.render()
+    model.commit()
+    assert model.patch() == [] and not model.is_dirty()
+
+
+def test_patch_refuses_lines_changed_on_disk():
+    model = GrubConfigFile(FEDORA)
+    model.set("GRUB_TIMEOUT", "1")
+    on_disk = FEDORA.replace("GRUB_TIMEOUT=5", "GRUB_TIMEOUT=2").splitlines(keepends=True)
+    with pytest.raises(ValueError, match="line 1 changed on disk"): apply_patch(on_disk, model.patch())
+
+
+def test_patch_applies_around_unrelated_disk_edits():
+    model = GrubConfigFile(DEBIAN)
+    model.set("GRUB_TIMEOUT", "1")
+    # Another tool changed a comment after we read the file
+    on_disk = DEBIAN.replace("#GRUB_TERMINAL=console", "GRUB_TERMINAL=console").splitlines(keepends=True)
+    patched = "".join(apply_patch(on_disk, model.patch()))
+    assert "GRUB_TIMEOUT=1\n" in patched and "\nGRUB_TERMINAL=console\n" in patched
+
+
+def test_format_value():
+    assert format_value("5") == "5"
+    assert format_value("quiet splash") == '"quiet splash"'
+    assert format_value('say "hi" \\o/') == '"say \\"hi\\" \\\\o/"'
+    assert format_value("it's", "'") == '"it\'s"'
+    assert format_value("/boot/x.png", "") == "/boot/x.png"
+
+
+def test_changed_settings():
+    assert changed_settings({"a": "1", "b": "2"}, {"a": "1", "b": "3", "c": "4"}) == {"b": "3", "c": "4"}
+    assert changed_settings({"a": "1"}, {}) == {"a": None}
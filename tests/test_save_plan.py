@@ -0,0 +1,89 @@
+import os
+
+from src.fingerprint import compute_fingerprint, dump_fingerprint
+from src.parser import GrubConfigFile
+from src.save_plan import plan_save, theme_provision_ops, provisioned_paths
+
+# /etc/default/grub as Ubuntu 22.04 ships it
+UBUNTU_DEFAULT_GRUB = """\
+# If you change this file, run 'update-grub' afterwards to update
+# /boot/grub/grub.cfg.
+# For full documentation of the options in this file, see:
+#   info -f grub -n 'Simple configuration'
+
+GRUB_DEFAULT=0
+GRUB_TIMEOUT_STYLE=hidden
+GRUB_TIMEOUT=0
+GRUB_DISTRIBUTOR=`lsb_release -i -s 2> /dev/null || echo Debian`
+GRUB_CMDLINE_LINUX_DEFAULT="quiet splash"
+GRUB_CMDLINE_LINUX=""
+
+# If your computer has multiple operating systems installed, then you
+# probably want to run os-prober. However, if your computer is a host
+# for guest OSes installed via LVM or raw disk devices, running
+# os-prober can cause damage to those guest OSes as it mounts them and
+# hence remove them from GRUB's menu.
+#GRUB_DISABLE_OS_PROBER=false
+
+# Uncomment to enable BadRAM filtering, modify to suit your needs
+#GRUB_BADRAM="0x01234567,0xfefefefe,0x89abcdef,0xefefefef"
+
+# Uncomment to disable graphical terminal (grub-pc only)
+#GRUB_TERMINAL=console
+
+# Uncomment if you don't want GRUB to pass "root=UUID=xxx" parameter to Linux
+#GRUB_DISABLE_LINUX_UUID=true
+"""
+
+
+def setup_root(tmp_path):
+    """A root where the last save recorded the fingerprint of the stock file."""
+    root = str(tmp_path)
+    os.makedirs(os.path.join(root, "etc", "grub.d"))
+    with open(os.path.join(root, "grub.cfg"), 'w') as f: f.write("menuentry 'Ubuntu' {}\n")
+    with open(os.path.join(root, "grubtamer.fingerprint"), 'w') as f:
+        f.write(dump_fingerprint(compute_fingerprint(UBUNTU_DEFAULT_GRUB, "", root)))
+    return root
+
+
+def plan(root, settings):
+    return plan_save(GrubConfigFile(UBUNTU_DEFAULT_GRUB), settings, root=root, grub_path=os.path.join(root, "grub"),
+                     fp_path=os.path.join(root, "grubtamer.fingerprint"), cfg_path=os.path.join(root, "grub.cfg"))
+
+
+def test_unedited_save_sends_nothing(tmp_path):
+    root = setup_root(tmp_path)
+    # An untouched window hands back exactly the settings it loaded
+    ops, changed, file_changed = plan(root, GrubConfigFile(UBUNTU_DEFAULT_GRUB).settings())
+    assert ops == [] and changed == [] and not file_changed
+
+
+def test_switch_default_written_back_is_a_change(tmp_path):
+    root = setup_root(tmp_path)
+    settings = dict(GrubConfigFile(UBUNTU_DEFAULT_GRUB).settings(), GRUB_DISABLE_OS_PROBER="false")
+    ops, changed, file_changed = plan(root, settings)
+    assert file_changed and changed == ["default_grub"]
+    assert [op["op"] for op in ops] == ["patch", "update_grub", "write_atomic"]
+
+
+def test_non_generative_edit_skips_update_grub(tmp_path):
+    root = setup_root(tmp_path)
+    # grub-mkconfig only sees GRUB_* variables, and those referencing this one
+    settings = dict(GrubConfigFile(UBUNTU_DEFAULT_GRUB).settings(), LOCAL_NOTE="1")
+    ops, changed, file_changed = plan(root, settings)
+    assert file_changed and changed == [] and [op["op"] for op in ops] == ["patch"]
+
+
+def test_force_runs_update_grub(tmp_path):
+    root = setup_root(tmp_path)
+    ops, changed, _ = plan_save(GrubConfigFile(UBUNTU_DEFAULT_GRUB), GrubConfigFile(UBUNTU_DEFAULT_GRUB).settings(),
+                                force=True, root=root, fp_path=os.path.join(root, "grubtamer.fingerprint"),
+                                cfg_path=os.path.join(root, "grub.cfg"))
+    assert changed == ["forced"] and [op["op"] for op in ops] == ["update_grub", "write_atomic"]
+
+
+def test_missing_theme_is_provisioned(tmp_path):
+    theme = str(tmp_path / "themes" / "New" / "theme.txt")
+    assert [op["op"] for op in theme_provision_ops(theme)] == ["mkdir", "write_atomic"]
+    assert provisioned_paths(theme) == [theme]
+    assert theme_provision_ops("") == [] and provisioned_paths(str(tmp_path)) == []
@@ -0,0 +1,48 @@
+from src.theme_assets import planned_assets, retired_assets, inputs_hash, SLICES
+
+STYLES = ("menu_*.png", "select_*.png")
+VALUES = {"box-bg-color": "#202020", "box-border-color": "#ffffff", "selected-item-bg-color": "#4a90d9"}
+
+
+def manifest_for(planned):
+    return {name: {"inputs": inputs_hash(inputs), "sha256": "0" * 64} for name, inputs in planned.items()}
+
+
+def test_rounded_box_is_sliced():
+    planned = planned_assets(dict(VALUES, **{"box-corner-radius": "8"}), STYLES)
+    assert {f"menu_{part}.png" for part in SLICES} <= planned.keys()
+
+
+def test_square_corners_retire_the_slices():
+    old = planned_assets(dict(VALUES, **{"box-corner-radius": "8"}), STYLES)
+    new = planned_assets(dict(VALUES, **{"box-corner-radius": "0"}), STYLES)
+    assert set(new) == {"menu_c.png", "select_c.png"}
+    retired = retired_assets(manifest_for(old), new)
+    assert set(retired) == {f"{prefix}{part}.png" for prefix in ("menu_", "select_") for part in SLICES if part != "c"}
+
+
+def test_fonts_and_current_assets_are_not_retired():
+    planned = planned_assets(VALUES, STYLES)
+    manifest = dict(manifest_for(planned), **{"dejavu_sans_16.pf2": {"kind": "font", "sha256": "0" * 64}})
+    assert retired_assets(manifest, planned) == []
+
+
+def test_circle_assets_retire_with_the_circle_style():
+    circle = planned_assets(dict(VALUES, **{"progress-style": "circle"}), ())
+    assert set(circle) == {"c_center.png", "c_tick.png"}
+    assert sorted(retired_assets(manifest_for(circle), planned_assets(dict(VALUES, **{"progress-style": "bar"}), ()))) \
+        == ["c_center.png", "c_tick.png"]
+
+
+def test_manifest_records_only_installed_generated_files(tmp_path):
+    from src.theme_assets import asset_records, data_hash
+    planned = planned_assets(VALUES, STYLES)
+    (tmp_path / "menu_c.png").write_bytes(b"old menu")
+    manifest = {"menu_c.png": {"inputs": "old", "sha256": data_hash(b"old menu")},
+                "select_c.png": {"inputs": "old", "sha256": data_hash(b"deleted by hand")},
+                "menu_nw.png": {"inputs": "old", "sha256": "0" * 64}}
+    # Without cairo nothing is rendered: the installed menu_c.png keeps its record, the others go
+    assert asset_records(str(tmp_path), planned, manifest, {}) == {"menu_c.png": manifest["menu_c.png"]}
+    records = asset_records(str(tmp_path), planned, manifest, {"select_c.png": b"new"})
+    assert records["select_c.png"] == {"inputs": inputs_hash(planned["select_c.png"]), "sha256": data_hash(b"new")}
+    assert set(records) == {"menu_c.png", "select_c.png"}
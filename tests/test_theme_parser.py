@@ -0,0 +1,101 @@
+from src.theme_parser import parse_theme_ast, theme_properties, save_theme
+
+# A countdown shown in a label, no progress component and no boot_menu
+LABEL_TIMEOUT_THEME = """\
+title-text: ""
+desktop-color: "#000000"
+
++ label {
+  id = "__timeout__"
+  left = 40%
+  top = 90%
+  text = "Booting in %d seconds"
+  color = "#ffffff"
+}
+"""
+
+
+def editor_values(path, **edits):
+    """What the theme editor hands save_theme: every control's value, defaults included."""
+    with open(path) as f: props = theme_properties(parse_theme_ast(f.read()))
+    shown = {"progress-style": "bar", "progress-color": "#ffffff", "progress-bg-color": "#333333",
+             "menu-position": "Center", "box-border-color": "#ffffff", "selected-item-color": "#000000", **props}
+    return dict(shown, **edits), shown
+
+
+def write_theme(tmp_path, text):
+    path = tmp_path / "theme.txt"
+    path.write_text(text)
+    return str(path)
+
+
+def test_unedited_save_is_byte_identical(tmp_path):
+    path = write_theme(tmp_path, LABEL_TIMEOUT_THEME)
+    data, baseline = editor_values(path)
+    assert save_theme(path, data, baseline=baseline) == LABEL_TIMEOUT_THEME
+
+
+def test_no_blocks_added_for_values_that_did_not_change(tmp_path):
+    path = write_theme(tmp_path, LABEL_TIMEOUT_THEME)
+    data, baseline = editor_values(path, **{"title-text": "Hello"})
+    content = save_theme(path, data, baseline=baseline)
+    assert 'title-text: "Hello"' in content
+    assert "progress_bar" not in content and "boot_menu" not in content
+    assert content.count("__timeout__") == 1
+
+
+def test_edited_progress_adds_a_bar(tmp_path):
+    path = write_theme(tmp_path, LABEL_TIMEOUT_THEME)
+    data, baseline = editor_values(path, **{"progress-color": "#ff0000"})
+    content = save_theme(path, data, baseline=baseline)
+    assert "+ progress_bar" in content and "#ff0000" in content
+
+
+def test_edited_menu_position_adds_a_boot_menu(tmp_path):
+    path = write_theme(tmp_path, LABEL_TIMEOUT_THEME)
+    data, baseline = editor_values(path, **{"menu-position": "Northwest"})
+    content = save_theme(path, data, baseline=baseline)
+    assert "+ boot_menu" in content and "left = 5%" in content
+
+
+def props(node):
+    return [(c["name"], c["value"]) for c in node["children"] if c["kind"] == "property"]
+
+
+def test_spans_point_back_into_the_source():
+    text = 'title-text: "Hi"\n+ label { left = 50%+10  text = "x" }\n'
+    doc = parse_theme_ast(text)
+    title, label = doc["children"]
+    assert text[slice(*title["span"])] == 'title-text: "Hi"' and text[slice(*title["value_span"])] == '"Hi"'
+    assert text[slice(*label["span"])] == '+ label { left = 50%+10  text = "x" }'
+    left, value = label["children"]
+    assert text[slice(*left["value_span"])] == "50%+10" and left["line"] == 2
+    assert text[slice(*value["value_span"])] == '"x"'
+    assert doc["errors"] == []
+
+
+def test_several_properties_on_one_line():
+    doc = parse_theme_ast('+ label { id = "__timeout__" left = 40% top = 90% color: #fff text = "@TIMEOUT_NOTIFICATION_MIDDLE@" }')
+    assert props(doc["children"][0]) == [("id", "__timeout__"), ("left", "40%"), ("top", "90%"),
+                                         ("color", "#fff"), ("text", "@TIMEOUT_NOTIFICATION_MIDDLE@")]
+
+
+def test_bare_values_keep_inner_spaces():
+    doc = parse_theme_ast("title-text: Booting in a moment\n+ image { file = a b.png }\n")
+    assert props(doc) == [("title-text", "Booting in a moment")]
+    assert props(doc["children"][1]) == [("file", "a b.png")]
+
+
+def test_unterminated_string_keeps_the_whole_tail():
+    text = 'title-color: "#fff"\ntitle-text: "Welcome'
+    doc = parse_theme_ast(text)
+    node = doc["children"][1]
+    assert node["value"] == "Welcome" and node["span"][1] == len(text)
+    assert doc["errors"] == [(2, "unterminated string for title-text")]
+
+
+def test_malformed_input_is_reported_and_skipped():
+    doc = parse_theme_ast('junk line\n+ label\n}\n}\nmessage-color: "#fff"\n+ image {\n  file = "a\nb.png"\n  oops\n')
+    assert props(doc) == [("message-color", "#fff")]
+    assert doc["errors"] == [(1, "cannot parse 'junk line'"), (2, "expected '+ type {' but found '+ label\\n}'"),
+                             (3, "unmatched '}'"), (4, "unmatched '}'"), (9, "cannot parse 'oops'"), (6, "'+ image' is never closed")]
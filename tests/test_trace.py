@@ -0,0 +1,27 @@
+import pytest
+
+from src import trace
+from src.trace import span
+
+
+@pytest.fixture
+def tracing():
+    was = trace.enabled()
+    trace.clear()
+    yield trace.enable
+    trace.enable(was)
+    trace.clear()
+
+
+def test_callable_args_are_not_called_while_tracing_is_off(tracing):
+    tracing(False)
+    calls = []
+    with span("test.off", ops=lambda: calls.append(1)): pass
+    assert calls == [] and trace.recent() == []
+
+
+def test_callable_args_are_resolved_when_the_span_starts(tracing):
+    tracing(True)
+    items = [1, 2, 3]
+    with span("test.on", count=lambda: len(items), path="x"): items.clear()
+    assert trace.recent()[-1]["args"] == {"count": 3, "path": "x"}
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from src import helper
+from src.helper import run_transaction, op_update_grub, op_write, HelperError
+from src.parser import GrubConfigFile
+from src.save_plan import plan_save
+
+DEFAULT_GRUB = 'GRUB_DEFAULT=0\nGRUB_TIMEOUT=5\nGRUB_CMDLINE_LINUX_DEFAULT="quiet splash"\n'
+
+
+def save(root, grub_file, settings):
+    """What MainWindow.on_save_clicked sends, against a tree under root."""
+    ops, changed, _ = plan_save(grub_file, settings, root=root, grub_path=os.path.join(root, "grub"),
+                                fp_path=os.path.join(root, "grubtamer.fingerprint"), cfg_path=os.path.join(root, "grub.cfg"))
+    if ops: run_transaction(ops, lambda line: None, None)
+    return changed, ops
+
+
+def fake_update_grub(root, calls):
+    real_run_op = helper.run_op
+
+    def run_op(op, send, cancel):
+        if op["op"] != "update_grub": return real_run_op(op, send, cancel)
+        calls.append(op)
+        with open(os.path.join(root, "grub.cfg"), 'w') as f: f.write("menuentry 'Linux' {}\n")
+        return {"returncode": 0}
+    return run_op
+
+
+def test_second_save_without_edits_changes_nothing(tmp_path, monkeypatch):
+    root, calls = str(tmp_path), []
+    monkeypatch.setattr(helper, "run_op", fake_update_grub(root, calls))
+    with open(os.path.join(root, "grub"), 'w') as f: f.write(DEFAULT_GRUB)
+    settings = dict(GrubConfigFile(DEFAULT_GRUB).settings(), GRUB_TIMEOUT="10")
+
+    changed, ops = save(root, GrubConfigFile(DEFAULT_GRUB), settings)
+    assert changed and [op["op"] for op in ops] == ["patch", "update_grub", "write_atomic"]
+    assert len(calls) == 1
+
+    with open(os.path.join(root, "grub"), 'r') as f: text = f.read()
+    changed, ops = save(root, GrubConfigFile(text), settings)
+    assert changed == [] and ops == []
+    assert len(calls) == 1
+
+
+def test_failed_update_grub_rolls_back_earlier_files(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    grub_path, fp_path = os.path.join(root, "grub"), os.path.join(root, "grubtamer.fingerprint")
+    with open(grub_path, 'w') as f: f.write(DEFAULT_GRUB)
+
+    def run_op(op, send, cancel): raise HelperError("update-grub failed", 1)
+    monkeypatch.setattr(helper, "run_op", run_op)
+    ops = [op_write(grub_path, "GRUB_TIMEOUT=10\n"), op_update_grub(), op_write(fp_path, "{}\n")]
+    with pytest.raises(HelperError, match="rolled back") as info: run_transaction(ops, lambda line: None, None)
+    assert info.value.rolled_back
+    with open(grub_path, 'r') as f: assert f.read() == DEFAULT_GRUB
+    assert not os.path.exists(fp_path)
+
+
+def test_unexpected_error_is_reported_as_rolled_back(tmp_path, monkeypatch):
+    grub_path = str(tmp_path / "grub")
+    with open(grub_path, 'w') as f: f.write(DEFAULT_GRUB)
+
+    def run_op(op, send, cancel): raise OSError("disk full")
+    monkeypatch.setattr(helper, "run_op", run_op)
+    with pytest.raises(HelperError, match="OSError: disk full") as info:
+        run_transaction([op_write(grub_path, "GRUB_TIMEOUT=10\n"), op_update_grub()], lambda line: None, None)
+    assert info.value.rolled_back
+    with open(grub_path, 'r') as f: assert f.read() == DEFAULT_GRUB
@@ -0,0 +1,22 @@
+import os
+
+from src.validator import validate_grub, validate_value
+
+THEME = "/boot/grub/themes/GrubTamer/theme.txt"
+
+
+def test_missing_theme_is_invalid(tmp_path):
+    errors = validate_grub({"GRUB_THEME": THEME, "GRUB_TIMEOUT": "5"}, root=str(tmp_path))
+    assert errors == {"GRUB_THEME": f"{THEME} does not exist"}
+
+
+def test_theme_the_save_provisions_need_not_exist(tmp_path):
+    # No themes installed yet: the save creates the default theme.txt before update-grub
+    assert validate_grub({"GRUB_THEME": THEME}, root=str(tmp_path), provisioned=[THEME]) == {}
+    assert validate_value("GRUB_THEME", "/boot/grub/themes/Other/theme.txt", str(tmp_path), [THEME])
+
+
+def test_existing_theme_is_valid(tmp_path):
+    os.makedirs(tmp_path / "boot/grub/themes/GrubTamer")
+    (tmp_path / THEME.lstrip('/')).write_text("")
+    assert validate_grub({"GRUB_THEME": THEME}, root=str(tmp_path)) == {}
@@ -9,6 +9,9 @@ fi
 echo "Removing GrubTamer..."
 rm -rf /opt/grubtamer
 rm -f /usr/local/bin/grubtamer
+rm -f /usr/local/bin/grubtamer-cli
+rm -f /usr/local/bin/grubtamer-render
+rm -f /usr/local/bin/grubtamer-dry-run
 rm -f /usr/share/applications/org.example.GrubTamer.desktop
 
 echo "Uninstallation complete."
\ No newline at end of file